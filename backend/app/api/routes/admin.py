@@ -0,0 +1,85 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.instrumentation import InstrumentedRoute
+from app.models.meta import JobRun
+from app.schemas.jobs import JobInfo, JobOverview, JobRequest, JobRunDetail, JobRunOut
+from app.services.jobs import JOBS, JobConflict, enqueue, progress_rate
+
+
+def require_admin(authorization: str | None = Header(None)) -> None:
+    """Bearer-token uit ADMIN_TOKEN; zonder token is de admin-API uitgeschakeld."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+# Admin-reads altijd op de primary: jobstatus op een achterlopende replica is misleidend
+router = APIRouter(
+    prefix="/admin/jobs", tags=["admin"], route_class=InstrumentedRoute, dependencies=[Depends(require_admin)]
+)
+
+
+def _run(run: JobRun, model: type[JobRunOut] = JobRunOut) -> JobRunOut:
+    rate, eta = progress_rate(run)
+    return model.model_validate(run).model_copy(update={"rate": rate, "eta_seconds": eta})
+
+
+@router.get("", response_model=JobOverview)
+def list_jobs(
+    job: str | None = None,
+    status: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    query = select(JobRun).order_by(JobRun.id.desc()).limit(limit)
+    if job:
+        query = query.where(JobRun.job == job)
+    if status:
+        query = query.where(JobRun.status == status)
+    runs = db.scalars(query).all()
+
+    last_runs = {
+        run.job: run
+        for run in db.scalars(select(JobRun).distinct(JobRun.job).order_by(JobRun.job, JobRun.id.desc()))
+    }
+    jobs = [
+        JobInfo(
+            name=spec.name,
+            description=spec.description,
+            lock=spec.lock,
+            params=spec.params,
+            every_hours=spec.every.total_seconds() / 3600 if spec.every else None,
+            last_run=_run(last_runs[spec.name]) if spec.name in last_runs else None,
+        )
+        for spec in JOBS.values()
+    ]
+    return JobOverview(jobs=jobs, runs=[_run(run) for run in runs])
+
+
+@router.post("", response_model=JobRunOut, status_code=202)
+def trigger_job(request: JobRequest, db: Session = Depends(get_db)):
+    if request.job not in JOBS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        run = enqueue(db, request.job, request.params, "api")
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except JobConflict as exc:
+        raise HTTPException(status_code=409, detail=f"Run {exc.run_id} of the same lock group is still active")
+    return _run(run)
+
+
+@router.get("/{run_id}", response_model=JobRunDetail)
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    run = db.get(JobRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return _run(run, JobRunDetail)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import read_session
+from app.core.http_cache import dataset_version
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse, dumps
+from app.schemas.lego import ChangeFeed
+from app.services.changes import ChangeLogExpired, change_page, parse_cursor
+
+router = APIRouter(prefix="/changes", tags=["changes"], route_class=InstrumentedRoute)
+
+MAX_LIMIT = 10_000
+STREAM_PAGE = 1_000
+# Hoe vaak een wachtende request de (gecachte) datasetversie bekijkt, en een SSE keep-alive
+POLL_INTERVAL = 1.0
+KEEPALIVE_INTERVAL = 15.0
+
+
+def _load(since: int, cursor: tuple[int, int] | None, limit: int, tables: list[str]) -> dict:
+    db = read_session()
+    try:
+        return change_page(db, since, cursor, limit, tables)
+    finally:
+        db.close()
+
+
+def _expired(exc: ChangeLogExpired) -> HTTPException:
+    return HTTPException(
+        status_code=410, detail=f"Change log starts at version {exc.floor}; resync from a full snapshot"
+    )
+
+
+async def _wait_for_version(known: int, timeout: float) -> bool:
+    """Wacht tot er een nieuwere datasetversie is dan `known`; False na `timeout` seconden."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await dataset_version() > known:
+            return True
+        await asyncio.sleep(min(POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+    return False
+
+
+@router.get("", response_model=ChangeFeed)
+async def list_changes(
+    since: int = Query(..., ge=0, description="Laatste datasetversie die de client kent"),
+    cursor: str | None = Query(None, description="`next` van de vorige pagina"),
+    limit: int = Query(1000, ge=1, le=MAX_LIMIT),
+    table: list[str] = Query([], description="Alleen deze tabellen"),
+    wait: float = Query(0, ge=0, le=60, description="Long-poll: zo lang wachten op een nieuwe versie als er niets is"),
+):
+    try:
+        parsed = parse_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            page = await run_in_threadpool(_load, since, parsed, limit, table)
+        except ChangeLogExpired as exc:
+            raise _expired(exc)
+        remaining = deadline - time.monotonic()
+        if page["changes"] or parsed is not None or remaining <= 0:
+            return FastJSONResponse(page)
+        if not await _wait_for_version(page["version"], remaining):
+            return FastJSONResponse(page)
+
+
+def _event(name: str, data: dict, event_id: int | None = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {name}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+@router.get("/stream")
+async def stream_changes(
+    since: int | None = Query(None, ge=0, description="Laatste datasetversie die de client kent"),
+    table: list[str] = Query([], description="Alleen deze tabellen"),
+    last_event_id: str | None = Header(None),
+):
+    """Server-sent events: `changes` per pagina wijzigingen, `version` als de client bij is
+    (het event-id is de versie, zodat EventSource na een reconnect verdergaat), `reset` als
+    het wijzigingslog niet meer teruggaat tot de versie van de client."""
+    if since is None:
+        if last_event_id is None or not last_event_id.isdigit():
+            raise HTTPException(status_code=422, detail="since or Last-Event-ID is required")
+        since = int(last_event_id)
+    try:
+        first = await run_in_threadpool(_load, since, None, STREAM_PAGE, table)
+    except ChangeLogExpired as exc:
+        raise _expired(exc)
+
+    async def events():
+        known, page = since, first
+        try:
+            while True:
+                if page["changes"]:
+                    yield _event("changes", {"version": page["version"], "changes": page["changes"]})
+                if page["next"] is not None:
+                    page = await run_in_threadpool(_load, known, parse_cursor(page["next"]), STREAM_PAGE, table)
+                    continue
+                known = page["version"]
+                yield _event("version", {"version": known}, event_id=known)
+                while not await _wait_for_version(known, KEEPALIVE_INTERVAL):
+                    yield b": keepalive\n\n"
+                page = await run_in_threadpool(_load, known, None, STREAM_PAGE, table)
+        except ChangeLogExpired as exc:
+            yield _event("reset", {"floor": exc.floor})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
+from app.models.lego import Color
+from app.schemas.lego import ColorSchema, ColorUsage
+from app.services.catalog import all_records, get_catalog_store
+from app.services.part_stats import get_part_stats
+
+router = APIRouter(prefix="/colors", tags=["colors"], route_class=InstrumentedRoute)
+
+
+@router.get("", response_model=list[ColorSchema])
+def list_colors(db: Session = Depends(get_read_db)):
+    if settings.catalog_store:
+        return FastJSONResponse(all_records(get_catalog_store(db).colors))
+    rows = db.execute(select(Color.id, Color.name, Color.rgb, Color.is_trans).order_by(Color.id))
+    return FastJSONResponse([row._asdict() for row in rows])
+
+
+@router.get("/usage", response_model=list[ColorUsage])
+def color_usage(limit: int | None = Query(None, ge=1), db: Session = Depends(get_read_db)):
+    usage = get_part_stats(db).color_usage
+    return FastJSONResponse(usage[:limit] if limit else usage)
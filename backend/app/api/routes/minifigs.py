@@ -2,11 +2,17 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.fields import parse_fields
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
 from app.models.lego import Minifig
-from app.schemas.lego import MinifigSummary, PaginatedMinifigs
+from app.schemas.lego import PaginatedMinifigs
+from app.services.catalog import get_catalog_store, minifig_page, searchable
+from app.services.set_details import MINIFIG_COLUMNS, MINIFIG_FIELDS, project_columns
 
-router = APIRouter(prefix="/minifigs", tags=["minifigs"])
+router = APIRouter(prefix="/minifigs", tags=["minifigs"], route_class=InstrumentedRoute)
 
 
 @router.get("", response_model=PaginatedMinifigs)
@@ -14,22 +20,27 @@ def list_minifigs(
     page: int = Query(1, ge=1),
     page_size: int = Query(24, ge=1, le=100),
     search: str | None = None,
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description=f"Komma-gescheiden selectie uit {', '.join(MINIFIG_FIELDS)}"),
+    db: Session = Depends(get_read_db),
 ):
-    query = select(Minifig)
+    projection = parse_fields(fields, MINIFIG_FIELDS)
+    if settings.catalog_store and searchable(search):
+        return FastJSONResponse(minifig_page(get_catalog_store(db), page, page_size, projection, search))
+
+    query = select(*project_columns(MINIFIG_COLUMNS, projection, "fig_num"))
     if search:
         query = query.where(Minifig.name.ilike(f"%{search}%"))
 
     total = db.scalar(select(func.count()).select_from(query.subquery()))
-    minifigs = db.scalars(
-        query.order_by(Minifig.name)
+    rows = db.execute(
+        query.order_by(Minifig.name, Minifig.fig_num)
         .offset((page - 1) * page_size)
         .limit(page_size)
-    ).all()
-
-    return PaginatedMinifigs(
-        total=total or 0,
-        page=page,
-        page_size=page_size,
-        results=[MinifigSummary.model_validate(m) for m in minifigs],
     )
+
+    return FastJSONResponse({
+        "total": total or 0,
+        "page": page,
+        "page_size": page_size,
+        "results": [row._asdict() for row in rows],
+    })
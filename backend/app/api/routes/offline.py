@@ -0,0 +1,39 @@
+import hashlib
+import re
+from pathlib import Path
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse, Response
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.core.instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/offline", tags=["offline"], route_class=InstrumentedRoute)
+
+# Alleen bestandsnamen zoals write_bundle ze maakt; geen paden
+BUNDLE_NAME = re.compile(r"(base|delta)\.[0-9-]+\.[0-9a-f]+\.json\.gz")
+
+
+@router.get("/manifest.json")
+def get_manifest(if_none_match: str | None = Header(None)):
+    """Huidige basis en de deltas ernaartoe; clients vragen dit bij elke sync (ETag → meestal een 304)."""
+    path = Path(settings.offline_dir) / "manifest.json"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No offline catalogue published")
+    body = path.read_bytes()
+    headers = {"ETag": f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/{name}")
+def get_bundle(name: str):
+    """Basis of delta (gzip); de naam bevat een content-hash, dus onbeperkt cachebaar."""
+    path = Path(settings.offline_dir) / name
+    if not BUNDLE_NAME.fullmatch(name) or not path.exists():
+        raise HTTPException(status_code=404, detail="Offline bundle not found")
+    return FileResponse(
+        path, media_type="application/gzip", headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.fields import parse_fields
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
+from app.models.lego import Inventory, InventoryPart, Part, Set
+from app.schemas.lego import PaginatedPartSets
+from app.services.catalog import get_catalog_store, part_set_page
+from app.services.set_details import SUMMARY_COLUMNS, SUMMARY_FIELDS, project_columns
+
+router = APIRouter(prefix="/parts", tags=["parts"], route_class=InstrumentedRoute)
+
+
+@router.get("/{part_num}/sets", response_model=PaginatedPartSets)
+def part_sets(
+    part_num: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(24, ge=1, le=100),
+    fields: str | None = Query(None, description=f"Komma-gescheiden selectie uit {', '.join(SUMMARY_FIELDS)}"),
+    db: Session = Depends(get_read_db),
+):
+    """Sets waarvan de laatste inventaris dit onderdeel bevat (ook als reserve), in de volgorde van /api/sets."""
+    projection = parse_fields(fields, SUMMARY_FIELDS)
+    if settings.catalog_store:
+        payload = part_set_page(get_catalog_store(db), part_num, page, page_size, projection)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Part not found")
+        return FastJSONResponse(payload)
+
+    if db.scalar(select(Part.part_num).where(Part.part_num == part_num)) is None:
+        raise HTTPException(status_code=404, detail="Part not found")
+    latest = (
+        select(Inventory.id, Inventory.set_num)
+        .distinct(Inventory.set_num)
+        .order_by(Inventory.set_num, Inventory.version.desc())
+        .subquery()
+    )
+    containing = (
+        select(latest.c.set_num)
+        .join(InventoryPart, InventoryPart.inventory_id == latest.c.id)
+        .where(InventoryPart.part_num == part_num)
+    )
+    query = select(*project_columns(SUMMARY_COLUMNS, projection, "set_num")).where(Set.set_num.in_(containing))
+
+    total = db.scalar(select(func.count()).select_from(query.subquery()))
+    rows = db.execute(
+        query.order_by(Set.year.desc(), Set.name, Set.set_num)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    return FastJSONResponse({
+        "part_num": part_num,
+        "total": total or 0,
+        "page": page,
+        "page_size": page_size,
+        "results": [row._asdict() for row in rows],
+    })
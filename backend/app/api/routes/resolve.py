@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.database import get_read_db
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
+from app.schemas.lego import ResolveRequest, ResolveResponse
+from app.services.resolver import get_resolver_index, resolve
+
+router = APIRouter(prefix="/resolve", tags=["resolve"], route_class=InstrumentedRoute)
+
+
+@router.post("", response_model=ResolveResponse)
+def resolve_identifiers(body: ResolveRequest, db: Session = Depends(get_read_db)):
+    index = get_resolver_index(db)
+    results = [resolve(index, identifier) for identifier in body.identifiers]
+    resolved = sum(1 for r in results if r["match_type"])
+    return FastJSONResponse({"resolved": resolved, "unresolved": len(results) - resolved, "results": results})
@@ -1,20 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.models.lego import BricksetData, Inventory, InventoryMinifig, InventoryPart, Set
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.fields import parse_fields
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import COLUMNAR_JSON, JSON, MSGPACK, FastJSONResponse, negotiate, negotiated_response
+from app.models.lego import BricksetHistory, Set, SetValueMetric
 from app.schemas.lego import (
-    BricksetInfo,
+    HistoryMetric,
     InventoryPartDetail,
-    MinifigSummary,
     PaginatedSets,
-    SetDetail,
+    PartsFormat,
+    PriceRegion,
+    SetBatchRequest,
+    SetBatchResponse,
+    SetBreakdown,
     SetFullDetail,
-    SetSummary,
+    SetHistory,
+    SetSearchResults,
+    SetSort,
 )
+from app.services.catalog import get_catalog_store, searchable, set_page
+from app.services.facets import PRICE_BANDS, FacetQuery, faceted_search, get_facet_index, price_band_label
+from app.services.part_lists import columnar_parts, inventory_part_rows, latest_inventory_id
+from app.services.part_stats import get_part_stats, set_breakdown
+from app.services.set_details import (
+    SET_DETAIL_FIELDS,
+    SET_SECTIONS,
+    SUMMARY_COLUMNS,
+    SUMMARY_FIELDS,
+    SetProjection,
+    project_columns,
+    set_detail_payload,
+    set_detail_payloads,
+)
+
+router = APIRouter(prefix="/sets", tags=["sets"], route_class=InstrumentedRoute)
 
-router = APIRouter(prefix="/sets", tags=["sets"])
+
+PARTS_MEDIA_TYPES = (JSON, COLUMNAR_JSON, MSGPACK)
+FIELDS_DESCRIPTION = (
+    f"Komma-gescheiden selectie uit {', '.join(SUMMARY_FIELDS)}, de secties {', '.join(SET_SECTIONS)} "
+    "en losse Brickset-velden (brickset.price_us). Zonder basisvelden komen die allemaal mee."
+)
+PRICE_BAND_LABELS = [price_band_label(i) for i in range(len(PRICE_BANDS))]
+PARTS_FORMATS = {"rows": JSON, "columnar": COLUMNAR_JSON, "msgpack": MSGPACK}
 
 
 @router.get("", response_model=PaginatedSets)
@@ -25,9 +57,40 @@ def list_sets(
     year_min: int | None = None,
     year_max: int | None = None,
     search: str | None = None,
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description=f"Komma-gescheiden selectie uit {', '.join(SUMMARY_FIELDS)}"),
+    sort: SetSort | None = Query(None, description="Sorteer op een waarde-metric; alleen sets met die metric"),
+    region: PriceRegion = Query("us", description="Prijsregio voor sort= en de waardefilters"),
+    price_per_piece_max: float | None = None,
+    price_per_gram_max: float | None = None,
+    theme_percentile_max: float | None = Query(None, ge=0, le=100, description="0 = goedkoopste van het thema"),
+    db: Session = Depends(get_read_db),
 ):
-    query = select(Set)
+    projection = parse_fields(fields, SUMMARY_FIELDS)
+    value_filters = {
+        SetValueMetric.price_per_piece: price_per_piece_max,
+        SetValueMetric.price_per_gram: price_per_gram_max,
+        SetValueMetric.theme_percentile: theme_percentile_max,
+    }
+    valued = sort is not None or any(limit is not None for limit in value_filters.values())
+    if settings.catalog_store and not valued and searchable(search):
+        store = get_catalog_store(db)
+        return FastJSONResponse(set_page(store, page, page_size, projection, theme_id, year_min, year_max, search))
+
+    # Alleen de gevraagde kolommen in de select-lijst; set_num altijd
+    query = select(*project_columns(SUMMARY_COLUMNS, projection, "set_num"))
+    if valued:
+        # Voorberekende metrics (na elke import/sync ververst) in plaats van een expressie per rij
+        query = query.join(
+            SetValueMetric, (SetValueMetric.set_num == Set.set_num) & (SetValueMetric.region == region)
+        ).add_columns(
+            SetValueMetric.price,
+            SetValueMetric.price_per_piece,
+            SetValueMetric.price_per_gram,
+            SetValueMetric.theme_percentile,
+        )
+        for column, limit in value_filters.items():
+            if limit is not None:
+                query = query.where(column <= limit)
 
     if theme_id is not None:
         query = query.where(Set.theme_id == theme_id)
@@ -38,78 +101,144 @@ def list_sets(
     if search:
         query = query.where(Set.name.ilike(f"%{search}%"))
 
+    if sort is not None:
+        # Volgt de index (region, metric, set_num), ook aflopend
+        column = getattr(SetValueMetric, sort.removeprefix("-"))
+        query = query.where(column.is_not(None))
+        descending = sort.startswith("-")
+        order = (column.desc(), SetValueMetric.set_num.desc()) if descending else (column, SetValueMetric.set_num)
+    else:
+        order = (Set.year.desc(), Set.name, Set.set_num)
+
     total = db.scalar(select(func.count()).select_from(query.subquery()))
-    sets = db.scalars(
-        query.order_by(Set.year.desc(), Set.name)
+    rows = db.execute(
+        query.order_by(*order)
         .offset((page - 1) * page_size)
         .limit(page_size)
-    ).all()
+    )
+
+    return FastJSONResponse({
+        "total": total or 0,
+        "page": page,
+        "page_size": page_size,
+        "results": [row._asdict() for row in rows],
+    })
+
 
-    return PaginatedSets(
-        total=total or 0,
-        page=page,
-        page_size=page_size,
-        results=[SetSummary.model_validate(s) for s in sets],
+@router.get("/search", response_model=SetSearchResults)
+def search_sets(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(24, ge=1, le=100),
+    theme_id: list[int] = Query([], description="Eén of meer thema's (OF)"),
+    decade: list[int] = Query([], description="Decennium, bijv. 1990 (OF)"),
+    availability: list[str] = Query([], description="Brickset availability (OF)"),
+    price_band: list[str] = Query([], description=f"Prijsband in de gekozen regio: {', '.join(PRICE_BAND_LABELS)}"),
+    tag: list[str] = Query([], description="Brickset tags (OF)"),
+    packaging_type: list[str] = Query([]),
+    region: PriceRegion = "us",
+    year_min: int | None = None,
+    year_max: int | None = None,
+    price_min: float | None = None,
+    price_max: float | None = None,
+    age: int | None = Query(None, description="Geschikt voor deze leeftijd (age_min <= age)"),
+    rating_min: float | None = None,
+    search: str | None = None,
+    facet_limit: int = Query(50, ge=1, le=1000, description="Maximaal aantal waarden per facet"),
+    db: Session = Depends(get_read_db),
+):
+    query = FacetQuery(
+        theme_id=theme_id, decade=decade, availability=availability, price_band=price_band, tag=tag,
+        packaging_type=packaging_type, region=region, year_min=year_min, year_max=year_max,
+        price_min=price_min, price_max=price_max, age=age, rating_min=rating_min, search=search,
     )
+    return FastJSONResponse(faceted_search(get_facet_index(db), query, page, page_size, facet_limit))
 
 
 @router.get("/{set_num}", response_model=SetFullDetail)
-def get_set(set_num: str, db: Session = Depends(get_db)):
-    lego_set = db.scalar(
-        select(Set)
-        .options(joinedload(Set.theme))
-        .where(Set.set_num == set_num)
-    )
-    if not lego_set:
+def get_set(
+    set_num: str,
+    parts: bool = Query(True, description="false: onderdelen apart ophalen via /parts"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db),
+):
+    projection = SetProjection.from_fields(parse_fields(fields, SET_DETAIL_FIELDS))
+    payload = set_detail_payload(db, set_num, include_parts=parts, projection=projection)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Set not found")
+    return FastJSONResponse(payload)
 
-    # Brickset verrijkingsdata
-    brickset_row = db.scalar(
-        select(BricksetData).where(BricksetData.set_num == set_num)
-    )
-    brickset = BricksetInfo.model_validate(brickset_row) if brickset_row else None
 
-    # Meest recente inventaris ophalen
-    inventory = db.scalar(
-        select(Inventory)
-        .where(Inventory.set_num == set_num)
-        .order_by(Inventory.version.desc())
-    )
+@router.post("/batch", response_model=SetBatchResponse)
+def get_sets_batch(
+    body: SetBatchRequest,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db),
+):
+    projection = SetProjection.from_fields(parse_fields(fields, SET_DETAIL_FIELDS))
+    set_nums = list(dict.fromkeys(body.set_nums))
+    payloads = set_detail_payloads(db, set_nums, projection)
+    return FastJSONResponse({
+        "sets": [payloads[set_num] for set_num in set_nums if set_num in payloads],
+        "missing": [set_num for set_num in set_nums if set_num not in payloads],
+    })
+
+
+@router.get(
+    "/{set_num}/parts",
+    response_model=list[InventoryPartDetail],
+    responses={
+        200: {
+            "description": (
+                f"`{JSON}`: één object per regel. `{COLUMNAR_JSON}` en `{MSGPACK}`: kolomgewijs, "
+                "met woordenboeken voor onderdelen en kleuren waarnaar elke regel met een index verwijst."
+            ),
+            "content": {COLUMNAR_JSON: {}, MSGPACK: {}},
+        },
+        406: {"description": "Geen ondersteund media type in de Accept-header"},
+    },
+)
+def get_set_parts(
+    set_num: str,
+    request: Request,
+    format: PartsFormat | None = Query(None, description="Overschrijft de Accept-header"),
+    db: Session = Depends(get_read_db),
+):
+    media_type = PARTS_FORMATS[format] if format else negotiate(request.headers.get("accept"), PARTS_MEDIA_TYPES)
+
+    inventory_id = latest_inventory_id(db, set_num)
+    if inventory_id is None and db.get(Set, set_num) is None:
+        raise HTTPException(status_code=404, detail="Set not found")
+    rows = inventory_part_rows(db, inventory_id) if inventory_id is not None else []
 
-    parts: list[InventoryPartDetail] = []
-    minifigs: list[MinifigSummary] = []
-
-    if inventory:
-        inv_parts = db.scalars(
-            select(InventoryPart)
-            .options(joinedload(InventoryPart.part), joinedload(InventoryPart.color))
-            .where(InventoryPart.inventory_id == inventory.id)
-            .order_by(InventoryPart.part_num)
-        ).all()
-        parts = [
-            InventoryPartDetail(
-                part_num=ip.part_num,
-                part_name=ip.part.name,
-                color_id=ip.color_id,
-                color_name=ip.color.name,
-                color_rgb=ip.color.rgb,
-                quantity=ip.quantity,
-                is_spare=ip.is_spare,
-                img_url=ip.img_url,
-            )
-            for ip in inv_parts
-        ]
-
-        inv_minifigs = db.scalars(
-            select(InventoryMinifig)
-            .options(joinedload(InventoryMinifig.minifig))
-            .where(InventoryMinifig.inventory_id == inventory.id)
-        ).all()
-        minifigs = [MinifigSummary.model_validate(im.minifig) for im in inv_minifigs]
-
-    return SetFullDetail(
-        **SetDetail.model_validate(lego_set).model_dump(),
-        parts=parts,
-        minifigs=minifigs,
-        brickset=brickset,
+    if media_type == JSON:
+        return negotiated_response(media_type, rows)
+    return negotiated_response(media_type, columnar_parts(set_num, rows))
+
+
+@router.get("/{set_num}/breakdown", response_model=SetBreakdown)
+def get_set_breakdown(set_num: str, include_spares: bool = False, db: Session = Depends(get_read_db)):
+    breakdown = set_breakdown(get_part_stats(db), set_num, include_spares=include_spares)
+    if breakdown is None:
+        raise HTTPException(status_code=404, detail="Set not found")
+    return FastJSONResponse(breakdown)
+
+
+@router.get("/{set_num}/history", response_model=SetHistory)
+def get_set_history(set_num: str, metric: HistoryMetric | None = None, db: Session = Depends(get_read_db)):
+    if db.get(Set, set_num) is None:
+        raise HTTPException(status_code=404, detail="Set not found")
+
+    query = select(BricksetHistory.metric, BricksetHistory.observed_at, BricksetHistory.value).where(
+        BricksetHistory.set_num == set_num
     )
+    if metric:
+        query = query.where(BricksetHistory.metric == metric)
+    rows = db.execute(query.order_by(BricksetHistory.metric, BricksetHistory.observed_at))
+
+    series: dict[str, list[dict]] = {}
+    for row in rows:
+        series.setdefault(row.metric, []).append({"observed_at": row.observed_at, "value": row.value})
+    return FastJSONResponse({
+        "set_num": set_num,
+        "series": [{"metric": name, "points": points} for name, points in series.items()],
+    })
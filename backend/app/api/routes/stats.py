@@ -2,15 +2,17 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.models.lego import Color, Minifig, Part, Set, Theme
-from app.schemas.lego import Stats
+from app.core.database import get_read_db
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
+from app.models.lego import BricksetMonthlyRollup, Color, Minifig, Part, Set, Theme
+from app.schemas.lego import HistoryMetric, MetricTrend, Stats
 
-router = APIRouter(prefix="/stats", tags=["stats"])
+router = APIRouter(prefix="/stats", tags=["stats"], route_class=InstrumentedRoute)
 
 
 @router.get("", response_model=Stats)
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_read_db)):
     total_sets = db.scalar(select(func.count(Set.set_num))) or 0
     total_themes = db.scalar(select(func.count(Theme.id))) or 0
     total_parts = db.scalar(select(func.count(Part.part_num))) or 0
@@ -37,14 +39,41 @@ def get_stats(db: Session = Depends(get_db)):
     ).all()
     top_themes = [{"name": row.name, "count": row.count} for row in top_themes_rows]
 
-    return Stats(
-        total_sets=total_sets,
-        total_themes=total_themes,
-        total_parts=total_parts,
-        total_minifigs=total_minifigs,
-        total_colors=total_colors,
-        year_min=year_min,
-        year_max=year_max,
-        sets_per_year=sets_per_year,
-        top_themes=top_themes,
-    )
+    return FastJSONResponse({
+        "total_sets": total_sets,
+        "total_themes": total_themes,
+        "total_parts": total_parts,
+        "total_minifigs": total_minifigs,
+        "total_colors": total_colors,
+        "year_min": year_min,
+        "year_max": year_max,
+        "sets_per_year": sets_per_year,
+        "top_themes": top_themes,
+    })
+
+
+@router.get("/trends", response_model=MetricTrend)
+def metric_trend(metric: HistoryMetric = "price_us", db: Session = Depends(get_read_db)):
+    rows = db.execute(
+        select(
+            BricksetMonthlyRollup.month,
+            func.sum(BricksetMonthlyRollup.set_count).label("set_count"),
+            func.sum(BricksetMonthlyRollup.sum_value).label("sum_value"),
+            func.min(BricksetMonthlyRollup.min_value).label("min_value"),
+            func.max(BricksetMonthlyRollup.max_value).label("max_value"),
+        )
+        .where(BricksetMonthlyRollup.metric == metric)
+        .group_by(BricksetMonthlyRollup.month)
+        .order_by(BricksetMonthlyRollup.month)
+    ).all()
+    points = [
+        {
+            "month": r.month,
+            "set_count": r.set_count,
+            "avg_value": r.sum_value / r.set_count,
+            "min_value": r.min_value,
+            "max_value": r.max_value,
+        }
+        for r in rows
+    ]
+    return FastJSONResponse({"metric": metric, "theme_id": None, "points": points})
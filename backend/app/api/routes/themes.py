@@ -2,20 +2,55 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.models.lego import Set, Theme
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.instrumentation import InstrumentedRoute
+from app.core.responses import FastJSONResponse
+from app.models.lego import BricksetMonthlyRollup, Set, Theme
+from app.schemas.lego import HistoryMetric, MetricTrend
 from app.schemas.lego import Theme as ThemeSchema
+from app.services.catalog import all_records, get_catalog_store
 
-router = APIRouter(prefix="/themes", tags=["themes"])
+router = APIRouter(prefix="/themes", tags=["themes"], route_class=InstrumentedRoute)
 
 
 @router.get("", response_model=list[ThemeSchema])
-def list_themes(db: Session = Depends(get_db)):
-    themes = db.scalars(select(Theme).order_by(Theme.name)).all()
-    return [ThemeSchema.model_validate(t) for t in themes]
+def list_themes(db: Session = Depends(get_read_db)):
+    if settings.catalog_store:
+        return FastJSONResponse(all_records(get_catalog_store(db).themes))
+    rows = db.execute(select(Theme.id, Theme.name, Theme.parent_id).order_by(Theme.name))
+    return FastJSONResponse([row._asdict() for row in rows])
 
 
 @router.get("/{theme_id}/sets-count")
-def theme_set_count(theme_id: int, db: Session = Depends(get_db)):
+def theme_set_count(theme_id: int, db: Session = Depends(get_read_db)):
+    if settings.catalog_store:
+        return {"theme_id": theme_id, "count": len(get_catalog_store(db).set_themes.get(theme_id, ()))}
     count = db.scalar(select(func.count()).where(Set.theme_id == theme_id))
     return {"theme_id": theme_id, "count": count or 0}
+
+
+@router.get("/{theme_id}/trends", response_model=MetricTrend)
+def theme_trend(theme_id: int, metric: HistoryMetric = "price_us", db: Session = Depends(get_read_db)):
+    rows = db.execute(
+        select(
+            BricksetMonthlyRollup.month,
+            BricksetMonthlyRollup.set_count,
+            BricksetMonthlyRollup.sum_value,
+            BricksetMonthlyRollup.min_value,
+            BricksetMonthlyRollup.max_value,
+        )
+        .where(BricksetMonthlyRollup.theme_id == theme_id, BricksetMonthlyRollup.metric == metric)
+        .order_by(BricksetMonthlyRollup.month)
+    )
+    points = [
+        {
+            "month": r.month,
+            "set_count": r.set_count,
+            "avg_value": r.sum_value / r.set_count,
+            "min_value": r.min_value,
+            "max_value": r.max_value,
+        }
+        for r in rows
+    ]
+    return FastJSONResponse({"metric": metric, "theme_id": theme_id, "points": points})
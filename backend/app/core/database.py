@@ -1,10 +1,33 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import functools
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_sessionmaker = sessionmaker(autocommit=False, autoflush=False)
+
+
+@functools.cache
+def get_engine() -> Engine:
+    """Primary: alle schrijfacties (scripts, migraties) en fallback voor reads.
+
+    Pas bij het eerste gebruik aangemaakt: importeren (en daarmee het starten van een
+    worker of script) laadt de PostgreSQL-driver nog niet.
+    """
+    return create_engine(settings.database_url)
+
+
+def SessionLocal() -> Session:  # noqa: N802 — zelfde naam als de sessionmaker die dit was
+    return _sessionmaker(bind=get_engine())
 
 
 class Base(DeclarativeBase):
@@ -17,3 +40,147 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------------------------------------------------------------------------
+# Read replicas
+# ---------------------------------------------------------------------------
+
+# Replicatievertraging in seconden; 0 als alle ontvangen WAL is toegepast (of op een primary)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@dataclass
+class Replica:
+    url: str
+    engine: Engine
+    sessionmaker: sessionmaker
+    healthy: bool = False
+    lag: float | None = None
+    error: str | None = None
+
+
+# Replica van het lopende request; _UNPINNED buiten een request (scripts, warm-up)
+_UNPINNED = object()
+_pinned_replica: ContextVar[Replica | None] = ContextVar("pinned_replica")
+
+
+class ReplicaRouter:
+    """Verdeelt reads round-robin over gezonde replicas, met de primary als fallback.
+
+    Een replica telt mee zolang de laatste check slaagde en de vertraging onder
+    `replica_max_lag` bleef. Checks draaien hooguit eens per `replica_check_interval`
+    seconden, in het request dat ze als eerste nodig heeft; andere requests gebruiken
+    intussen de vorige uitkomst.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.urls = urls
+        self._replicas: list[Replica] | None = None
+        self._build_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._next = itertools.count()
+
+    @property
+    def replicas(self) -> list[Replica]:
+        # Engines pas bij het eerste gebruik, net als de primary
+        if self._replicas is None:
+            with self._build_lock:
+                if self._replicas is None:
+                    self._replicas = [
+                        Replica(url, replica_engine, sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+                        for url in self.urls
+                        for replica_engine in [
+                            create_engine(url, pool_pre_ping=True, connect_args={"connect_timeout": 2})
+                        ]
+                    ]
+        return self._replicas
+
+    @property
+    def engines(self) -> list[Engine]:
+        return [replica.engine for replica in self.replicas]
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica.lag = float(conn.scalar(REPLICA_LAG_SQL))
+                replica.healthy = replica.lag <= settings.replica_max_lag
+                replica.error = None if replica.healthy else f"lag {replica.lag:.1f}s"
+            except Exception as exc:  # elke fout (verbinding, timeout) maakt de replica ongezond
+                replica.healthy = False
+                replica.lag = None
+                replica.error = type(exc).__name__
+        self._checked_at = time.monotonic()
+
+    def _maybe_check(self) -> None:
+        if time.monotonic() - self._checked_at < settings.replica_check_interval:
+            return
+        if self._lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+
+    def pick(self) -> Replica | None:
+        """Gezonde replica (round-robin), of None voor de primary."""
+        if self.replicas:
+            self._maybe_check()
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if healthy:
+                return healthy[next(self._next) % len(healthy)]
+        return None
+
+    def session(self) -> Session:
+        """Session op de gepinde replica (zie pinned_replica), anders op een gezonde replica of de primary."""
+        replica = _pinned_replica.get(_UNPINNED)
+        if replica is _UNPINNED:
+            replica = self.pick()
+        return replica.sessionmaker() if replica is not None else SessionLocal()
+
+    def healthy_count(self) -> int:
+        return sum(replica.healthy for replica in self._replicas or ())
+
+
+replicas = ReplicaRouter(settings.replica_urls_list)
+
+
+@contextmanager
+def pinned_replica(replica: Replica | None) -> Iterator[None]:
+    """Alle read-sessions van dit request (ook in de threadpool) op dezelfde replica, of op de primary.
+
+    Dan leest de ETag-versie dezelfde data als de handler; twee replicas kunnen verschillend
+    ver achterlopen.
+    """
+    token = _pinned_replica.set(replica)
+    try:
+        yield
+    finally:
+        _pinned_replica.reset(token)
+
+
+def pinned_source() -> str | None:
+    """Leesbron waarop dit request gepind is: replica-URL, "" voor de primary, None zonder pin."""
+    replica = _pinned_replica.get(_UNPINNED)
+    if replica is _UNPINNED:
+        return None
+    return replica.url if replica is not None else ""
+
+
+def read_session() -> Session:
+    return replicas.session()
+
+
+def get_read_db():
+    """Zoals get_db, maar voor read-only handlers: loopt via een replica als die er is."""
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,157 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Generic, Iterator, TypeVar
+
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.meta import CatalogChange, DatasetVersion
+
+T = TypeVar("T")
+
+# Zo lang blijft het wijzigingslog (catalog_changes) bewaard
+CHANGE_RETENTION = timedelta(days=90)
+
+# Sleutel van de advisory lock die schrijvers van de dataset (import, sync) delen
+DATASET_LOCK_KEY = 0x62766473
+
+
+def current_version(db) -> int:
+    """Huidige datasetversie; 0 als er nog nooit iets gepubliceerd is."""
+    return db.scalar(select(func.max(DatasetVersion.id))) or 0
+
+
+def change_log_floor(db) -> int:
+    """Vanaf deze versie is het wijzigingslog compleet; wie op een oudere versie zit, moet volledig resyncen.
+
+    Versies ouder dan CHANGE_RETENTION zijn opgeruimd, en na een rollback klopt het log
+    van eerdere versies niet meer met de teruggezette data.
+    """
+    return db.scalar(
+        select(func.coalesce(func.max(DatasetVersion.id), 0)).where(
+            or_(DatasetVersion.created_at < func.now() - CHANGE_RETENTION, DatasetVersion.source == "rollback")
+        )
+    )
+
+
+def bump_version(conn, source: str) -> int:
+    """Publiceer een nieuwe datasetversie zodat API-caches herladen.
+
+    Gelogde wijzigingen zonder versie horen bij deze versie en worden in dezelfde commit zichtbaar.
+    """
+    version = conn.scalar(insert(DatasetVersion).values(source=source).returning(DatasetVersion.id))
+    conn.execute(update(CatalogChange).where(CatalogChange.version.is_(None)).values(version=version))
+    conn.execute(delete(CatalogChange).where(CatalogChange.version <= change_log_floor(conn)))
+    conn.commit()
+    return version
+
+
+@contextmanager
+def dataset_write_lock(engine: Engine) -> Iterator[None]:
+    """Advisory lock voor de duur van een import of sync, op een eigen verbinding.
+
+    Een blue/green import kopieert de live tabellen en wisselt ze later om; een sync die
+    daartussen schrijft zou verloren gaan. Wie de lock niet krijgt, wacht.
+    """
+    with engine.connect() as conn:
+        if not conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": DATASET_LOCK_KEY}):
+            print("Wachten tot een lopende import of sync klaar is...")
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": DATASET_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": DATASET_LOCK_KEY})
+            conn.commit()
+
+
+@dataclass
+class PinnedVersion:
+    """Datasetversie waarvoor een request zijn response maakt (de versie in de ETag)."""
+
+    version: int
+    # False zodra een cache die de handler gebruikte een andere versie had
+    consistent: bool = True
+
+
+_pinned_version: ContextVar[PinnedVersion | None] = ContextVar("pinned_version", default=None)
+
+
+@contextmanager
+def pinned_version(version: int) -> Iterator[PinnedVersion]:
+    """Pin de datasetversie voor de rest van het request, ook in de threadpool van de handler.
+
+    Een VersionedCache die ouder is dan deze versie herlaadt meteen in plaats van na zijn
+    eigen `dataset_check_interval`; na afloop zegt `consistent` of de response echt bij
+    deze versie hoort.
+    """
+    pinned = PinnedVersion(version)
+    token = _pinned_version.set(pinned)
+    try:
+        yield pinned
+    finally:
+        _pinned_version.reset(token)
+
+
+class VersionedCache(Generic[T]):
+    """In-memory waarde die opnieuw wordt opgebouwd zodra de datasetversie wijzigt.
+
+    De versie wordt hooguit eens per `dataset_check_interval` seconden opgevraagd,
+    zodat een cache-hit geen extra query kost; binnen een request met een nieuwere
+    gepinde versie (zie pinned_version) meteen.
+    """
+
+    def __init__(self, loader: Callable[[Session], T]):
+        self._loader = loader
+        self._lock = threading.Lock()
+        # (waarde, datasetversie) in één attribuut: een lezer ziet nooit de waarde van de ene
+        # versie met het nummer van de andere
+        self._loaded: tuple[T, int] | None = None
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._loaded[1] if self._loaded is not None else -1
+
+    @property
+    def current(self) -> T | None:
+        """Laatst geladen waarde, zonder versiecontrole (voor metrics)."""
+        return self._loaded[0] if self._loaded is not None else None
+
+    def peek(self) -> T | None:
+        """Waarde zonder databasecontrole; None als die ontbreekt of opnieuw gecontroleerd moet worden."""
+        loaded = self._loaded
+        if loaded is not None and time.monotonic() - self._checked_at < settings.dataset_check_interval:
+            return loaded[0]
+        return None
+
+    def _fresh(self, loaded: tuple[T, int] | None, pinned: PinnedVersion | None) -> bool:
+        if loaded is None or time.monotonic() - self._checked_at >= settings.dataset_check_interval:
+            return False
+        return pinned is None or pinned.version <= loaded[1]
+
+    def get(self, db: Session) -> T:
+        pinned = _pinned_version.get()
+        loaded = self._loaded
+        if not self._fresh(loaded, pinned):
+            with self._lock:
+                loaded = self._loaded
+                if not self._fresh(loaded, pinned):
+                    version = current_version(db)
+                    if loaded is None or version != loaded[1]:
+                        loaded = self._loaded = (self._loader(db), version)
+                    self._checked_at = time.monotonic()
+        value, version = loaded
+        if pinned is not None and version != pinned.version:
+            pinned.consistent = False
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = None
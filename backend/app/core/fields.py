@@ -0,0 +1,18 @@
+from typing import Iterable
+
+from fastapi import HTTPException
+
+
+def parse_fields(fields: str | None, allowed: Iterable[str]) -> tuple[str, ...] | None:
+    """Komma-gescheiden `fields=` parameter, in de volgorde van `allowed`.
+
+    None als de parameter ontbreekt (alles teruggeven); onbekende velden geven een 422.
+    """
+    if fields is None:
+        return None
+    allowed = tuple(allowed)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in allowed if field in requested)
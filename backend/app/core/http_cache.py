@@ -0,0 +1,351 @@
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import brotli
+import zstandard
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+from app.core.database import pinned_replica, pinned_source, read_session, replicas
+from app.core.dataset import VersionedCache, current_version, pinned_version
+from app.core.instrumentation import current_metrics, registry
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int
+    stale_while_revalidate: int
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+
+
+# De catalogus wijzigt hooguit eens per dag (import/sync); een ETag-check kost daarna alleen een 304
+CATALOGUE = CachePolicy(max_age=300, stale_while_revalidate=86_400)
+AGGREGATES = CachePolicy(max_age=3_600, stale_while_revalidate=86_400)
+
+# Route-templates (zoals in de routers) met hun cachebeleid; de eerste match wint
+CACHE_POLICIES: list[tuple[str, CachePolicy]] = [
+    ("/api/sets", CATALOGUE),
+    ("/api/sets/search", CATALOGUE),
+    ("/api/sets/{set_num}", CATALOGUE),
+    ("/api/sets/{set_num}/parts", CATALOGUE),
+    ("/api/sets/{set_num}/breakdown", CATALOGUE),
+    ("/api/sets/{set_num}/history", CATALOGUE),
+    ("/api/themes", AGGREGATES),
+    ("/api/themes/{theme_id}/sets-count", CATALOGUE),
+    ("/api/themes/{theme_id}/trends", AGGREGATES),
+    ("/api/minifigs", CATALOGUE),
+    ("/api/parts/{part_num}/sets", CATALOGUE),
+    ("/api/stats", AGGREGATES),
+    ("/api/stats/trends", AGGREGATES),
+    ("/api/colors", AGGREGATES),
+    ("/api/colors/usage", AGGREGATES),
+]
+
+_COMPILED = [
+    (re.compile(re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(template))), template, policy)
+    for template, policy in CACHE_POLICIES
+]
+
+
+def match_policy(path: str) -> tuple[str, CachePolicy] | None:
+    for pattern, template, policy in _COMPILED:
+        if pattern.fullmatch(path):
+            return template, policy
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Compressie
+# ---------------------------------------------------------------------------
+
+# Voorkeursvolgorde bij gelijke q-waarde
+ENCODINGS = ("zstd", "br", "gzip")
+MIN_COMPRESS_BYTES = 1024
+# Vanaf hier comprimeren in de threadpool: brotli 9 kost op 16 KB al ca. 5 ms, op 400 KB
+# ca. 30 ms, en zolang blokkeert het de event loop voor alle requests van de worker
+THREADPOOL_COMPRESS_BYTES = 16 * 1024
+_COMPRESSIBLE = ("application/json", "application/vnd.", "application/x-msgpack", "text/")
+
+_zstd_fast = zstandard.ZstdCompressor(level=3)
+_zstd_best = zstandard.ZstdCompressor(level=10)
+
+
+def compress(body: bytes, encoding: str, best: bool) -> bytes:
+    """Comprimeer `body`; `best` voor varianten die in de cache belanden en dus maar één keer gemaakt worden."""
+    if encoding == "zstd":
+        return (_zstd_best if best else _zstd_fast).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=9 if best else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    return body
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str:
+    """Beste encoding uit de Accept-Encoding header, of 'identity'."""
+    if not accept_encoding:
+        return "identity"
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressible(headers: Headers) -> bool:
+    return "content-encoding" not in headers and headers.get("content-type", "").startswith(_COMPRESSIBLE)
+
+
+# ---------------------------------------------------------------------------
+# ETag en variantcache
+# ---------------------------------------------------------------------------
+
+# Per leesbron (zie pinned_source): replicas lopen elk anders achter, dus elk een eigen versie
+_dataset_versions: dict[str | None, VersionedCache[int]] = {}
+
+
+def _version_cache() -> VersionedCache[int]:
+    source = pinned_source()
+    cache = _dataset_versions.get(source)
+    if cache is None:
+        cache = _dataset_versions.setdefault(source, VersionedCache(current_version))
+    return cache
+
+
+def _load_version() -> int:
+    # Via de gepinde leesbron, dezelfde als die van de handler: een ETag mag niet vooruitlopen
+    # op de replica waar de handler uit leest
+    db = read_session()
+    try:
+        return _version_cache().get(db)
+    finally:
+        db.close()
+
+
+async def dataset_version() -> int:
+    version = _version_cache().peek()
+    if version is None:
+        version = await run_in_threadpool(_load_version)
+    return version
+
+
+def make_etag(version: int, scope, headers: Headers) -> str:
+    """Zwakke ETag uit datasetversie en requestsleutel (pad, query en Accept)."""
+    key = b"\0".join([
+        scope["path"].encode(),
+        scope.get("query_string", b""),
+        headers.get("accept", "").encode(),
+    ])
+    return f'W/"{version}-{hashlib.blake2b(key, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110): W/ telt niet mee
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class VariantCache:
+    """LRU van kant-en-klare (eventueel gecomprimeerde) responses, begrensd in bytes.
+
+    Sleutel is (ETag, encoding); omdat de ETag de datasetversie bevat, veroudert een
+    entry vanzelf. Bij een nieuwe versie wordt de hele cache geleegd.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], tuple[list, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._version = -1
+
+    def get(self, etag: str, encoding: str) -> tuple[list, bytes] | None:
+        with self._lock:
+            entry = self._entries.get((etag, encoding))
+            if entry is not None:
+                self._entries.move_to_end((etag, encoding))
+            return entry
+
+    def put(self, version: int, etag: str, encoding: str, headers: list, body: bytes) -> None:
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            if version < self._version:
+                # Van een replica die nog achterloopt: de cache hoort al bij een nieuwere versie
+                return
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            previous = self._entries.pop((etag, encoding), None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._entries[(etag, encoding)] = (headers, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+variant_cache = VariantCache(settings.http_cache_mb * 1024 * 1024)
+registry.register_gauge("brickviewer_http_cache_bytes", "Bytes in de response-variantcache", lambda: variant_cache.size)
+registry.register_gauge("brickviewer_http_cache_entries", "Entries in de response-variantcache", lambda: len(variant_cache))
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class HTTPCacheMiddleware:
+    """Compressie (zstd/br/gzip), ETags en conditionele requests voor de catalogus-API.
+
+    Voor GET-requests op een route uit CACHE_POLICIES:
+
+    - de ETag volgt uit datasetversie + requestsleutel, dus `If-None-Match` krijgt een
+      304 zonder dat de handler draait;
+    - een eerder opgebouwde variant voor dezelfde ETag en encoding komt uit de
+      VariantCache, ook zonder handler;
+    - anders draait de handler met de datasetversie gepind (zie pinned_version) en wordt een
+      200-response (gecomprimeerd met het hoogste niveau) in de cache gezet, met
+      `Cache-Control` volgens het beleid; tenzij een cache van de handler een andere versie
+      had dan de ETag.
+
+    Overige responses worden alleen gecomprimeerd als ze groot genoeg zijn.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"))
+        matched = match_policy(scope["path"]) if scope["method"] == "GET" else None
+        if matched is None:
+            await self._respond(scope, receive, send, encoding)
+            return
+
+        template, policy = matched
+        # Eén leesbron voor het hele request: ETag-versie en handler lezen van dezelfde replica.
+        # De check van de replicas kan een query kosten, dus buiten de event loop.
+        replica = await run_in_threadpool(replicas.pick) if replicas.urls else None
+        with pinned_replica(replica):
+            await self._conditional(scope, receive, send, encoding, template, policy)
+
+    async def _conditional(self, scope, receive, send, encoding: str, template: str, policy: CachePolicy) -> None:
+        request_headers = Headers(scope=scope)
+        version = await dataset_version()
+        etag = make_etag(version, scope, request_headers)
+        cache_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", policy.cache_control.encode()),
+        ]
+
+        metrics = current_metrics()
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            if metrics is not None:
+                metrics.route = template
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": cache_headers + [(b"vary", b"Accept, Accept-Encoding")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = variant_cache.get(etag, encoding)
+        if cached is not None:
+            if metrics is not None:
+                metrics.route = template
+            headers, body = cached
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": headers + [(b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # De caches achter de handler (facetten, onderdelenstatistiek, catalogus) controleren de
+        # versie op hun eigen klok: met de versie gepind herladen ze meteen als ze ouder zijn
+        with pinned_version(version) as pinned:
+            await self._respond(scope, receive, send, encoding, (pinned, etag, cache_headers))
+
+    async def _respond(self, scope, receive, send, encoding: str, cacheable: tuple | None = None) -> None:
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Pas versturen als de body bekend is: de headers hangen af van de compressie
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Streaming responses ongewijzigd doorgeven
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            status = start_message["status"]
+            headers = MutableHeaders(raw=list(start_message["headers"]))
+            body = message.get("body", b"")
+            store = cacheable is not None and status == 200
+            if store:
+                for name, value in cacheable[2]:
+                    headers[name.decode()] = value.decode()
+            if _compressible(headers) and (store or len(body) >= MIN_COMPRESS_BYTES):
+                headers.add_vary_header("Accept-Encoding")
+                if encoding != "identity":
+                    if len(body) >= THREADPOOL_COMPRESS_BYTES:
+                        body = await run_in_threadpool(compress, body, encoding, store)
+                    else:
+                        body = compress(body, encoding, best=store)
+                    headers["content-encoding"] = encoding
+            if store and cacheable[0].consistent:
+                # Niet bewaren als een cache van de handler een andere versie had dan de ETag
+                pinned, etag, _ = cacheable
+                cached_headers = [(k, v) for k, v in headers.raw if k != b"content-length"]
+                variant_cache.put(pinned.version, etag, encoding, cached_headers, body)
+            headers["content-length"] = str(len(body))
+            await send({**start_message, "headers": headers.raw})
+            start_message = None
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
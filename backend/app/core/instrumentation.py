@@ -0,0 +1,310 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+
+@dataclass
+class RequestMetrics:
+    """Metingen voor één request; gedeeld tussen event loop en threadpool via een ContextVar."""
+
+    started: float
+    route: str | None = None
+    sql_count: int = 0
+    sql_time: float = 0.0
+    endpoint_time: float = 0.0  # endpoint-functie incl. SQL en ORM
+    handler_time: float = 0.0  # endpoint + parameter- en response-validatie + serialisatie
+    render_time: float = 0.0  # JSON-encoding binnen het endpoint (FastJSONResponse)
+    thread_id: int | None = None  # thread die het request op dit moment uitvoert (voor de profiler)
+
+    @property
+    def orm_time(self) -> float:
+        return max(self.endpoint_time - self.sql_time - self.render_time, 0.0)
+
+    @property
+    def serialize_time(self) -> float:
+        return max(self.handler_time - self.endpoint_time, 0.0) + self.render_time
+
+    def server_timing(self, now: float) -> str:
+        return ", ".join([
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"',
+            f"orm;dur={self.orm_time * 1000:.1f}",
+            f"serialize;dur={self.serialize_time * 1000:.1f}",
+            f"total;dur={(now - self.started) * 1000:.1f}",
+        ])
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> RequestMetrics | None:
+    return _current.get()
+
+
+@contextmanager
+def collect_metrics() -> Iterator[RequestMetrics]:
+    """SQL-metingen verzamelen buiten een request om (scripts, benchmarks)."""
+    metrics = RequestMetrics(started=time.perf_counter(), thread_id=threading.get_ident())
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy hooks
+# ---------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.sql_count += 1
+        metrics.sql_time += elapsed
+
+
+def _handle_error(exception_context):
+    # Bij een fout komt er geen after_cursor_execute: anders blijft de starttijd op de
+    # pool-verbinding staan, zolang die leeft
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def install_sql_hooks(engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+# ---------------------------------------------------------------------------
+# Route timing
+# ---------------------------------------------------------------------------
+
+def _timed_endpoint(endpoint):
+    def enter() -> tuple[RequestMetrics | None, int | None, float]:
+        metrics = _current.get()
+        previous = None
+        if metrics is not None:
+            previous = metrics.thread_id
+            metrics.thread_id = threading.get_ident()
+        return metrics, previous, time.perf_counter()
+
+    def leave(metrics: RequestMetrics | None, previous: int | None, start: float) -> None:
+        if metrics is not None:
+            metrics.endpoint_time += time.perf_counter() - start
+            metrics.thread_id = previous
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            state = enter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                leave(*state)
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        state = enter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            leave(*state)
+
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute die endpoint- en handlertijd (incl. serialisatie) in de RequestMetrics bijhoudt."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+        static = path.split("{", 1)[0]
+
+        async def timed_handler(request):
+            metrics = _current.get()
+            if metrics is None:
+                return await handler(request)
+            # Afhankelijk van de FastAPI-versie bevat self.path de include-prefix (/api) wel of niet
+            offset = request.scope["path"].find(static)
+            metrics.route = request.scope["path"][:offset] + path if offset > 0 else path
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                metrics.handler_time += time.perf_counter() - start
+
+        return timed_handler
+
+
+# ---------------------------------------------------------------------------
+# Prometheus metrics
+# ---------------------------------------------------------------------------
+
+class _Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, label_names: tuple[str, ...]) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(label_names, labels))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Minimale Prometheus-registry per worker (tekstformaat 0.0.4)."""
+
+    LABELS = ("method", "route")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[tuple, int] = {}
+        self._sql_queries: dict[tuple, int] = {}
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+        self._histograms = {
+            "duration": _Histogram(
+                "brickviewer_http_request_duration_seconds", "Totale requestduur", _TIME_BUCKETS
+            ),
+            "sql": _Histogram("brickviewer_sql_duration_seconds", "SQL-tijd per request", _TIME_BUCKETS),
+            "orm": _Histogram(
+                "brickviewer_orm_duration_seconds", "Endpointtijd zonder SQL (ORM en modelopbouw)", _TIME_BUCKETS
+            ),
+            "serialize": _Histogram(
+                "brickviewer_serialize_duration_seconds", "Validatie en serialisatie van de response", _TIME_BUCKETS
+            ),
+            "queries": _Histogram(
+                "brickviewer_sql_queries_per_request", "Aantal SQL statements per request",
+                (1, 2, 5, 10, 20, 50, 100, 500),
+            ),
+            "size": _Histogram(
+                "brickviewer_response_size_bytes", "Grootte van de response body",
+                (1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+            ),
+        }
+
+    def register_gauge(self, name: str, help_text: str, fn: Callable[[], float]) -> None:
+        self._gauges[name] = (help_text, fn)
+
+    def observe(self, method: str, status: int, duration: float, metrics: RequestMetrics, size: int) -> None:
+        labels = (method, metrics.route or "unmatched")
+        with self._lock:
+            key = (*labels, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._sql_queries[labels] = self._sql_queries.get(labels, 0) + metrics.sql_count
+            self._histograms["duration"].observe(labels, duration)
+            self._histograms["sql"].observe(labels, metrics.sql_time)
+            self._histograms["orm"].observe(labels, metrics.orm_time)
+            self._histograms["serialize"].observe(labels, metrics.serialize_time)
+            self._histograms["queries"].observe(labels, metrics.sql_count)
+            self._histograms["size"].observe(labels, size)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP brickviewer_http_requests_total Aantal afgehandelde requests",
+                "# TYPE brickviewer_http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'brickviewer_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}'
+                )
+            lines += [
+                "# HELP brickviewer_sql_queries_total Aantal SQL statements",
+                "# TYPE brickviewer_sql_queries_total counter",
+            ]
+            for (method, route), count in sorted(self._sql_queries.items()):
+                lines.append(f'brickviewer_sql_queries_total{{method="{method}",route="{route}"}} {count}')
+            for histogram in self._histograms.values():
+                lines += histogram.render(self.LABELS)
+        for name, (help_text, fn) in self._gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {fn()}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class InstrumentationMiddleware:
+    """Meet elk HTTP-request, zet een Server-Timing header en voedt de Prometheus-registry."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from app.core.profiler import profiler
+
+        metrics = RequestMetrics(started=time.perf_counter(), thread_id=threading.get_ident())
+        token = _current.set(metrics)
+        profile = profiler.start(metrics) if settings.profile_slow_ms > 0 else None
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", metrics.server_timing(time.perf_counter()))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            duration = time.perf_counter() - metrics.started
+            registry.observe(scope["method"], status, duration, metrics, size)
+            if profile is not None:
+                profiler.stop(profile, duration)
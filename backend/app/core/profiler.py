@@ -0,0 +1,88 @@
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+
+
+@dataclass
+class Profile:
+    metrics: object  # RequestMetrics; thread_id wijst naar de thread die het request uitvoert
+    stacks: Counter = field(default_factory=Counter)
+
+
+class SamplingProfiler:
+    """Opt-in stack sampler voor trage requests.
+
+    Een achtergrondthread leest elke `profile_interval_ms` via sys._current_frames() de
+    stack van alle lopende requests. Is een request trager dan `profile_slow_ms`, dan
+    worden de stacks in folded formaat weggeschreven (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: set[int] = set()
+        self._profiles: dict[int, Profile] = {}
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, metrics) -> Profile:
+        profile = Profile(metrics=metrics)
+        with self._lock:
+            self._profiles[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return profile
+
+    def stop(self, profile: Profile, duration: float) -> Path | None:
+        with self._lock:
+            self._profiles.pop(id(profile), None)
+        if duration * 1000 < settings.profile_slow_ms or not profile.stacks:
+            return None
+        return self._dump(profile, duration)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                profiles = list(self._profiles.values())
+            if not profiles:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                thread_id = profile.metrics.thread_id
+                if thread_id is None or thread_id == own:
+                    continue
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    profile.stacks[_fold(frame)] += 1
+            time.sleep(settings.profile_interval_ms / 1000)
+
+    def _dump(self, profile: Profile, duration: float) -> Path:
+        directory = Path(settings.profile_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9]+", "_", profile.metrics.route or "unmatched").strip("_")
+        path = directory / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{route}-{duration * 1000:.0f}ms.folded"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in profile.stacks.most_common()))
+        return path
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,103 @@
+import time
+from decimal import Decimal
+from typing import Any
+
+import msgpack
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+from app.core.instrumentation import current_metrics
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.brickviewer.columnar+json"
+MSGPACK = "application/x-msgpack"
+_ALIASES = {"application/msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+
+def _default(value: Any):
+    # Numeric-kolommen komen als Decimal uit psycopg2; de API geeft ze als float
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def _record_render(start: float) -> None:
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.render_time += time.perf_counter() - start
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-response via orjson voor payloads die we zelf uit de database opbouwen.
+
+    Endpoints geven deze response direct terug: FastAPI slaat dan de response_model-validatie
+    en jsonable_encoder over. Het response_model blijft op de route staan voor de OpenAPI-docs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = dumps(content)
+        _record_render(start)
+        return body
+
+
+class ColumnarJSONResponse(FastJSONResponse):
+    media_type = COLUMNAR_JSON
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = msgpack.packb(content, default=_default, use_bin_type=True)
+        _record_render(start)
+        return body
+
+
+_RESPONSE_CLASSES = {JSON: FastJSONResponse, COLUMNAR_JSON: ColumnarJSONResponse, MSGPACK: MsgpackResponse}
+
+
+def negotiate(accept: str | None, offered: tuple[str, ...]) -> str:
+    """Kies het media type uit `offered` met de hoogste q-waarde in de Accept-header.
+
+    Een expliciet type gaat bij gelijke q voor */*; zonder Accept wint het eerste type.
+    """
+    if not accept:
+        return offered[0]
+    matches = []
+    for item in accept.split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        media_type = _ALIASES.get(media_type, media_type)
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q <= 0:
+            continue
+        if media_type in offered:
+            matches.append((q, 1, -offered.index(media_type), media_type))
+        elif media_type in ("*/*", "application/*"):
+            matches.append((q, 0, 0, offered[0]))
+    if not matches:
+        raise HTTPException(status_code=406, detail=f"Supported media types: {', '.join(offered)}")
+    return max(matches)[3]
+
+
+def negotiated_response(media_type: str, content: Any) -> Response:
+    # Vary: Accept, zodat caches de varianten uit elkaar houden
+    return _RESPONSE_CLASSES[media_type](content, headers={"Vary": "Accept"})
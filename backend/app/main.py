@@ -1,29 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
 
-from app.api.routes import minifigs, sets, stats, themes
+from app.api.routes import admin, changes, colors, minifigs, offline, parts, resolve, sets, stats, themes
 from app.core.config import settings
+from app.core.database import read_session, replicas
+from app.core.http_cache import HTTPCacheMiddleware
+from app.core.instrumentation import InstrumentationMiddleware, install_sql_hooks, registry
+from app.services import warmup
+from app.services.catalog import get_catalog_store
+
+
+def _load_catalog_store() -> None:
+    db = read_session()
+    try:
+        get_catalog_store(db)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    if settings.warmup:
+        # Op de achtergrond: de worker neemt al verbindingen aan, /health meldt 503 tot hij klaar is
+        warmup.state.ready = False
+        task = asyncio.create_task(warmup.warm_up(app))
+    elif settings.catalog_store:
+        # De store bij het starten laden, niet in het eerste request
+        await run_in_threadpool(_load_catalog_store)
+    yield
+    if task is not None:
+        task.cancel()
+
 
 app = FastAPI(
     title="BrickViewer API",
     description="LEGO set database powered by Rebrickable data",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Binnenste laag: CORS-headers en Server-Timing komen ook op 304's en responses uit de cache
+app.add_middleware(HTTPCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
+)
+# Als laatste toegevoegd = buitenste laag, zodat ook CORS in de totale tijd meetelt
+app.add_middleware(InstrumentationMiddleware)
+# Op de Engine-klasse: geldt ook voor engines die pas bij het eerste gebruik ontstaan
+install_sql_hooks(Engine)
+registry.register_gauge(
+    "brickviewer_warmup_seconds", "Duur van de warm-up van deze worker (0 zonder of tijdens de warm-up)",
+    lambda: warmup.state.seconds or 0,
+)
+registry.register_gauge(
+    "brickviewer_db_replicas_healthy", "Read replicas die reads krijgen (gezond en binnen de max. lag)",
+    replicas.healthy_count,
 )
 
 app.include_router(sets.router, prefix="/api")
 app.include_router(themes.router, prefix="/api")
 app.include_router(minifigs.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
+app.include_router(colors.router, prefix="/api")
+app.include_router(parts.router, prefix="/api")
+app.include_router(resolve.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
+app.include_router(offline.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 @app.get("/health")
 def health():
+    if not warmup.state.ready:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,8 @@
 from app.models.lego import (
     BricksetData,
+    BricksetHistory,
+    BricksetMonthlyRollup,
+    BricksetSync,
     Color,
     Element,
     Inventory,
@@ -11,21 +14,30 @@ from app.models.lego import (
     PartCategory,
     PartRelationship,
     Set,
+    SetValueMetric,
     Theme,
 )
+from app.models.meta import CatalogChange, DatasetVersion, JobRun
 
 __all__ = [
     "BricksetData",
+    "BricksetHistory",
+    "BricksetMonthlyRollup",
+    "BricksetSync",
+    "CatalogChange",
     "Color",
+    "DatasetVersion",
     "Element",
     "Inventory",
     "InventoryMinifig",
     "InventoryPart",
     "InventorySet",
+    "JobRun",
     "Minifig",
     "Part",
     "PartCategory",
     "PartRelationship",
     "Set",
+    "SetValueMetric",
     "Theme",
 ]
@@ -1,6 +1,20 @@
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Integer, Numeric, SmallInteger, String, Text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    SmallInteger,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -197,7 +211,76 @@ class BricksetData(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     tags: Mapped[list[str] | None] = mapped_column(ARRAY(String), nullable=True)
 
-    # Meta
-    last_synced: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-
     set: Mapped["Set"] = relationship(backref="brickset_data")
+
+
+class BricksetSync(Base):
+    """Smalle synctabel: wordt elke sync bijgewerkt, zodat brickset_data alleen bij echte wijzigingen verandert."""
+
+    __tablename__ = "brickset_sync"
+
+    set_num: Mapped[str] = mapped_column(String(20), ForeignKey("sets.set_num"), primary_key=True)
+    content_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)  # md5 van de gemapte payload
+    last_synced: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class BricksetHistory(Base):
+    """Append-only historie van gewijzigde Brickset-waarden, per maand gepartitioneerd.
+
+    Alleen waarden die bij een sync veranderen worden vastgelegd; brickset_data
+    blijft de tabel voor de actuele waarde.
+    """
+
+    __tablename__ = "brickset_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (observed_at)"}
+
+    set_num: Mapped[str] = mapped_column(String(20), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)  # price_us, rating, owned_by, ...
+    observed_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    value: Mapped[float | None] = mapped_column(Numeric(12, 2), nullable=True)
+
+
+# Vangnet voor rijen buiten de aangemaakte maandpartities
+event.listen(
+    BricksetHistory.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS brickset_history_default PARTITION OF brickset_history DEFAULT"),
+)
+
+
+class BricksetMonthlyRollup(Base):
+    """Per maand en thema de stand van elke Brickset-metric aan het eind van die maand."""
+
+    __tablename__ = "brickset_monthly_rollups"
+
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    theme_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    set_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sum_value: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    min_value: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    max_value: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+
+
+class SetValueMetric(Base):
+    """Afgeleide waarde-metrics per set en prijsregio, na elke import en sync herberekend.
+
+    Alleen sets met een prijs in de regio hebben een rij. De indexen beginnen met de
+    regio, zodat sorteren op een metric binnen een regio een index scan is.
+    """
+
+    __tablename__ = "set_value_metrics"
+    __table_args__ = (
+        Index("ix_set_value_metrics_price_per_piece", "region", "price_per_piece", "set_num"),
+        Index("ix_set_value_metrics_price_per_gram", "region", "price_per_gram", "set_num"),
+        Index("ix_set_value_metrics_theme_percentile", "region", "theme_percentile", "set_num"),
+    )
+
+    set_num: Mapped[str] = mapped_column(String(20), ForeignKey("sets.set_num"), primary_key=True)
+    region: Mapped[str] = mapped_column(String(2), primary_key=True)  # us, uk, ca, de
+    theme_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    price_per_piece: Mapped[float | None] = mapped_column(Float, nullable=True)  # None zonder onderdelen
+    price_per_gram: Mapped[float | None] = mapped_column(Float, nullable=True)  # None zonder gewicht
+    # Positie van de prijs binnen het thema in dezelfde regio: 0 = goedkoopste, 100 = duurste
+    theme_percentile: Mapped[float] = mapped_column(Float, nullable=False)
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class DatasetVersion(Base):
+    """Eén rij per gepubliceerde data-update (import of Brickset sync)."""
+
+    __tablename__ = "dataset_versions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source: Mapped[str] = mapped_column(String(20), nullable=False)  # rebrickable, brickset
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class CatalogChange(Base):
+    """Wijzigingslog van de catalogus: per versie welke sleutels van welke tabel veranderd zijn.
+
+    Importer en sync schrijven rijen zonder versie tijdens het laden; bump_version geeft ze
+    in dezelfde transactie als de nieuwe datasetversie hun versienummer.
+    """
+
+    __tablename__ = "catalog_changes"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    version: Mapped[int | None] = mapped_column(Integer, nullable=True)  # NULL = nog niet gepubliceerd
+    table_name: Mapped[str] = mapped_column(String(30), nullable=False)
+    key: Mapped[str] = mapped_column(String(100), nullable=False)
+    op: Mapped[str] = mapped_column(String(1), nullable=False)  # I, U, D
+
+    __table_args__ = (Index("ix_catalog_changes_version_id", "version", "id"),)
+
+
+class JobRun(Base):
+    """Eén uitvoering van een achtergrondjob (import, sync, afgeleide data); zie app/services/jobs.py."""
+
+    __tablename__ = "job_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job: Mapped[str] = mapped_column(String(50), nullable=False)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    # queued, running, succeeded, failed, skipped
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="queued")
+    requested_by: Mapped[str] = mapped_column(String(20), nullable=False)  # api, scheduler
+    requested_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    worker: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # Voortgang van de huidige fase (bijv. één tabel van de import)
+    stage: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    stage_started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    progress_done: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    progress_total: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    progress_unit: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    progress_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Laatste regels van de console-uitvoer en, bij een fout, de traceback
+    output: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_runs_status_id", "status", "id"),
+        Index("ix_job_runs_job_requested_at", "job", "requested_at"),
+    )
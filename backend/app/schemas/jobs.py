@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+JobParams = dict[str, bool | int | str]
+
+
+class JobRequest(BaseModel):
+    job: str
+    params: JobParams = {}
+
+
+class JobRunOut(BaseModel):
+    model_config = {"from_attributes": True}
+
+    id: int
+    job: str
+    params: JobParams
+    status: str
+    requested_by: str
+    requested_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    worker: str | None = None
+    stage: str | None = None
+    progress_done: int = 0
+    progress_total: int | None = None
+    progress_unit: str | None = None
+    progress_updated_at: datetime | None = None
+    # Huidige fase: eenheden per seconde en geschatte resterende seconden
+    rate: float | None = None
+    eta_seconds: float | None = None
+    error: str | None = None
+
+
+class JobRunDetail(JobRunOut):
+    output: str | None = None
+
+
+class JobInfo(BaseModel):
+    name: str
+    description: str
+    lock: str
+    params: JobParams
+    every_hours: float | None = None
+    last_run: JobRunOut | None = None
+
+
+class JobOverview(BaseModel):
+    jobs: list[JobInfo]
+    runs: list[JobRunOut]
@@ -1,6 +1,15 @@
 from datetime import date, datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+PartsFormat = Literal["rows", "columnar", "msgpack"]
+PriceRegion = Literal["us", "uk", "ca", "de"]
+# Waarde-metrics uit set_value_metrics; '-' sorteert aflopend
+SetSort = Literal[
+    "price_per_piece", "-price_per_piece", "price_per_gram", "-price_per_gram", "theme_percentile", "-theme_percentile"
+]
+HistoryMetric = Literal["price_us", "price_uk", "price_ca", "price_de", "rating", "owned_by", "wanted_by"]
 
 
 class ThemeBase(BaseModel):
@@ -91,11 +100,42 @@ class SetFullDetail(SetDetail):
     brickset: BricksetInfo | None = None
 
 
+class SetBatchRequest(BaseModel):
+    set_nums: list[str] = Field(min_length=1, max_length=500)
+
+
+class SetBatchResponse(BaseModel):
+    sets: list[SetFullDetail]  # alleen de gevraagde secties (fields=) zijn aanwezig
+    missing: list[str]
+
+
+class SetValueSummary(SetSummary):
+    # Alleen gevuld bij sort= of een waardefilter, in de gekozen regio
+    price: float | None = None
+    price_per_piece: float | None = None
+    price_per_gram: float | None = None
+    theme_percentile: float | None = None
+
+
 class PaginatedSets(BaseModel):
     total: int
     page: int
     page_size: int
-    results: list[SetSummary]
+    results: list[SetValueSummary]
+
+
+class PaginatedPartSets(PaginatedSets):
+    part_num: str
+
+
+class FacetValue(BaseModel):
+    value: int | str
+    label: str
+    count: int
+
+
+class SetSearchResults(PaginatedSets):
+    facets: dict[str, list[FacetValue]]  # theme, decade, availability, price_band, tag
 
 
 class PaginatedMinifigs(BaseModel):
@@ -105,6 +145,105 @@ class PaginatedMinifigs(BaseModel):
     results: list[MinifigSummary]
 
 
+class ColorCount(BaseModel):
+    color_id: int
+    name: str
+    rgb: str
+    is_trans: bool
+    quantity: int
+    lots: int
+
+
+class CategoryCount(BaseModel):
+    part_cat_id: int
+    name: str
+    quantity: int
+    lots: int
+
+
+class RareElement(BaseModel):
+    part_num: str
+    color_id: int
+    color_name: str
+    quantity: int
+    num_sets: int
+
+
+class SetBreakdown(BaseModel):
+    set_num: str
+    total_quantity: int
+    total_lots: int
+    colors: list[ColorCount]
+    categories: list[CategoryCount]
+    rare_elements: list[RareElement]
+
+
+class ColorUsage(BaseModel):
+    color_id: int
+    name: str
+    rgb: str
+    is_trans: bool
+    quantity: int
+    num_parts: int
+    num_sets: int
+    year_min: int
+    year_max: int
+
+
+class ResolveRequest(BaseModel):
+    identifiers: list[str] = Field(min_length=1, max_length=5000)
+
+
+class ElementMatch(BaseModel):
+    element_id: str
+    part_num: str
+    part_name: str
+    color_id: int
+    color_name: str
+
+
+class ResolvedIdentifier(BaseModel):
+    query: str
+    match_type: str | None = None  # set_num, element, ean, upc, item_number
+    element: ElementMatch | None = None
+    set: SetSummary | None = None
+
+
+class ResolveResponse(BaseModel):
+    resolved: int
+    unresolved: int
+    results: list[ResolvedIdentifier]
+
+
+class HistoryPoint(BaseModel):
+    observed_at: datetime
+    value: float | None = None
+
+
+class MetricHistory(BaseModel):
+    metric: str
+    points: list[HistoryPoint]
+
+
+class SetHistory(BaseModel):
+    set_num: str
+    series: list[MetricHistory]
+
+
+class TrendPoint(BaseModel):
+    month: date
+    set_count: int
+    avg_value: float
+    min_value: float
+    max_value: float
+
+
+class MetricTrend(BaseModel):
+    metric: str
+    theme_id: int | None = None
+    points: list[TrendPoint]
+
+
 class Stats(BaseModel):
     total_sets: int
     total_themes: int
@@ -115,3 +254,17 @@ class Stats(BaseModel):
     year_max: int
     sets_per_year: list[dict]
     top_themes: list[dict]
+
+
+class CatalogChange(BaseModel):
+    version: int
+    table: str
+    key: str
+    op: Literal["I", "U", "D"]
+
+
+class ChangeFeed(BaseModel):
+    since: int
+    version: int
+    changes: list[CatalogChange]
+    next: str | None = None
@@ -0,0 +1,597 @@
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import chain, repeat
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dataset import VersionedCache
+from app.core.instrumentation import registry
+from app.models.lego import Color, Minifig, Set, Theme
+from app.models.meta import DatasetVersion
+from app.services.set_details import MINIFIG_FIELDS, SUMMARY_FIELDS
+
+# Ophogen als de indeling van de snapshot wijzigt; een bestand in een ander formaat wordt genegeerd
+SNAPSHOT_FORMAT = 1
+MAGIC = b"BVCATLG\0"
+# magic, formaat, (vrij), offset en lengte van de JSON-inhoudsopgave achteraan
+_HEADER = struct.Struct("<8sIIQQ")
+_ALIGN = 8
+
+# Versies uit deze bronnen wijzigen alleen Brickset- en afgeleide tabellen, niet wat de store bevat
+NON_CATALOG_SOURCES = ("brickset", "derived")
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+# Per onderdeel de sets waarvan de laatste inventaris het bevat (reserve-onderdelen meegeteld);
+# onderdelen zonder sets komen mee met een lege lijst
+PART_SETS_SQL = text("""
+    WITH latest AS (
+        SELECT DISTINCT ON (set_num) id, set_num FROM inventories ORDER BY set_num, version DESC
+    )
+    SELECT p.part_num, coalesce(s.set_nums, '{}') AS set_nums
+    FROM parts p
+    LEFT JOIN (
+        SELECT ip.part_num, array_agg(DISTINCT l.set_num) AS set_nums
+        FROM inventory_parts ip
+        JOIN latest l ON l.id = ip.inventory_id
+        GROUP BY ip.part_num
+    ) s ON s.part_num = p.part_num
+""")
+
+Buffer = bytes | mmap.mmap
+
+
+# ---------------------------------------------------------------------------
+# Kolommen
+# ---------------------------------------------------------------------------
+#
+# Alle kolommen zijn views op één buffer: de gemapte snapshot (gedeeld tussen workers via
+# de page cache) of, zonder snapshot, dezelfde bytes in het geheugen van de worker.
+# Getallen staan als arrays met een vaste breedte, strings als één UTF-8-blob plus offsets.
+
+@dataclass(slots=True)
+class IntColumn:
+    values: np.ndarray
+    nulls: np.ndarray | None = None  # bool-mask; None als de kolom geen NULLs heeft
+
+    def take(self, rows: np.ndarray) -> list:
+        values = self.values[rows].tolist()
+        if self.nulls is None:
+            return values
+        return [None if null else v for v, null in zip(values, self.nulls[rows].tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+
+@dataclass(slots=True)
+class StringColumn:
+    """Stringtabel: rij i is buffer[data + starts[i]:data + starts[i + 1]], UTF-8."""
+
+    buffer: Buffer
+    data: int  # begin van de blob in `buffer`
+    starts: np.ndarray  # uint32, één meer dan het aantal rijen
+    nulls: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def raw(self, row: int) -> bytes:
+        return self.buffer[self.data + int(self.starts[row]):self.data + int(self.starts[row + 1])]
+
+    def take(self, rows: np.ndarray) -> list:
+        buffer, data = self.buffer, self.data
+        values = [
+            buffer[data + start:data + end].decode()
+            for start, end in zip(self.starts[rows].tolist(), self.starts[rows + 1].tolist())
+        ]
+        if self.nulls is None:
+            return values
+        return [None if null else v for v, null in zip(values, self.nulls[rows].tolist())]
+
+    def index(self, value: str) -> int | None:
+        """Rij van `value` in een gesorteerde kolom; UTF-8-bytes sorteren zoals Python-strings."""
+        key = value.encode()
+        row = bisect_left(range(len(self)), key, key=self.raw)
+        return row if row < len(self) and self.raw(row) == key else None
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + int(self.starts[-1]) + (self.nulls.nbytes if self.nulls is not None else 0)
+
+
+@dataclass(slots=True)
+class TextColumn:
+    """StringColumn met een zoekindex: de waarden lowercase in een tweede stringtabel.
+
+    Elke lowercase waarde eindigt op \\0, zodat een treffer nooit over twee rijen loopt;
+    zoeken is één find op de blob per treffer in plaats van een vergelijking per rij.
+    """
+
+    values: StringColumn
+    lower: StringColumn
+
+    def take(self, rows: np.ndarray) -> list:
+        return self.values.take(rows)
+
+    def contains(self, term: str) -> np.ndarray:
+        """Bool-mask van de rijen waarvan de waarde `term` bevat (hoofdletterongevoelig)."""
+        mask = np.zeros(len(self.lower), dtype=bool)
+        needle = term.lower().encode()
+        if b"\0" in needle:
+            return mask
+        buffer, data, starts = self.lower.buffer, self.lower.data, self.lower.starts
+        end = data + int(starts[-1])
+        # Eerst alle treffers, dan in één keer naar rijen (searchsorted per treffer is duurder dan find)
+        hits = []
+        find, step = buffer.find, max(len(needle), 1)
+        position = find(needle, data, end)
+        while position != -1:
+            hits.append(position)
+            position = find(needle, position + step, end)
+        if hits:
+            mask[np.searchsorted(starts, np.array(hits) - data, side="right") - 1] = True
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.lower.nbytes
+
+
+@dataclass(slots=True)
+class UrlColumn:
+    """URL's als (prefix, rest): de paar gedeelde prefixen (CDN-map) staan er maar één keer in."""
+
+    prefixes: list[str]
+    codes: np.ndarray  # index in `prefixes`, -1 = NULL
+    tails: StringColumn
+
+    def take(self, rows: np.ndarray) -> list:
+        prefixes = self.prefixes
+        return [
+            None if code < 0 else prefixes[code] + tail
+            for code, tail in zip(self.codes[rows].tolist(), self.tails.take(rows))
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.tails.nbytes
+
+
+Column = IntColumn | StringColumn | TextColumn | UrlColumn
+
+
+@dataclass(slots=True)
+class Table:
+    """Struct-of-arrays: één kolom per veld, rijen in de volgorde van de API-lijst."""
+
+    size: int
+    columns: dict[str, Column]
+
+    def records(self, rows: np.ndarray, fields: tuple[str, ...]) -> list[dict]:
+        values = [self.columns[name].take(rows) for name in fields]
+        return [dict(zip(fields, row)) for row in zip(*values)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+
+@dataclass(slots=True)
+class Groups:
+    """Gesorteerde sleutels met per sleutel oplopende posities (CSR): values[starts[i]:starts[i + 1]]."""
+
+    keys: np.ndarray | StringColumn
+    starts: np.ndarray
+    values: np.ndarray
+
+    def find(self, key) -> int | None:
+        if isinstance(self.keys, StringColumn):
+            return self.keys.index(key)
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def get(self, key, default=None):
+        i = self.find(key)
+        return default if i is None else self.values[self.starts[i]:self.starts[i + 1]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.starts.nbytes + self.values.nbytes
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class CatalogStore:
+    """Sets, thema's, minifigs en kleuren als kolommen, voor lijst-requests zonder database.
+
+    Sets staan in de volgorde van /api/sets (jaar aflopend, naam, set_num), minifigs en
+    thema's op naam, kleuren op id. Per thema en per onderdeel zijn de posities van de sets
+    voorgesorteerd; omdat de sets op jaar aflopend staan, is een jaarbereik een aaneengesloten
+    blok posities.
+    """
+
+    version: int  # catalogusversie van de data, zie catalog_version()
+    sets: Table
+    set_themes: Groups  # theme_id -> posities in `sets`
+    part_sets: Groups  # part_num -> posities in `sets`
+    themes: Table
+    minifigs: Table
+    colors: Table
+    size: int  # bytes van de buffer
+    mapped: bool  # True: gedeelde snapshot (mmap), False: privé in deze worker
+
+    def footprint(self) -> dict[str, int]:
+        """Bytes per tabel in de buffer."""
+        return {
+            "sets": self.sets.nbytes + self.set_themes.nbytes,
+            "part_sets": self.part_sets.nbytes,
+            "themes": self.themes.nbytes,
+            "minifigs": self.minifigs.nbytes,
+            "colors": self.colors.nbytes,
+        }
+
+    def year_range(self, year_min: int | None, year_max: int | None) -> tuple[int, int]:
+        """[begin, eind) van de sets binnen het jaarbereik."""
+        ascending = self.sets.columns["year"].values[::-1]
+        size = self.sets.size
+        start = size - np.searchsorted(ascending, year_max, side="right") if year_max is not None else 0
+        end = size - np.searchsorted(ascending, year_min, side="left") if year_min is not None else size
+        return int(start), int(max(start, end))
+
+
+def catalog_version(db) -> int:
+    """Laatste datasetversie die de tabellen van de store kan hebben gewijzigd."""
+    return db.scalar(
+        select(func.coalesce(func.max(DatasetVersion.id), 0))
+        .where(DatasetVersion.source.not_in(NON_CATALOG_SOURCES))
+    )
+
+
+# ---------------------------------------------------------------------------
+# Binaire indeling
+# ---------------------------------------------------------------------------
+#
+# Header, dan de arrays en blobs (elk op 8 bytes uitgelijnd), en als laatste een JSON-
+# inhoudsopgave met per kolom soort, dtype, offset en lengte. Alleen die inhoudsopgave
+# wordt bij het openen gelezen; de rest blijft in de map tot een request het aanraakt.
+
+class _Writer:
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.size = _HEADER.size
+
+    def _add(self, data: bytes) -> int:
+        padding = -self.size % _ALIGN
+        if padding:
+            self.chunks.append(bytes(padding))
+            self.size += padding
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return offset
+
+    def array(self, values, dtype) -> dict:
+        array = np.ascontiguousarray(values, dtype=dtype)
+        return {"offset": self._add(array.tobytes()), "dtype": array.dtype.str, "count": len(array)}
+
+    def nulls(self, values: list) -> dict | None:
+        nulls = [v is None for v in values]
+        return self.array(nulls, np.bool_) if any(nulls) else None
+
+    def strings(self, values: list[str | None], suffix: str = "") -> dict:
+        encoded = [("" if v is None else v + suffix).encode() for v in values]
+        starts = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(v) for v in encoded], out=starts[1:])
+        return {
+            "kind": "str",
+            "starts": self.array(starts, np.uint32),
+            "data": self._add(b"".join(encoded)),
+            "nulls": self.nulls(values),
+        }
+
+    def ints(self, values: list, dtype) -> dict:
+        return {
+            "kind": "int",
+            "values": self.array([0 if v is None else v for v in values], dtype),
+            "nulls": self.nulls(values),
+        }
+
+    def text(self, values: list[str | None]) -> dict:
+        return {
+            "kind": "text",
+            "values": self.strings(values),
+            "lower": self.strings([(v or "").lower() for v in values], "\0"),
+        }
+
+    def urls(self, values: list[str | None]) -> dict:
+        prefixes: dict[str, int] = {}
+        codes, tails = [], []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                tails.append("")
+                continue
+            prefix, _, tail = value.rpartition("/")
+            codes.append(prefixes.setdefault(prefix + "/", len(prefixes)))
+            tails.append(tail)
+        return {
+            "kind": "url",
+            "prefixes": list(prefixes),
+            "codes": self.array(codes, np.int16 if len(prefixes) < 2**15 else np.int32),
+            "tails": self.strings(tails),
+        }
+
+    def groups(self, keys: dict, sizes: np.ndarray, values: np.ndarray) -> dict:
+        starts = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=starts[1:])
+        return {"keys": keys, "starts": self.array(starts, np.int64), "values": self.array(values, np.int32)}
+
+    def finish(self, contents: dict) -> bytes:
+        body = json.dumps(contents).encode()
+        offset = self._add(body)
+        return _HEADER.pack(MAGIC, SNAPSHOT_FORMAT, 0, offset, len(body)) + b"".join(self.chunks)
+
+
+def encode_catalog(db: Session) -> bytes:
+    """De store in de binaire indeling, uit de database."""
+    version = catalog_version(db)
+    sets = db.execute(
+        select(Set.set_num, Set.name, Set.year, Set.theme_id, Set.num_parts, Set.img_url)
+        .order_by(Set.year.desc(), Set.name, Set.set_num)
+    ).all()
+    themes = db.execute(select(Theme.id, Theme.name, Theme.parent_id).order_by(Theme.name)).all()
+    minifigs = db.execute(
+        select(Minifig.fig_num, Minifig.name, Minifig.num_parts, Minifig.img_url)
+        .order_by(Minifig.name, Minifig.fig_num)
+    ).all()
+    colors = db.execute(select(Color.id, Color.name, Color.rgb, Color.is_trans).order_by(Color.id)).all()
+
+    writer = _Writer()
+
+    theme_ids = np.array([r.theme_id for r in sets], dtype=np.int32)
+    theme_order = np.argsort(theme_ids, kind="stable")
+    theme_keys, theme_sizes = np.unique(theme_ids[theme_order], return_counts=True)
+
+    # Posities via set_num, niet via een tweede ORDER BY: zo blijven ze kloppen met `sets`.
+    # Sets die (nog) niet in `sets` staan krijgen -1 en vallen af.
+    positions = {r.set_num: i for i, r in enumerate(sets)}
+    parts = sorted(db.execute(PART_SETS_SQL).all())
+    counts = np.array([len(row.set_nums) for row in parts], dtype=np.int64)
+    part_rows = np.fromiter(
+        chain.from_iterable(map(positions.get, row.set_nums, repeat(-1)) for row in parts),
+        dtype=np.int32, count=int(counts.sum()),
+    )
+    part_keys = np.repeat(np.arange(len(parts)), counts)
+    order = np.lexsort((part_rows, part_keys))
+    order = order[part_rows[order] >= 0]
+    part_sizes = np.bincount(part_keys[order], minlength=len(parts))
+
+    contents = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "tables": {
+            "sets": {"size": len(sets), "columns": {
+                "set_num": writer.strings([r.set_num for r in sets]),
+                "name": writer.text([r.name for r in sets]),
+                "year": writer.ints([r.year for r in sets], np.int16),
+                "theme_id": writer.ints(theme_ids, np.int32),
+                "num_parts": writer.ints([r.num_parts for r in sets], np.int32),
+                "img_url": writer.urls([r.img_url for r in sets]),
+            }},
+            "themes": {"size": len(themes), "columns": {
+                "id": writer.ints([r.id for r in themes], np.int32),
+                "name": writer.strings([r.name for r in themes]),
+                "parent_id": writer.ints([r.parent_id for r in themes], np.int32),
+            }},
+            "minifigs": {"size": len(minifigs), "columns": {
+                "fig_num": writer.strings([r.fig_num for r in minifigs]),
+                "name": writer.text([r.name for r in minifigs]),
+                "num_parts": writer.ints([r.num_parts for r in minifigs], np.int32),
+                "img_url": writer.urls([r.img_url for r in minifigs]),
+            }},
+            "colors": {"size": len(colors), "columns": {
+                "id": writer.ints([r.id for r in colors], np.int32),
+                "name": writer.strings([r.name for r in colors]),
+                "rgb": writer.strings([r.rgb for r in colors]),
+                "is_trans": writer.ints([r.is_trans for r in colors], np.bool_),
+            }},
+        },
+        "groups": {
+            "set_themes": writer.groups(
+                writer.array(theme_keys, np.int32), theme_sizes, theme_order
+            ),
+            "part_sets": writer.groups(
+                writer.strings([row.part_num for row in parts]),
+                part_sizes,
+                part_rows[order],
+            ),
+        },
+    }
+    return writer.finish(contents)
+
+
+def _array(buffer: Buffer, spec: dict) -> np.ndarray:
+    # Zero-copy: de array is een view op de buffer (bij een mmap read-only)
+    if not spec["count"]:
+        return np.zeros(0, dtype=spec["dtype"])
+    return np.frombuffer(buffer, dtype=spec["dtype"], count=spec["count"], offset=spec["offset"])
+
+
+def _column(buffer: Buffer, spec: dict) -> Column:
+    kind = spec["kind"]
+    nulls = _array(buffer, spec["nulls"]) if spec.get("nulls") else None
+    if kind == "int":
+        return IntColumn(_array(buffer, spec["values"]), nulls)
+    if kind == "str":
+        return StringColumn(buffer, spec["data"], _array(buffer, spec["starts"]), nulls)
+    if kind == "text":
+        return TextColumn(_column(buffer, spec["values"]), _column(buffer, spec["lower"]))
+    if kind == "url":
+        return UrlColumn(spec["prefixes"], _array(buffer, spec["codes"]), _column(buffer, spec["tails"]))
+    raise ValueError(f"Onbekende kolomsoort {kind!r}")
+
+
+def _groups(buffer: Buffer, spec: dict) -> Groups:
+    keys = spec["keys"]
+    return Groups(
+        _column(buffer, keys) if "kind" in keys else _array(buffer, keys),
+        _array(buffer, spec["starts"]),
+        _array(buffer, spec["values"]),
+    )
+
+
+def read_catalog(buffer: Buffer, mapped: bool = False) -> CatalogStore | None:
+    """Store op `buffer` zonder de data te kopiëren; None bij een ander formaat."""
+    if len(buffer) < _HEADER.size:
+        return None
+    magic, format_, _, offset, length = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or format_ != SNAPSHOT_FORMAT:
+        return None
+    contents = json.loads(buffer[offset:offset + length])
+    tables = {
+        name: Table(spec["size"], {column: _column(buffer, c) for column, c in spec["columns"].items()})
+        for name, spec in contents["tables"].items()
+    }
+    return CatalogStore(
+        version=contents["version"],
+        set_themes=_groups(buffer, contents["groups"]["set_themes"]),
+        part_sets=_groups(buffer, contents["groups"]["part_sets"]),
+        size=len(buffer),
+        mapped=mapped,
+        **tables,
+    )
+
+
+def open_snapshot(path: Path) -> CatalogStore | None:
+    """Snapshot read-only mappen: alle workers delen dezelfde pagina's uit de page cache."""
+    try:
+        with path.open("rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: leeg bestand
+        return None
+    return read_catalog(buffer, mapped=True)
+
+
+def write_snapshot(db: Session, path: Path) -> CatalogStore:
+    """Snapshot voor de workers schrijven (door de import).
+
+    Via een tijdelijk bestand en een rename: workers die de vorige snapshot gemapt hebben,
+    houden die (het oude bestand blijft bestaan tot de laatste map weg is) tot ze herladen.
+    """
+    data = encode_catalog(db)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return read_catalog(data)
+
+
+def load_catalog_store(db: Session) -> CatalogStore:
+    """De gedeelde snapshot als die bij de huidige data hoort, anders een eigen kopie uit de database."""
+    version = catalog_version(db)
+    current = _cache.current
+    if current is not None and current.version == version:
+        # Alleen prijzen of afgeleide data gewijzigd
+        return current
+    store = open_snapshot(Path(settings.catalog_snapshot))
+    if store is not None and store.version == version:
+        return store
+    return read_catalog(encode_catalog(db))
+
+
+_cache: VersionedCache[CatalogStore] = VersionedCache(load_catalog_store)
+registry.register_gauge(
+    "brickviewer_catalog_store_bytes", "Privégeheugen van de in-process catalogus in deze worker (0 als die gemapt is)",
+    lambda: _cache.current.size if _cache.current is not None and not _cache.current.mapped else 0,
+)
+registry.register_gauge(
+    "brickviewer_catalog_store_mapped_bytes", "Omvang van de gemapte catalogus-snapshot (gedeeld tussen workers)",
+    lambda: _cache.current.size if _cache.current is not None and _cache.current.mapped else 0,
+)
+
+
+def get_catalog_store(db: Session) -> CatalogStore:
+    """Store van de huidige datasetversie; een nieuwe versie laadt een nieuwe store en wisselt die in één keer in."""
+    return _cache.get(db)
+
+
+# ---------------------------------------------------------------------------
+# Lijsten
+# ---------------------------------------------------------------------------
+
+def searchable(term: str | None) -> bool:
+    """ILIKE-jokers (% en _) kent de store niet; zulke zoektermen gaan naar de database."""
+    return not term or not any(char in term for char in "%_\\")
+
+
+def _page(table: Table, rows: np.ndarray, fields: tuple[str, ...], page: int, page_size: int) -> dict:
+    start = (page - 1) * page_size
+    return {
+        "total": len(rows),
+        "page": page,
+        "page_size": page_size,
+        "results": table.records(rows[start:start + page_size], fields),
+    }
+
+
+def _fields(allowed: tuple[str, ...], fields: tuple[str, ...] | None, key: str) -> tuple[str, ...]:
+    # Zoals project_columns: de gevraagde velden in vaste volgorde, de sleutel altijd
+    return allowed if fields is None else tuple(name for name in allowed if name == key or name in fields)
+
+
+def set_page(
+    store: CatalogStore,
+    page: int,
+    page_size: int,
+    fields: tuple[str, ...] | None,
+    theme_id: int | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    search: str | None = None,
+) -> dict:
+    """GET /api/sets zonder waarde-metrics, uit de store."""
+    start, end = store.year_range(year_min, year_max)
+    if theme_id is not None:
+        rows = store.set_themes.get(theme_id, _EMPTY)
+        rows = rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+    else:
+        rows = np.arange(start, end, dtype=np.int32)
+    if search:
+        rows = rows[store.sets.columns["name"].contains(search)[rows]]
+    return _page(store.sets, rows, _fields(SUMMARY_FIELDS, fields, "set_num"), page, page_size)
+
+
+def minifig_page(
+    store: CatalogStore, page: int, page_size: int, fields: tuple[str, ...] | None, search: str | None = None
+) -> dict:
+    """GET /api/minifigs, uit de store."""
+    rows = np.arange(store.minifigs.size, dtype=np.int32)
+    if search:
+        rows = np.flatnonzero(store.minifigs.columns["name"].contains(search)).astype(np.int32)
+    return _page(store.minifigs, rows, _fields(MINIFIG_FIELDS, fields, "fig_num"), page, page_size)
+
+
+def part_set_page(
+    store: CatalogStore, part_num: str, page: int, page_size: int, fields: tuple[str, ...] | None
+) -> dict | None:
+    """GET /api/parts/{part_num}/sets, uit de store; None als het onderdeel niet bestaat."""
+    rows = store.part_sets.get(part_num)
+    if rows is None:
+        return None
+    return {"part_num": part_num, **_page(store.sets, rows, _fields(SUMMARY_FIELDS, fields, "set_num"), page, page_size)}
+
+
+def all_records(table: Table) -> list[dict]:
+    return table.records(np.arange(table.size, dtype=np.int32), tuple(table.columns))
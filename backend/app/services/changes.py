@@ -0,0 +1,53 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.dataset import change_log_floor, current_version
+from app.models.meta import CatalogChange
+
+
+class ChangeLogExpired(Exception):
+    """`since` ligt voor het begin van het bewaarde wijzigingslog."""
+
+    def __init__(self, floor: int):
+        super().__init__(f"Change log starts at version {floor}")
+        self.floor = floor
+
+
+def parse_cursor(cursor: str) -> tuple[int, int]:
+    """'versie:id' uit `next` van de vorige pagina; ValueError als het geen cursor is."""
+    version, _, change_id = cursor.partition(":")
+    return int(version), int(change_id)
+
+
+def change_page(
+    db: Session, since: int, cursor: tuple[int, int] | None, limit: int, tables: list[str] | None = None
+) -> dict:
+    """Wijzigingen na versie `since` t/m de huidige versie, op volgorde van (versie, id).
+
+    Keyset-paginering: `next` is de cursor voor de volgende pagina, None op de laatste.
+    Na de laatste pagina is `version` de nieuwe `since` van de client.
+    """
+    floor = change_log_floor(db)
+    if since < floor:
+        raise ChangeLogExpired(floor)
+    # Eerst de versie: wijzigingen van een versie die tijdens deze request verschijnt, vallen erbuiten
+    version = current_version(db)
+    query = (
+        select(CatalogChange.id, CatalogChange.version, CatalogChange.table_name, CatalogChange.key, CatalogChange.op)
+        .where(CatalogChange.version > since, CatalogChange.version <= version)
+        .order_by(CatalogChange.version, CatalogChange.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(tuple_(CatalogChange.version, CatalogChange.id) > tuple_(*cursor))
+    if tables:
+        query = query.where(CatalogChange.table_name.in_(tables))
+    rows = db.execute(query).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "since": since,
+        "version": version,
+        "changes": [{"version": r.version, "table": r.table_name, "key": r.key, "op": r.op} for r in rows],
+        "next": f"{rows[-1].version}:{rows[-1].id}" if more else None,
+    }
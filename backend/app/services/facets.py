@@ -0,0 +1,233 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.dataset import VersionedCache
+from app.models.lego import BricksetData, Set, Theme
+
+PRICE_REGIONS = ("us", "uk", "ca", "de")
+# Ondergrenzen van de prijsbanden, in lokale valuta
+PRICE_BANDS = (0, 10, 25, 50, 100, 200)
+FACETS = ("theme", "decade", "availability", "price_band", "tag")
+
+
+def price_band_label(index: int) -> str:
+    lo = PRICE_BANDS[index]
+    return f"{lo}-{PRICE_BANDS[index + 1]}" if index + 1 < len(PRICE_BANDS) else f"{lo}+"
+
+
+@dataclass
+class Facet:
+    """Bitmaps voor alle waarden van één facet: rij i is de bitmap van values[i]."""
+
+    values: list
+    labels: list[str]
+    bitmaps: np.ndarray  # uint8, (len(values), n_bytes), np.packbits van een bool-mask per set
+
+    def mask(self, selected) -> np.ndarray | None:
+        """OR van de bitmaps van de gekozen waarden; None als er niets gekozen is."""
+        if not selected:
+            return None
+        index = {value: i for i, value in enumerate(self.values)}
+        rows = [index[value] for value in selected if value in index]
+        if not rows:
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[rows], axis=0)
+
+    def counts(self, mask: np.ndarray, limit: int) -> list[dict]:
+        """Aantal sets per waarde binnen `mask`, aflopend, zonder nullen."""
+        counts = np.bitwise_count(self.bitmaps & mask).sum(axis=1, dtype=np.int64)
+        order = np.argsort(-counts, kind="stable")[:limit]
+        return [
+            {"value": self.values[i], "label": self.labels[i], "count": int(counts[i])}
+            for i in order
+            if counts[i] > 0
+        ]
+
+
+@dataclass
+class FacetIndex:
+    """Alle sets in de volgorde van /api/sets (jaar aflopend, naam, set_num), met bitmaps per facetwaarde.
+
+    Een filter wordt een bitmap; filters combineren is een AND, een facet telt met een
+    popcount. Bereikfilters (jaar, prijs, leeftijd, rating) werken op de kolommen zelf.
+    """
+
+    size: int
+    summaries: list[dict]  # SetSummary per positie
+    names: list[str]  # lowercase, voor search
+    year: np.ndarray
+    age_min: np.ndarray  # float, NaN = onbekend
+    rating: np.ndarray
+    prices: dict[str, np.ndarray]
+    packaging_type: Facet
+    facets: dict[str, Facet] = field(default_factory=dict)
+    price_bands: dict[str, Facet] = field(default_factory=dict)  # per regio
+
+    def pack(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+
+def _facet(keys_per_row: list[list], labels: dict | None = None, values: list | None = None) -> Facet:
+    """Bouw een Facet uit per set de lijst van waarden waar die set onder valt.
+
+    Zonder `values` zijn de waarden alle voorkomende keys, gesorteerd.
+    """
+    if values is None:
+        values = sorted({key for keys in keys_per_row for key in keys})
+    index = {value: i for i, value in enumerate(values)}
+    masks = np.zeros((len(values), len(keys_per_row)), dtype=bool)
+    for row, keys in enumerate(keys_per_row):
+        for key in keys:
+            masks[index[key], row] = True
+    return Facet(
+        values=values,
+        labels=[labels.get(value, str(value)) if labels else str(value) for value in values],
+        bitmaps=np.packbits(masks, axis=1),
+    )
+
+
+def _floats(values: list) -> np.ndarray:
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def load_facet_index(db: Session) -> FacetIndex:
+    rows = db.execute(
+        select(
+            Set.set_num, Set.name, Set.year, Set.theme_id, Set.num_parts, Set.img_url,
+            BricksetData.availability, BricksetData.packaging_type, BricksetData.age_min,
+            BricksetData.rating, BricksetData.tags,
+            *(getattr(BricksetData, f"price_{region}") for region in PRICE_REGIONS),
+        )
+        .outerjoin(BricksetData, BricksetData.set_num == Set.set_num)
+        .order_by(Set.year.desc(), Set.name, Set.set_num)
+    ).all()
+    themes = {row.id: row.name for row in db.execute(select(Theme.id, Theme.name))}
+
+    prices = {region: _floats([getattr(r, f"price_{region}") for r in rows]) for region in PRICE_REGIONS}
+    index = FacetIndex(
+        size=len(rows),
+        summaries=[
+            {
+                "set_num": r.set_num,
+                "name": r.name,
+                "year": r.year,
+                "theme_id": r.theme_id,
+                "num_parts": r.num_parts,
+                "img_url": r.img_url,
+            }
+            for r in rows
+        ],
+        names=[r.name.lower() for r in rows],
+        year=np.array([r.year for r in rows], dtype=np.int16),
+        age_min=_floats([r.age_min for r in rows]),
+        rating=_floats([r.rating for r in rows]),
+        prices=prices,
+        packaging_type=_facet([[r.packaging_type] if r.packaging_type else [] for r in rows]),
+    )
+    index.facets = {
+        "theme": _facet([[r.theme_id] for r in rows], themes),
+        "decade": _facet([[r.year // 10 * 10] for r in rows], {d: f"{d}s" for d in range(1940, 2100, 10)}),
+        "availability": _facet([[r.availability] if r.availability else [] for r in rows]),
+        "tag": _facet([sorted(set(r.tags)) if r.tags else [] for r in rows]),
+    }
+    bands = [price_band_label(i) for i in range(len(PRICE_BANDS))]
+    for region, values in prices.items():
+        band = np.searchsorted(PRICE_BANDS, values, side="right") - 1
+        index.price_bands[region] = _facet(
+            [[bands[b]] if not np.isnan(v) and b >= 0 else [] for b, v in zip(band.tolist(), values)], values=bands
+        )
+    return index
+
+
+_cache: VersionedCache[FacetIndex] = VersionedCache(load_facet_index)
+
+
+def get_facet_index(db: Session) -> FacetIndex:
+    return _cache.get(db)
+
+
+@dataclass
+class FacetQuery:
+    theme_id: list[int] = field(default_factory=list)
+    decade: list[int] = field(default_factory=list)
+    availability: list[str] = field(default_factory=list)
+    price_band: list[str] = field(default_factory=list)
+    tag: list[str] = field(default_factory=list)
+    packaging_type: list[str] = field(default_factory=list)
+    region: str = "us"
+    year_min: int | None = None
+    year_max: int | None = None
+    price_min: float | None = None
+    price_max: float | None = None
+    age: int | None = None
+    rating_min: float | None = None
+    search: str | None = None
+
+
+def faceted_search(index: FacetIndex, query: FacetQuery, page: int, page_size: int, facet_limit: int) -> dict:
+    """Resultaten plus facet-tellingen; elke facet telt onder alle filters behalve die van zichzelf."""
+    # Bereikfilters en zoekterm: één bool-mask over de kolommen
+    base = np.ones(index.size, dtype=bool)
+    if query.year_min is not None:
+        base &= index.year >= query.year_min
+    if query.year_max is not None:
+        base &= index.year <= query.year_max
+    price = index.prices[query.region]
+    if query.price_min is not None:
+        base &= price >= query.price_min
+    if query.price_max is not None:
+        base &= price <= query.price_max
+    if query.age is not None:
+        base &= index.age_min <= query.age
+    if query.rating_min is not None:
+        base &= index.rating >= query.rating_min
+    if query.search:
+        term = query.search.lower()
+        base &= np.fromiter((term in name for name in index.names), dtype=bool, count=index.size)
+    bitmap = index.pack(base)
+    packaging = index.packaging_type.mask(query.packaging_type)
+    if packaging is not None:
+        bitmap &= packaging
+
+    facets = {**index.facets, "price_band": index.price_bands[query.region]}
+    selected = {
+        "theme": query.theme_id,
+        "decade": query.decade,
+        "availability": query.availability,
+        "price_band": query.price_band,
+        "tag": query.tag,
+    }
+    masks = {name: facets[name].mask(selected[name]) for name in FACETS}
+
+    result = bitmap.copy()
+    for mask in masks.values():
+        if mask is not None:
+            result &= mask
+
+    facet_counts = {}
+    for name in FACETS:
+        # Multi-select: de eigen filter telt niet mee, zodat de andere waarden zichtbaar blijven
+        if masks[name] is None:
+            scope = result
+        else:
+            scope = bitmap.copy()
+            for other, mask in masks.items():
+                if other != name and mask is not None:
+                    scope &= mask
+        facet_counts[name] = facets[name].counts(scope, facet_limit)
+
+    positions = index.positions(result)
+    start = (page - 1) * page_size
+    return {
+        "total": len(positions),
+        "page": page,
+        "page_size": page_size,
+        "results": [index.summaries[i] for i in positions[start:start + page_size]],
+        "facets": facet_counts,
+    }
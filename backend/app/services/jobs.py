@@ -0,0 +1,330 @@
+import importlib
+import io
+import os
+import socket
+import sys
+import time
+import traceback
+import zlib
+from collections import deque
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.database import get_engine
+from app.models.meta import JobRun
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Advisory locks: (klasse, sleutel). De scheduler heeft er één, elke lock-groep van jobs ook
+JOB_LOCK_CLASS = 0x6276  # 'bv'
+SCHEDULER_LOCK_KEY = 0
+
+# Voortgang naar de database: hooguit eens per seconde, de laatste 200 regels uitvoer
+PROGRESS_INTERVAL = 1.0
+OUTPUT_LINES = 200
+
+# Een run die zo lang 'running' is zonder dat iemand zijn lock houdt, is van een verdwenen worker
+ORPHAN_AFTER = timedelta(minutes=1)
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    name: str
+    target: str  # "module:functie"; modules uit backend/scripts of het app-package
+    description: str
+    lock: str  # jobs met dezelfde lock draaien nooit tegelijk
+    params: dict[str, bool | int | str] = field(default_factory=dict)  # naam → default
+    every: timedelta | None = None  # de scheduler start de job zo vaak (None = alleen handmatig)
+
+
+JOBS = {
+    spec.name: spec
+    for spec in (
+        JobSpec(
+            "import_rebrickable", "import_csv:run_import", "Rebrickable CSV import (alleen gewijzigde dumps)",
+            lock="rebrickable", params={"all_tables": False, "blue_green": True, "force": False},
+            every=timedelta(days=7),
+        ),
+        JobSpec(
+            "sync_brickset_delta", "sync_brickset:run_delta", "Brickset sync van de sets gewijzigd in de laatste dagen",
+            lock="brickset", params={"days": 2}, every=timedelta(days=1),
+        ),
+        JobSpec("sync_brickset_all", "sync_brickset:run_all", "Volledige Brickset sync, per jaar", lock="brickset"),
+        JobSpec(
+            "refresh_derived", "sync_brickset:refresh_derived",
+            "Rollups, waarde-metrics en planner-statistieken herberekenen; API-caches herladen", lock="derived",
+        ),
+        JobSpec(
+            "build_snapshot", "build_snapshot:run_build", "Statische snapshot bijwerken",
+            lock="snapshot", params={"output": "snapshot", "workers": 4, "full": False},
+        ),
+    )
+}
+
+
+class JobConflict(Exception):
+    """Er staat al een run van dezelfde lock-groep in de wachtrij of draait."""
+
+    def __init__(self, run_id: int):
+        super().__init__(f"Run {run_id} is nog actief")
+        self.run_id = run_id
+
+
+def lock_key(lock: str) -> int:
+    return zlib.crc32(lock.encode()) & 0x7FFFFFFF
+
+
+@contextmanager
+def job_lock(lock: str) -> Iterator[bool]:
+    """Advisory lock voor een lock-groep op een eigen verbinding; False als een ander hem heeft."""
+    with get_engine().connect() as conn:
+        args = {"cls": JOB_LOCK_CLASS, "key": lock_key(lock)}
+        acquired = conn.scalar(text("SELECT pg_try_advisory_lock(:cls, :key)"), args)
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:cls, :key)"), args)
+                conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# Wachtrij
+# ---------------------------------------------------------------------------
+
+def validate_params(spec: JobSpec, params: dict) -> dict:
+    """Params aangevuld met de defaults; ValueError bij onbekende namen of verkeerde types."""
+    unknown = set(params) - set(spec.params)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {spec.name}: {', '.join(sorted(unknown))}")
+    for name, value in params.items():
+        expected = type(spec.params[name])
+        # bool is een subklasse van int: een int-parameter accepteert geen true/false
+        if type(value) is not expected:
+            raise ValueError(f"{name} must be a {expected.__name__}")
+    return {**spec.params, **params}
+
+
+def active_run(db: Session, lock: str) -> int | None:
+    names = [spec.name for spec in JOBS.values() if spec.lock == lock]
+    return db.scalar(
+        select(JobRun.id).where(JobRun.job.in_(names), JobRun.status.in_(ACTIVE_STATUSES)).order_by(JobRun.id).limit(1)
+    )
+
+
+def enqueue(db: Session, job: str, params: dict, requested_by: str) -> JobRun:
+    """Zet een run in de wachtrij; KeyError voor een onbekende job, JobConflict als er al een actief is."""
+    spec = JOBS[job]
+    params = validate_params(spec, params)
+    # Serialiseert gelijktijdige enqueues voor dezelfde lock-groep tot de commit
+    db.execute(text("SELECT pg_advisory_xact_lock(:cls, :key)"), {"cls": JOB_LOCK_CLASS, "key": -lock_key(spec.lock)})
+    running = active_run(db, spec.lock)
+    if running is not None:
+        db.rollback()
+        raise JobConflict(running)
+    run = JobRun(job=job, params=params, requested_by=requested_by)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def claim_next(worker: str) -> int | None:
+    """Oudste run uit de wachtrij op 'running' zetten; SKIP LOCKED laat andere workers met rust."""
+    with get_engine().begin() as conn:
+        return conn.scalar(text("""
+            UPDATE job_runs SET status = 'running', started_at = now(), worker = :worker
+            WHERE id = (
+                SELECT id FROM job_runs WHERE status = 'queued' ORDER BY id FOR UPDATE SKIP LOCKED LIMIT 1
+            )
+            RETURNING id
+        """), {"worker": worker})
+
+
+def schedule_due(db: Session) -> list[int]:
+    """Runs aanmaken voor jobs met `every` die in die periode niet gestart zijn."""
+    created = []
+    for spec in JOBS.values():
+        if spec.every is None:
+            continue
+        recent = db.scalar(
+            select(JobRun.id).where(JobRun.job == spec.name, JobRun.requested_at > func.now() - spec.every).limit(1)
+        )
+        if recent is not None:
+            continue
+        try:
+            created.append(enqueue(db, spec.name, {}, "scheduler").id)
+        except JobConflict:
+            pass
+    return created
+
+
+def fail_orphaned(db: Session) -> list[int]:
+    """Runs die 'running' zijn terwijl niemand hun lock houdt: de worker is verdwenen."""
+    orphaned = []
+    candidates = db.execute(
+        select(JobRun.id, JobRun.job).where(JobRun.status == "running", JobRun.started_at < func.now() - ORPHAN_AFTER)
+    ).all()
+    for run_id, job in candidates:
+        spec = JOBS.get(job)
+        if spec is None:
+            continue
+        with job_lock(spec.lock) as acquired:
+            if acquired:
+                finish(run_id, "failed", error="Worker gestopt tijdens de run")
+                orphaned.append(run_id)
+    return orphaned
+
+
+def finish(run_id: int, status: str, error: str | None = None) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(
+            update(JobRun)
+            .where(JobRun.id == run_id, JobRun.status == "running")
+            .values(status=status, finished_at=func.now(), error=error)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Voortgang
+# ---------------------------------------------------------------------------
+
+class _Output(io.TextIOBase):
+    """stdout van een job: gaat door naar de console en de laatste regels naar de run."""
+
+    def __init__(self, context: "JobContext"):
+        self.context = context
+        self.lines: deque[str] = deque(maxlen=OUTPUT_LINES)
+        self.current = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        sys.__stdout__.write(s)
+        *complete, self.current = (self.current + s).split("\n")
+        # Voortgangsregels met \r: alleen de laatste stand bewaren
+        self.lines.extend(line.rpartition("\r")[2] for line in complete)
+        self.context.flush()
+        return len(s)
+
+    def flush(self) -> None:
+        sys.__stdout__.flush()
+
+    def text(self) -> str:
+        current = self.current.rpartition("\r")[2]
+        return "\n".join([*self.lines, current] if current else self.lines)
+
+
+class JobContext:
+    """Voortgang van de run die in dit proces draait."""
+
+    def __init__(self, run_id: int):
+        self.run_id = run_id
+        self.output = _Output(self)
+        self.values: dict = {}
+        self._flushed_at = 0.0
+
+    def progress(self, stage: str, done: int, total: int | None, unit: str) -> None:
+        new_stage = stage != self.values.get("stage")
+        if new_stage:
+            self.values["stage_started_at"] = func.now()
+        self.values.update(stage=stage, progress_done=done, progress_total=total, progress_unit=unit)
+        self.flush(force=new_stage)
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._flushed_at < PROGRESS_INTERVAL:
+            return
+        self._flushed_at = now
+        values, self.values = self.values, {key: value for key, value in self.values.items() if key != "stage_started_at"}
+        with get_engine().begin() as conn:
+            conn.execute(
+                update(JobRun)
+                .where(JobRun.id == self.run_id)
+                .values(**values, progress_updated_at=func.now(), output=self.output.text())
+            )
+
+
+_active: JobContext | None = None
+
+
+def report_progress(stage: str, done: int, total: int | None = None, unit: str = "rijen") -> None:
+    """Voortgang van de lopende job (bijv. rijen van één tabel); buiten een job een no-op."""
+    if _active is not None:
+        _active.progress(stage, done, total, unit)
+
+
+def progress_rate(run: JobRun) -> tuple[float | None, float | None]:
+    """(eenheden per seconde, resterende seconden) voor de huidige fase."""
+    if run.status != "running" or not run.stage_started_at or not run.progress_updated_at:
+        return None, None
+    elapsed = (run.progress_updated_at - run.stage_started_at).total_seconds()
+    if elapsed <= 0 or run.progress_done <= 0:
+        return None, None
+    rate = run.progress_done / elapsed
+    if run.progress_total is None:
+        return rate, None
+    return rate, max(run.progress_total - run.progress_done, 0) / rate
+
+
+# ---------------------------------------------------------------------------
+# Uitvoeren
+# ---------------------------------------------------------------------------
+
+def resolve_target(target: str):
+    module_name, _, attr = target.partition(":")
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def execute_run(run_id: int) -> str:
+    """Voer een geclaimde run uit (in een workerproces) en geef de eindstatus terug."""
+    global _active
+    with get_engine().connect() as conn:
+        job, params = conn.execute(select(JobRun.job, JobRun.params).where(JobRun.id == run_id)).one()
+    spec = JOBS.get(job)
+    if spec is None:
+        finish(run_id, "failed", error=f"Onbekende job {job}")
+        return "failed"
+
+    with job_lock(spec.lock) as acquired:
+        if not acquired:
+            finish(run_id, "skipped", error=f"Een andere run met lock '{spec.lock}' is nog bezig")
+            return "skipped"
+        with get_engine().begin() as conn:
+            conn.execute(update(JobRun).where(JobRun.id == run_id).values(worker=worker_name()))
+
+        _active = context = JobContext(run_id)
+        status, error = "succeeded", None
+        try:
+            with redirect_stdout(context.output):
+                resolve_target(spec.target)(**params)
+        except SystemExit as exc:
+            # De scripts stoppen met SystemExit(melding) bij een fout
+            if exc.code not in (None, 0):
+                status, error = "failed", str(exc.code)
+        except Exception:
+            status, error = "failed", traceback.format_exc()
+        except KeyboardInterrupt:
+            status, error = "failed", "Worker gestopt (Ctrl+C)"
+            raise
+        finally:
+            _active = None
+            context.flush(force=True)
+            finish(run_id, status, error)
+        return status
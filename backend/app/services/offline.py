@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.dataset import CHANGE_RETENTION, current_version
+from app.core.responses import dumps
+from app.models.lego import Theme
+from app.services.set_details import MINIFIG_COLUMNS, SUMMARY_COLUMNS
+
+# Ophogen als de indeling van de bundels wijzigt: de volgende publicatie begint dan zonder deltas
+OFFLINE_FORMAT = 1
+
+# Tabellen in de offline-catalogus; de eerste kolom is de sleutel
+OFFLINE_TABLES = {
+    "sets": SUMMARY_COLUMNS,
+    "themes": (Theme.id, Theme.name, Theme.parent_id),
+    "minifigs": MINIFIG_COLUMNS,
+}
+
+Rows = dict[str, dict[str | int, list]]
+
+
+def load_rows(db: Session) -> Rows:
+    """Per tabel: sleutel -> rij (waarden in de volgorde van de kolommen)."""
+    return {
+        name: {row[0]: list(row) for row in db.execute(select(*columns).order_by(columns[0]))}
+        for name, columns in OFFLINE_TABLES.items()
+    }
+
+
+def _columns(name: str) -> list[str]:
+    return [column.key for column in OFFLINE_TABLES[name]]
+
+
+def diff_rows(old: Rows, new: Rows) -> dict:
+    """Per gewijzigde tabel de nieuwe of gewijzigde rijen en de verdwenen sleutels."""
+    tables = {}
+    for name, rows in new.items():
+        before = old.get(name, {})
+        upsert = [row for key, row in rows.items() if before.get(key) != row]
+        delete = [key for key in before if key not in rows]
+        if upsert or delete:
+            tables[name] = {"columns": _columns(name), "upsert": upsert, "delete": delete}
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# Bestanden
+# ---------------------------------------------------------------------------
+
+def write_bundle(output: Path, stem: str, content: dict) -> dict:
+    """Schrijf `{stem}.{hash}.json.gz`; gzip omdat browsers dat zelf kunnen uitpakken (DecompressionStream)."""
+    body = gzip.compress(dumps(content), compresslevel=9, mtime=0)
+    name = f"{stem}.{hashlib.blake2b(body, digest_size=6).hexdigest()}.json.gz"
+    path = output / name
+    if not path.exists():
+        tmp = path.with_name(name + ".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+    return {"file": name, "bytes": len(body)}
+
+
+def read_base(path: Path) -> Rows:
+    tables = orjson.loads(gzip.decompress(path.read_bytes()))["tables"]
+    return {name: {row[0]: row for row in table["rows"]} for name, table in tables.items()}
+
+
+def load_manifest(output: Path) -> dict:
+    path = output / "manifest.json"
+    if not path.exists():
+        return {}
+    manifest = orjson.loads(path.read_bytes())
+    return manifest if manifest.get("format") == OFFLINE_FORMAT else {}
+
+
+def _prune(output: Path, keep: set[str]) -> int:
+    removed = 0
+    for path in output.glob("*.json.gz"):
+        if path.name not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def publish(db: Session, output: Path) -> dict | None:
+    """Nieuwe basis plus een delta sinds de vorige publicatie; None als er niets gewijzigd is.
+
+    De delta volgt uit een vergelijking met de rijen van de vorige basis, dus ook een
+    rollback of een verwijderde set komt er goed in. Deltas ouder dan CHANGE_RETENTION
+    vervallen; clients die verder achterlopen halen de basis opnieuw.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(output)
+    version = current_version(db)
+    rows = load_rows(db)
+    now = datetime.now(timezone.utc)
+    if previous and previous["version"] == version:
+        return None
+
+    deltas = []
+    if previous and previous["version"] < version:
+        tables = diff_rows(read_base(output / previous["base"]["file"]), rows)
+        if not tables:
+            return None
+        delta = {"format": OFFLINE_FORMAT, "from": previous["version"], "to": version, "tables": tables}
+        deltas = [
+            *previous["deltas"],
+            {
+                "from": previous["version"],
+                "to": version,
+                **write_bundle(output, f"delta.{previous['version']}-{version}", delta),
+                "created_at": now.isoformat(timespec="seconds"),
+            },
+        ]
+        deltas = [d for d in deltas if datetime.fromisoformat(d["created_at"]) >= now - CHANGE_RETENTION]
+
+    base = {
+        "format": OFFLINE_FORMAT,
+        "version": version,
+        "tables": {name: {"columns": _columns(name), "rows": list(table.values())} for name, table in rows.items()},
+    }
+    manifest = {
+        "format": OFFLINE_FORMAT,
+        "version": version,
+        "generated_at": now.isoformat(timespec="seconds"),
+        "base": {"version": version, **write_bundle(output, f"base.{version}", base)},
+        "deltas": deltas,
+    }
+    tmp = output / "manifest.json.tmp"
+    tmp.write_bytes(orjson.dumps(manifest))
+    os.replace(tmp, output / "manifest.json")
+
+    # De vorige basis blijft staan voor clients die het vorige manifest net gelezen hebben
+    keep = {manifest["base"]["file"], *(d["file"] for d in deltas)}
+    if previous:
+        keep.add(previous["base"]["file"])
+    _prune(output, keep)
+    return manifest
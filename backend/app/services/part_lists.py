@@ -0,0 +1,108 @@
+import os
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.lego import Color, Inventory, InventoryPart, Part
+
+
+def latest_inventory_id(db: Session, set_num: str) -> int | None:
+    return db.scalar(
+        select(Inventory.id)
+        .where(Inventory.set_num == set_num)
+        .order_by(Inventory.version.desc())
+        .limit(1)
+    )
+
+
+_PART_COLUMNS = (
+    InventoryPart.part_num,
+    Part.name.label("part_name"),
+    InventoryPart.color_id,
+    Color.name.label("color_name"),
+    Color.rgb.label("color_rgb"),
+    InventoryPart.quantity,
+    InventoryPart.is_spare,
+    InventoryPart.img_url,
+)
+_PART_ORDER = (InventoryPart.part_num, InventoryPart.color_id, InventoryPart.is_spare, InventoryPart.id)
+
+
+def inventory_part_rows(db: Session, inventory_id: int) -> list[dict]:
+    """Onderdelen van een inventaris als InventoryPartDetail-dicts, gesorteerd op part_num."""
+    return [
+        row._asdict()
+        for row in db.execute(
+            select(*_PART_COLUMNS)
+            .join(Part, Part.part_num == InventoryPart.part_num)
+            .join(Color, Color.id == InventoryPart.color_id)
+            .where(InventoryPart.inventory_id == inventory_id)
+            .order_by(*_PART_ORDER)
+        )
+    ]
+
+
+def inventory_part_rows_many(db: Session, inventory_ids: list[int]) -> dict[int, list[dict]]:
+    """Zelfde als inventory_part_rows, maar voor een reeks inventarissen in één query."""
+    parts: dict[int, list[dict]] = {inventory_id: [] for inventory_id in inventory_ids}
+    if not inventory_ids:
+        return parts
+    for row in db.execute(
+        select(InventoryPart.inventory_id, *_PART_COLUMNS)
+        .join(Part, Part.part_num == InventoryPart.part_num)
+        .join(Color, Color.id == InventoryPart.color_id)
+        .where(InventoryPart.inventory_id.in_(inventory_ids))
+        .order_by(InventoryPart.inventory_id, *_PART_ORDER)
+    ):
+        record = row._asdict()
+        parts[record.pop("inventory_id")].append(record)
+    return parts
+
+
+def columnar_parts(set_num: str, rows: list[dict]) -> dict:
+    """Kolomgewijze onderdelenlijst met woordenboeken voor onderdelen en kleuren.
+
+    Elke regel verwijst met een index naar `parts` en `colors`, zodat namen en RGB-waarden
+    maar één keer in de payload staan. `is_spare` is 0/1 (compacter dan true/false) en
+    `img_url` bevat alleen het deel na het gemeenschappelijke `img_prefix`.
+    """
+    part_index: dict[str, int] = {}
+    color_index: dict[int, int] = {}
+    parts = {"part_num": [], "name": []}
+    colors = {"id": [], "name": [], "rgb": []}
+    columns = {"part": [], "color": [], "quantity": [], "is_spare": [], "img_url": []}
+
+    for row in rows:
+        part = part_index.get(row["part_num"])
+        if part is None:
+            part = part_index[row["part_num"]] = len(parts["part_num"])
+            parts["part_num"].append(row["part_num"])
+            parts["name"].append(row["part_name"])
+        color = color_index.get(row["color_id"])
+        if color is None:
+            color = color_index[row["color_id"]] = len(colors["id"])
+            colors["id"].append(row["color_id"])
+            colors["name"].append(row["color_name"])
+            colors["rgb"].append(row["color_rgb"])
+        columns["part"].append(part)
+        columns["color"].append(color)
+        columns["quantity"].append(row["quantity"])
+        columns["is_spare"].append(1 if row["is_spare"] else 0)
+        columns["img_url"].append(row["img_url"])
+
+    # Zonder afbeeldingen hoeft de kolom niet mee; anders alleen wat na de gedeelde prefix komt
+    urls = [url for url in columns["img_url"] if url]
+    img_prefix = os.path.commonprefix(urls) if urls else ""
+    if not urls:
+        columns["img_url"] = None
+    elif img_prefix:
+        columns["img_url"] = [url[len(img_prefix):] if url else None for url in columns["img_url"]]
+
+    return {
+        "set_num": set_num,
+        "count": len(rows),
+        "img_prefix": img_prefix,
+        "parts": parts,
+        "colors": colors,
+        "columns": columns,
+    }
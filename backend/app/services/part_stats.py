@@ -0,0 +1,185 @@
+import io
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.dataset import VersionedCache
+from app.models.lego import Color, PartCategory
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Een onderdeel+kleur combinatie die in hooguit zoveel sets voorkomt telt als zeldzaam
+RARE_MAX_SETS = 3
+
+# Alleen de meest recente inventaris per set, zonder minifig-inventarissen
+_INVENTORY_PARTS_SQL = """
+    SELECT ip.inventory_id, ip.part_num, ip.color_id, ip.quantity, ip.is_spare,
+           p.part_cat_id, s.year
+    FROM inventory_parts ip
+    JOIN (
+        SELECT DISTINCT ON (set_num) id, set_num
+        FROM inventories
+        ORDER BY set_num, version DESC
+    ) i ON i.id = ip.inventory_id
+    JOIN sets s ON s.set_num = i.set_num
+    JOIN parts p ON p.part_num = ip.part_num
+    ORDER BY ip.inventory_id
+"""
+
+_LATEST_INVENTORIES_SQL = """
+    SELECT DISTINCT ON (set_num) id, set_num
+    FROM inventories
+    ORDER BY set_num, version DESC
+"""
+
+
+@dataclass
+class PartStats:
+    """Kolomgewijze kopie van inventory_parts met voorberekende rollups."""
+
+    frame: "pd.DataFrame"  # gesorteerd op inventory_id
+    inventory_ids: np.ndarray  # frame["inventory_id"] als array voor searchsorted
+    inventory_by_set: dict[str, int]
+    colors: dict[int, dict]
+    categories: dict[int, str]
+    color_usage: list[dict]
+
+    def set_rows(self, set_num: str) -> "pd.DataFrame | None":
+        inventory_id = self.inventory_by_set.get(set_num)
+        if inventory_id is None:
+            return None
+        lo, hi = np.searchsorted(self.inventory_ids, [inventory_id, inventory_id + 1])
+        return self.frame.iloc[lo:hi]
+
+
+def _copy_to_frame(db: Session, sql: str, dtype: dict) -> "pd.DataFrame":
+    # COPY ... TO STDOUT is veel sneller dan rijen als Python tuples ophalen
+    buf = io.StringIO()
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", buf)
+    finally:
+        cursor.close()
+    buf.seek(0)
+    # pandas pas hier importeren: dat kost ca. 250 ms, en een worker laadt de stats pas in de warm-up of bij het eerste request
+    import pandas as pd
+
+    return pd.read_csv(buf, dtype=dtype, true_values=["t"], false_values=["f"])
+
+
+def load_part_stats(db: Session) -> PartStats:
+    frame = _copy_to_frame(
+        db,
+        _INVENTORY_PARTS_SQL,
+        {
+            "inventory_id": "int32",
+            "part_num": "category",
+            "color_id": "int32",
+            "quantity": "int32",
+            "is_spare": "bool",
+            "part_cat_id": "int32",
+            "year": "int16",
+        },
+    )
+    inventories = _copy_to_frame(db, _LATEST_INVENTORIES_SQL, {"id": "int32", "set_num": "str"})
+
+    # Aantal sets waarin elke onderdeel+kleur combinatie voorkomt
+    frame["element_sets"] = (
+        frame.groupby(["part_num", "color_id"], observed=True)["inventory_id"]
+        .transform("nunique")
+        .astype("int32")
+    )
+
+    colors = {
+        c.id: {"name": c.name, "rgb": c.rgb, "is_trans": c.is_trans}
+        for c in db.scalars(select(Color))
+    }
+    categories = {c.id: c.name for c in db.scalars(select(PartCategory))}
+
+    regular = frame[~frame["is_spare"]]
+    usage = regular.groupby("color_id").agg(
+        quantity=("quantity", "sum"),
+        num_parts=("part_num", "nunique"),
+        num_sets=("inventory_id", "nunique"),
+        year_min=("year", "min"),
+        year_max=("year", "max"),
+    )
+    usage = usage.sort_values("quantity", ascending=False)
+    color_usage = [
+        {"color_id": int(color_id), **_color_info(colors, color_id), **_ints(row)}
+        for color_id, row in zip(usage.index, usage.to_dict("records"))
+    ]
+
+    return PartStats(
+        frame=frame,
+        inventory_ids=frame["inventory_id"].to_numpy(),
+        inventory_by_set=dict(zip(inventories["set_num"], inventories["id"].tolist())),
+        colors=colors,
+        categories=categories,
+        color_usage=color_usage,
+    )
+
+
+def _color_info(colors: dict[int, dict], color_id) -> dict:
+    return colors.get(int(color_id), {"name": "Unknown", "rgb": "000000", "is_trans": False})
+
+
+def _ints(row: dict) -> dict:
+    return {key: int(value) for key, value in row.items()}
+
+
+_cache: VersionedCache[PartStats] = VersionedCache(load_part_stats)
+
+
+def get_part_stats(db: Session) -> PartStats:
+    return _cache.get(db)
+
+
+def _rollup(rows: "pd.DataFrame", key: str) -> "pd.DataFrame":
+    return (
+        rows.groupby(key)
+        .agg(quantity=("quantity", "sum"), lots=("quantity", "size"))
+        .sort_values("quantity", ascending=False)
+    )
+
+
+def set_breakdown(stats: PartStats, set_num: str, include_spares: bool = False) -> dict | None:
+    rows = stats.set_rows(set_num)
+    if rows is None:
+        return None
+    if not include_spares:
+        rows = rows[~rows["is_spare"]]
+
+    by_color = _rollup(rows, "color_id")
+    by_category = _rollup(rows, "part_cat_id")
+    rare = rows[rows["element_sets"] <= RARE_MAX_SETS]
+
+    return {
+        "set_num": set_num,
+        "total_quantity": int(rows["quantity"].sum()),
+        "total_lots": len(rows),
+        "colors": [
+            {"color_id": int(color_id), **_color_info(stats.colors, color_id), **_ints(row)}
+            for color_id, row in zip(by_color.index, by_color.to_dict("records"))
+        ],
+        "categories": [
+            {"part_cat_id": int(cat_id), "name": stats.categories.get(int(cat_id), "Unknown"), **_ints(row)}
+            for cat_id, row in zip(by_category.index, by_category.to_dict("records"))
+        ],
+        "rare_elements": [
+            {
+                "part_num": part_num,
+                "color_id": int(color_id),
+                "color_name": _color_info(stats.colors, color_id)["name"],
+                "quantity": int(quantity),
+                "num_sets": int(num_sets),
+            }
+            for part_num, color_id, quantity, num_sets in zip(
+                rare["part_num"], rare["color_id"], rare["quantity"], rare["element_sets"]
+            )
+        ],
+    }
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.dataset import VersionedCache
+from app.models.lego import BricksetData, Color, Element, Part, Set
+
+
+@dataclass
+class ResolverIndex:
+    """Hash-indexen voor het resolven van gescande identifiers zonder DB-queries."""
+
+    sets: dict[str, dict]
+    elements: dict[str, dict]
+    barcodes: dict[str, tuple[str, str]]  # genormaliseerde EAN-13 -> (set_num, "ean"/"upc")
+    item_numbers: dict[str, str]
+
+
+def normalize_barcode(value: str) -> str | None:
+    """UPC-A (12 cijfers) en EAN-13 naar één sleutel: UPC is EAN-13 met voorloopnul."""
+    digits = "".join(ch for ch in value if ch.isdigit())
+    if len(digits) == 12:
+        return "0" + digits
+    if len(digits) == 13:
+        return digits
+    return None
+
+
+def load_resolver_index(db: Session) -> ResolverIndex:
+    sets = {
+        row.set_num: dict(row._mapping)
+        for row in db.execute(
+            select(Set.set_num, Set.name, Set.year, Set.theme_id, Set.num_parts, Set.img_url)
+        )
+    }
+    elements = {
+        row.element_id: dict(row._mapping)
+        for row in db.execute(
+            select(
+                Element.element_id,
+                Element.part_num,
+                Part.name.label("part_name"),
+                Element.color_id,
+                Color.name.label("color_name"),
+            )
+            .join(Part, Part.part_num == Element.part_num)
+            .join(Color, Color.id == Element.color_id)
+        )
+    }
+
+    barcodes: dict[str, tuple[str, str]] = {}
+    item_numbers: dict[str, str] = {}
+    for row in db.execute(
+        select(BricksetData.set_num, BricksetData.barcode_ean, BricksetData.barcode_upc, BricksetData.item_number)
+    ):
+        for kind, value in (("upc", row.barcode_upc), ("ean", row.barcode_ean)):
+            key = normalize_barcode(value) if value else None
+            if key:
+                barcodes[key] = (row.set_num, kind)
+        if row.item_number:
+            for number in row.item_number.split(","):
+                if number.strip():
+                    item_numbers[number.strip()] = row.set_num
+
+    return ResolverIndex(sets=sets, elements=elements, barcodes=barcodes, item_numbers=item_numbers)
+
+
+_cache: VersionedCache[ResolverIndex] = VersionedCache(load_resolver_index)
+
+
+def get_resolver_index(db: Session) -> ResolverIndex:
+    return _cache.get(db)
+
+
+def resolve(index: ResolverIndex, identifier: str) -> dict:
+    """Zoek één identifier op; volgorde: set_num, element ID, barcode, itemnummer, setnummer zonder variant."""
+    query = identifier.strip()
+    result = {"query": identifier, "match_type": None, "element": None, "set": None}
+
+    if query in index.sets:
+        return {**result, "match_type": "set_num", "set": index.sets[query]}
+    if query in index.elements:
+        return {**result, "match_type": "element", "element": index.elements[query]}
+
+    barcode = normalize_barcode(query)
+    if barcode and barcode in index.barcodes:
+        set_num, kind = index.barcodes[barcode]
+        return {**result, "match_type": kind, "set": index.sets.get(set_num)}
+
+    if query in index.item_numbers:
+        return {**result, "match_type": "item_number", "set": index.sets.get(index.item_numbers[query])}
+    if f"{query}-1" in index.sets:
+        return {**result, "match_type": "set_num", "set": index.sets[f"{query}-1"]}
+    return result
@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.lego import BricksetData, BricksetSync, Inventory, InventoryMinifig, Minifig, Set, Theme
+from app.schemas.lego import BricksetInfo
+from app.services.part_lists import inventory_part_rows_many
+
+# Kolommen van SetSummary; rijen gaan als dict rechtstreeks naar de response
+SUMMARY_COLUMNS = (Set.set_num, Set.name, Set.year, Set.theme_id, Set.num_parts, Set.img_url)
+MINIFIG_COLUMNS = (Minifig.fig_num, Minifig.name, Minifig.num_parts, Minifig.img_url)
+BRICKSET_COLUMNS = tuple(
+    BricksetData.__table__.c[name] for name in BricksetInfo.model_fields if name != "last_synced"
+)
+
+SUMMARY_FIELDS = tuple(column.key for column in SUMMARY_COLUMNS)
+MINIFIG_FIELDS = tuple(column.key for column in MINIFIG_COLUMNS)
+BRICKSET_FIELDS = tuple(BricksetInfo.model_fields)
+
+# Optionele onderdelen van een set-detail, in de volgorde waarin ze in de payload staan
+SET_SECTIONS = ("theme", "minifigs", "parts", "brickset")
+
+# Geldige waarden voor fields= op set-details: basisvelden, secties en losse Brickset-velden
+SET_DETAIL_FIELDS = SUMMARY_FIELDS + SET_SECTIONS + tuple(f"brickset.{name}" for name in BRICKSET_FIELDS)
+
+
+@dataclass(frozen=True)
+class SetProjection:
+    """Welke kolommen en secties van een set-detail geladen worden."""
+
+    columns: tuple[str, ...] = SUMMARY_FIELDS
+    sections: tuple[str, ...] = SET_SECTIONS
+    brickset: tuple[str, ...] = BRICKSET_FIELDS
+
+    @classmethod
+    def from_fields(cls, fields: tuple[str, ...] | None) -> "SetProjection":
+        """Projectie uit een geparste fields=-lijst (zie parse_fields); None is alles.
+
+        Zonder basisvelden in de lijst komen alle basisvelden mee (`fields=parts,brickset`).
+        `brickset.price_us` laadt de Brickset-sectie met alleen die kolom; `brickset` alle kolommen.
+        """
+        if fields is None:
+            return cls()
+        brickset = tuple(f.removeprefix("brickset.") for f in fields if f.startswith("brickset."))
+        sections = tuple(s for s in SET_SECTIONS if s in fields or (s == "brickset" and brickset))
+        return cls(
+            columns=tuple(f for f in SUMMARY_FIELDS if f in fields) or SUMMARY_FIELDS,
+            sections=sections,
+            brickset=BRICKSET_FIELDS if "brickset" in fields or not brickset else brickset,
+        )
+
+    def without(self, section: str) -> "SetProjection":
+        return SetProjection(self.columns, tuple(s for s in self.sections if s != section), self.brickset)
+
+
+def project_columns(columns: tuple, fields: tuple[str, ...] | None, key: str) -> tuple:
+    """Alleen de gevraagde kolommen in de select-lijst; de sleutelkolom altijd."""
+    if fields is None:
+        return columns
+    return tuple(column for column in columns if column.key == key or column.key in fields)
+
+
+def latest_inventory_ids(db: Session, set_nums: list[str]) -> dict[str, int]:
+    """Meest recente inventaris per set, voor alle sets in één query."""
+    rows = db.execute(
+        select(Inventory.set_num, Inventory.id)
+        .where(Inventory.set_num.in_(set_nums))
+        .distinct(Inventory.set_num)
+        .order_by(Inventory.set_num, Inventory.version.desc())
+    )
+    return {row.set_num: row.id for row in rows}
+
+
+def set_detail_payloads(
+    db: Session, set_nums: list[str], projection: SetProjection = SetProjection()
+) -> dict[str, dict]:
+    """SetFullDetail-dicts voor een reeks sets, met één query per entiteit in plaats van per set.
+
+    Alleen de kolommen en secties uit `projection` worden geladen en komen in de payload;
+    `set_num` altijd. Onbekende set-nummers ontbreken in het resultaat.
+    """
+    if not set_nums:
+        return {}
+    sections = projection.sections
+
+    query = select(*project_columns(SUMMARY_COLUMNS, projection.columns, "set_num")).where(Set.set_num.in_(set_nums))
+    if "theme" in sections:
+        query = query.add_columns(
+            Theme.id.label("theme__id"), Theme.name.label("theme__name"), Theme.parent_id.label("theme__parent_id")
+        ).join(Theme, Theme.id == Set.theme_id)
+    rows = db.execute(query).all()
+    found = [row.set_num for row in rows]
+
+    brickset: dict[str, dict] = {}
+    if "brickset" in sections and found:
+        columns = [column for column in BRICKSET_COLUMNS if column.key in projection.brickset]
+        query = select(BricksetData.set_num, *columns).where(BricksetData.set_num.in_(found))
+        if "last_synced" in projection.brickset:
+            query = query.add_columns(BricksetSync.last_synced).outerjoin(
+                BricksetSync, BricksetSync.set_num == BricksetData.set_num
+            )
+        for row in db.execute(query):
+            record = row._asdict()
+            brickset[record.pop("set_num")] = record
+
+    inventories = latest_inventory_ids(db, found) if {"parts", "minifigs"} & set(sections) and found else {}
+    parts = inventory_part_rows_many(db, list(inventories.values())) if "parts" in sections else {}
+    minifigs: dict[int, list[dict]] = {}
+    if "minifigs" in sections and inventories:
+        for row in db.execute(
+            select(InventoryMinifig.inventory_id, *MINIFIG_COLUMNS)
+            .join(InventoryMinifig, InventoryMinifig.fig_num == Minifig.fig_num)
+            .where(InventoryMinifig.inventory_id.in_(list(inventories.values())))
+            .order_by(InventoryMinifig.inventory_id, Minifig.fig_num)
+        ):
+            record = row._asdict()
+            minifigs.setdefault(record.pop("inventory_id"), []).append(record)
+
+    payloads = {}
+    for row in rows:
+        record = row._asdict()
+        payload = {name: record[name] for name in SUMMARY_FIELDS if name in record}
+        inventory_id = inventories.get(row.set_num)
+        if "theme" in sections:
+            payload["theme"] = {"id": row.theme__id, "name": row.theme__name, "parent_id": row.theme__parent_id}
+        if "minifigs" in sections:
+            payload["minifigs"] = minifigs.get(inventory_id, [])
+        if "parts" in sections:
+            payload["parts"] = parts.get(inventory_id, [])
+        if "brickset" in sections:
+            payload["brickset"] = brickset.get(row.set_num)
+        payloads[row.set_num] = payload
+    return payloads
+
+
+def set_detail_payload(
+    db: Session, set_num: str, include_parts: bool = True, projection: SetProjection = SetProjection()
+) -> dict | None:
+    """SetFullDetail als dict, in één keer opgebouwd uit kolom-selects (zonder ORM-objecten).
+
+    Met `include_parts=False` worden de onderdelen niet geladen en blijft `parts` een lege lijst.
+    """
+    loaded = projection if include_parts else projection.without("parts")
+    payload = set_detail_payloads(db, [set_num], loaded).get(set_num)
+    if payload is not None and "parts" in projection.sections and not include_parts:
+        payload["parts"] = []
+    return payload
@@ -0,0 +1,29 @@
+from sqlalchemy import delete, text
+
+from app.models.lego import SetValueMetric
+
+# Eén rij per set en regio met een prijs; percent_rank geeft 0 voor de goedkoopste set van het thema
+VALUE_METRICS_SQL = """
+INSERT INTO set_value_metrics (set_num, region, theme_id, price, price_per_piece, price_per_gram, theme_percentile)
+SELECT set_num, region, theme_id, price,
+       round(price / nullif(num_parts, 0), 4)::float8,
+       round(price / nullif(weight_g, 0)::numeric, 4)::float8,
+       round((100 * percent_rank() OVER (PARTITION BY region, theme_id ORDER BY price))::numeric, 1)::float8
+FROM (
+    SELECT s.set_num, s.theme_id, s.num_parts, b.weight_g, r.region, r.price
+    FROM sets s
+    JOIN brickset_data b ON b.set_num = s.set_num
+    CROSS JOIN LATERAL (
+        VALUES ('us', b.price_us), ('uk', b.price_uk), ('ca', b.price_ca), ('de', b.price_de)
+    ) AS r (region, price)
+    WHERE r.price > 0
+) priced
+"""
+
+
+def refresh_value_metrics(conn) -> int:
+    """Herbereken set_value_metrics in één transactie; lezers zien tot de commit de oude rijen."""
+    conn.execute(delete(SetValueMetric))
+    count = conn.execute(text(VALUE_METRICS_SQL)).rowcount
+    conn.commit()
+    return count
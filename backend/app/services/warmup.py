@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import get_engine, replicas
+
+# Logger van uvicorn: volgt diens logconfiguratie (niveau, formaat, --log-level)
+logger = logging.getLogger("uvicorn.error")
+
+# Requests die de warm-up in-process afhandelt: elk endpoint met een eigen cache of een zware
+# query. {set_num} wordt de eerste set uit /api/sets.
+WARMUP_REQUESTS: tuple[tuple[str, str, dict | None], ...] = (
+    ("GET", "/api/sets", None),
+    ("GET", "/api/sets?year_min=2000&year_max=2010&search=star", None),
+    ("GET", "/api/sets?sort=price_per_piece", None),
+    ("GET", "/api/sets/search?search=star", None),
+    ("GET", "/api/themes", None),
+    ("GET", "/api/minifigs?search=pilot", None),
+    ("GET", "/api/colors", None),
+    ("GET", "/api/colors/usage", None),
+    ("GET", "/api/stats", None),
+    ("POST", "/api/resolve", {"identifiers": ["3001"]}),
+)
+SET_REQUESTS = (
+    "/api/sets/{set_num}",
+    "/api/sets/{set_num}/parts",
+    "/api/sets/{set_num}/breakdown",
+)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = True  # zonder warm-up is een worker meteen gezond
+    seconds: float | None = None
+    steps: dict[str, float] = field(default_factory=dict)  # stap -> seconden
+    errors: list[str] = field(default_factory=list)
+
+
+state = WarmupState()
+
+
+def _fill_pool(engine: Engine) -> None:
+    # Zoveel verbindingen tegelijk openen als de pool vasthoudt; daarna staan ze klaar
+    connections = [engine.connect() for _ in range(engine.pool.size())]
+    for connection in connections:
+        connection.close()
+
+
+def open_connections() -> None:
+    for engine in [get_engine(), *replicas.engines]:
+        _fill_pool(engine)
+    if replicas.replicas:
+        replicas.check()
+
+
+async def request(app, method: str, path: str, body: dict | None = None) -> tuple[int, bytes]:
+    """Request rechtstreeks op de router: zonder onze middleware, dus niet in /metrics en niet in de response-cache.
+
+    Alleen de AsyncExitStackMiddleware van FastAPI zit ertussen; die hebben de routes nodig.
+    """
+    url = urlsplit(path)
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup"), (b"content-type", b"application/json")],
+        "client": None,
+        "server": None,
+        "app": app,
+    }
+    status, chunks = 500, []
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await AsyncExitStackMiddleware(app.router)(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def _requests(app, requests: list[tuple[str, str, dict | None]]) -> list[bytes | None]:
+    async def one(method: str, path: str, body: dict | None) -> bytes | None:
+        try:
+            status, content = await request(app, method, path, body)
+        except Exception as exc:  # een mislukte warm-up-request mag de worker niet tegenhouden
+            state.errors.append(f"{method} {path}: {type(exc).__name__}")
+            return None
+        if status >= 400:
+            state.errors.append(f"{method} {path}: {status}")
+            return None
+        return content
+
+    # Tegelijk: de caches (facetten, onderdelenstatistiek) laden elk in een eigen thread
+    return await asyncio.gather(*(one(*r) for r in requests))
+
+
+async def warm_up(app) -> None:
+    """Verbindingen openen, caches laden en de query's van de hot paths één keer uitvoeren.
+
+    psycopg2 kent geen prepared statements; wat wel eerst opgebouwd wordt, is de cache van
+    gecompileerde SQL van SQLAlchemy, plus de caches van de services (catalogus, facetten,
+    onderdelenstatistiek, resolver) en het OpenAPI-schema (pydantic JSON-schema's).
+    Tot dit klaar is, meldt /health 503.
+    """
+    started = time.perf_counter()
+    state.ready = False
+
+    async def step(name: str, coroutine) -> None:
+        start = time.perf_counter()
+        try:
+            await coroutine
+        except Exception as exc:
+            state.errors.append(f"{name}: {type(exc).__name__}")
+        state.steps[name] = round(time.perf_counter() - start, 3)
+
+    async def requests() -> None:
+        sets, *_ = await _requests(app, list(WARMUP_REQUESTS))
+        results = json.loads(sets)["results"] if sets else []
+        if results:
+            set_num = results[0]["set_num"]
+            await _requests(app, [("GET", path.format(set_num=set_num), None) for path in SET_REQUESTS])
+
+    await step("connections", run_in_threadpool(open_connections))
+    await step("requests", requests())
+    await step("openapi", run_in_threadpool(app.openapi))
+
+    state.seconds = round(time.perf_counter() - started, 3)
+    state.ready = True
+    logger.info("Warm-up klaar in %.1fs (%s)", state.seconds, state.steps)
+    if state.errors:
+        logger.warning("Warm-up: %d fouten: %s", len(state.errors), "; ".join(state.errors))
@@ -0,0 +1,306 @@
+"""
+End-to-end API benchmark: vaste concurrency per scenario, JSON-rapport met throughput en latency-percentielen.
+
+Gebruik:
+    uv run python benchmarks/api_bench.py --output results.json
+    uv run python benchmarks/api_bench.py --base-url http://localhost:8000 --concurrency 16
+    uv run python benchmarks/api_bench.py --compare baseline.json
+
+Zonder --base-url start het script zelf uvicorn tegen BENCH_DATABASE_URL (zie
+generate_dataset.py). Doelen (grote/kleine sets, thema's, zoektermen, diepe pagina's)
+worden uit de benchmark-database gekozen, zodat het ook tegen een echte import werkt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine, text
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import bench_database_url
+
+PAGE_SIZE = 24
+_TIMING_RE = re.compile(r"(\w+);dur=([\d.]+)")
+
+
+# ---------------------------------------------------------------------------
+# Scenario's
+# ---------------------------------------------------------------------------
+
+def build_scenarios(database_url: str, seed: int) -> dict[str, list[str]]:
+    """Per scenario een pool van URL's; workers kiezen er willekeurig één per request."""
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        large = conn.scalars(text("SELECT set_num FROM sets ORDER BY num_parts DESC LIMIT 20")).all()
+        small = conn.scalars(text(
+            "SELECT set_num FROM sets WHERE num_parts BETWEEN 1 AND 30 ORDER BY set_num LIMIT 200"
+        )).all()
+        themes = conn.scalars(text(
+            "SELECT theme_id FROM sets GROUP BY theme_id ORDER BY count(*) DESC LIMIT 50"
+        )).all()
+        years = conn.execute(text("SELECT min(year), max(year) FROM sets")).one()
+        set_names = conn.scalars(text("SELECT name FROM sets ORDER BY set_num LIMIT 500")).all()
+        fig_names = conn.scalars(text("SELECT name FROM minifigs ORDER BY fig_num LIMIT 500")).all()
+        total_sets = conn.scalar(text("SELECT count(*) FROM sets"))
+        total_figs = conn.scalar(text("SELECT count(*) FROM minifigs"))
+    engine.dispose()
+
+    set_terms = _search_terms(set_names)
+    fig_terms = _search_terms(fig_names)
+    last_set_page = max(total_sets // PAGE_SIZE, 1)
+    last_fig_page = max(total_figs // PAGE_SIZE, 1)
+
+    def year_range() -> str:
+        lo = rng.randint(years[0], years[1])
+        return f"year_min={lo}&year_max={min(lo + rng.randint(0, 5), years[1])}"
+
+    return {
+        "sets_list": [f"/api/sets?page={p}" for p in range(1, 6)],
+        "sets_filtered": [f"/api/sets?theme_id={t}&{year_range()}" for t in themes for _ in range(2)],
+        "sets_search": [f"/api/sets?search={term}" for term in set_terms],
+        "sets_deep_page": [
+            f"/api/sets?page={p}&page_size={PAGE_SIZE}" for p in range(max(last_set_page - 50, 1), last_set_page + 1)
+        ],
+        "set_detail_large": [f"/api/sets/{s}" for s in large],
+        "set_detail_small": [f"/api/sets/{s}" for s in small],
+        "stats": ["/api/stats"],
+        "themes": ["/api/themes"],
+        "minifigs_list": [f"/api/minifigs?page={p}" for p in (1, 2, 3, last_fig_page // 2, last_fig_page)],
+        "minifigs_search": [f"/api/minifigs?search={term}" for term in fig_terms],
+    }
+
+
+def _search_terms(names: list[str]) -> list[str]:
+    words = {w.lower() for name in names for w in name.split() if len(w) >= 4 and w.isalpha()}
+    return sorted(words)[:50] or ["a"]
+
+
+# ---------------------------------------------------------------------------
+# Load driver
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, urls: list[str], concurrency: int, duration: float, warmup: float, seed: int
+) -> dict:
+    latencies: list[float] = []
+    server: dict[str, float] = {}
+    errors = 0
+    measuring = False
+
+    async def worker(worker_id: int, deadline: float) -> None:
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            url = rng.choice(urls)
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+                response = None
+            elapsed = time.perf_counter() - start
+            if not measuring:
+                continue
+            if not ok:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            for name, dur in _TIMING_RE.findall(response.headers.get("server-timing", "")):
+                server[name] = server.get(name, 0.0) + float(dur)
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+
+    measuring = True
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    count = len(ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(ms) / count, 2) if count else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p90": round(percentile(ms, 90), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+        # Gemiddelde Server-Timing per request (sql/orm/serialize/total)
+        "server_ms": {name: round(total / count, 2) for name, total in server.items()} if count else {},
+    }
+
+
+async def run_all(base_url: str, scenarios: dict[str, list[str]], args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for name, urls in scenarios.items():
+            results[name] = await run_scenario(
+                client, urls, args.concurrency, args.duration, args.warmup, args.seed
+            )
+            result = results[name]
+            print(
+                f"  {name:<18} {result['throughput_rps']:>8.1f} req/s  "
+                f"p50 {result['latency_ms']['p50']:>8.1f}ms  p99 {result['latency_ms']['p99']:>8.1f}ms  "
+                f"errors {result['errors']}",
+                file=sys.stderr,
+            )
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": database_url}
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn stopte met exit code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn kwam niet binnen 60s op")
+
+
+# ---------------------------------------------------------------------------
+# Rapport
+# ---------------------------------------------------------------------------
+
+def _git_revision() -> str | None:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return revision + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print per scenario het verschil met een eerder rapport."""
+    print(f"\nVergelijking met {baseline['meta'].get('revision')}:", file=sys.stderr)
+    for name, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            continue
+        changes = []
+        for label, new_value, old_value in (
+            ("rps", result["throughput_rps"], old["throughput_rps"]),
+            ("p50", result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            ("p99", result["latency_ms"]["p99"], old["latency_ms"]["p99"]),
+        ):
+            delta = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            changes.append(f"{label} {delta:+6.1f}%")
+        print(f"  {name:<18} " + "  ".join(changes), file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark")
+    parser.add_argument("--base-url", help="Bestaande server gebruiken in plaats van uvicorn te starten")
+    parser.add_argument("--database-url", default=bench_database_url())
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Meetduur per scenario in seconden")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Opwarmtijd per scenario in seconden")
+    parser.add_argument("--workers", type=int, default=1, help="Aantal uvicorn workers (zonder --base-url)")
+    parser.add_argument("--scenario", action="append", help="Alleen deze scenario's draaien (herhaalbaar)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON-rapport naar dit bestand in plaats van stdout")
+    parser.add_argument("--compare", help="Eerder JSON-rapport om mee te vergelijken")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.database_url, args.seed)
+    if args.scenario:
+        unknown = set(args.scenario) - set(scenarios)
+        if unknown:
+            parser.error(f"onbekende scenario's: {', '.join(sorted(unknown))}")
+        scenarios = {name: urls for name, urls in scenarios.items() if name in args.scenario}
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(args.database_url, args.workers)
+    try:
+        print(f"Benchmark tegen {base_url} (concurrency {args.concurrency}, {args.duration}s per scenario)",
+              file=sys.stderr)
+        results = asyncio.run(run_all(base_url, scenarios, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers if args.base_url is None else None,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
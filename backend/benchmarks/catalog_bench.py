@@ -0,0 +1,185 @@
+"""
+Benchmark van de in-process catalogus (app/services/catalog.py, CATALOG_STORE=true).
+
+Gebruik:
+    uv run python benchmarks/catalog_bench.py
+    uv run python benchmarks/catalog_bench.py --repeat 200 --output catalog.json
+
+Meet:
+
+- de omvang van de store per tabel (CatalogStore.footprint()), en wat tracemalloc ziet
+  blijven staan na het opbouwen in de worker en na het mappen van de snapshot;
+- ter vergelijking hetzelfde voor dezelfde rijen als lijst van dicts (één dict per rij,
+  zoals een naïeve cache ze zou bewaren);
+- de tijd om de store uit de database op te bouwen, de snapshot te schrijven en die te
+  mappen (wat een nieuwe worker doet);
+- per lijst-request de latency in-process, met de (gemapte) store en via de database
+  (zonder compressie en zonder de response-cache).
+
+Draait tegen BENCH_DATABASE_URL (zie generate_dataset.py).
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import bench_database_url
+from benchmarks.api_bench import _git_revision, percentile
+
+QUERIES = {
+    "sets_list": "/api/sets?page=3",
+    "sets_filtered": "/api/sets?theme_id={theme_id}&year_min=1990&year_max=2015",
+    "sets_search": "/api/sets?search=castle",
+    "sets_deep_page": "/api/sets?page={last_page}",
+    "themes": "/api/themes",
+    "minifigs_list": "/api/minifigs?page=200",
+    "minifigs_search": "/api/minifigs?search=pilot",
+    "colors": "/api/colors",
+    "part_sets": "/api/parts/{part_num}/sets",
+}
+
+
+def _retained(fn) -> tuple[object, int]:
+    """(resultaat, bytes die na afloop nog gealloceerd zijn)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current
+
+
+def _summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean": round(statistics.fmean(samples), 3),
+        "p50": round(percentile(samples, 50), 3),
+        "p99": round(percentile(samples, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark van de in-process catalogus")
+    parser.add_argument("--database-url", default=bench_database_url())
+    parser.add_argument("--repeat", type=int, default=100, help="Requests per query en variant")
+    parser.add_argument("--output", help="JSON-rapport naar dit bestand in plaats van stdout")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+
+    import numpy as np
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.main import app
+    from app.models.lego import Color, Minifig, Set, Theme
+    from app.services.catalog import encode_catalog, open_snapshot, read_catalog, write_snapshot
+
+    snapshot = Path(tempfile.mkdtemp()) / "catalog.bin"
+    settings.catalog_snapshot = str(snapshot)
+    db = SessionLocal()
+    started = time.perf_counter()
+    read_catalog(encode_catalog(db))
+    build_s = time.perf_counter() - started
+    started = time.perf_counter()
+    write_snapshot(db, snapshot)
+    write_s = time.perf_counter() - started
+    started = time.perf_counter()
+    open_snapshot(snapshot)
+    open_ms = (time.perf_counter() - started) * 1000
+    # Nog eens onder tracemalloc (dat vertraagt het opbouwen flink)
+    _, retained = _retained(lambda: read_catalog(encode_catalog(db)))
+    store, mapped_retained = _retained(lambda: open_snapshot(snapshot))
+    footprint = store.footprint()
+
+    def as_dicts():
+        return [
+            [row._asdict() for row in db.execute(select(*columns))]
+            for columns in (
+                (Set.set_num, Set.name, Set.year, Set.theme_id, Set.num_parts, Set.img_url),
+                (Theme.id, Theme.name, Theme.parent_id),
+                (Minifig.fig_num, Minifig.name, Minifig.num_parts, Minifig.img_url),
+                (Color.id, Color.name, Color.rgb, Color.is_trans),
+            )
+        ]
+
+    _, dicts_retained = _retained(as_dicts)
+    groups = store.set_themes
+    theme_id = int(groups.keys[np.argmax(np.diff(groups.starts))])
+    # Het onderdeel in de meeste sets
+    part_num = store.part_sets.keys.take(np.array([np.argmax(np.diff(store.part_sets.starts))]))[0]
+    last_page = (db.scalar(select(func.count()).select_from(Set)) + 23) // 24
+    db.close()
+    del store
+
+    client = TestClient(app)
+    latency: dict[str, dict] = {}
+    for name, template in QUERIES.items():
+        url = template.format(theme_id=theme_id, last_page=last_page, part_num=part_num)
+        latency[name] = {}
+        for variant, enabled in (("database", False), ("store", True)):
+            settings.catalog_store = enabled
+            samples = []
+            for i in range(args.repeat + 1):
+                # Eigen querystring per request: de response-cache mag niet meetellen
+                separator = "&" if "?" in url else "?"
+                start = time.perf_counter()
+                response = client.get(f"{url}{separator}_={variant}{i}", headers={"Accept-Encoding": "identity"})
+                elapsed = (time.perf_counter() - start) * 1000
+                response.raise_for_status()
+                if i:  # de eerste request laadt de store
+                    samples.append(elapsed)
+            latency[name][variant] = _summary(samples)
+    snapshot.unlink()
+
+    report = {
+        "meta": {"revision": _git_revision(), "repeat": args.repeat},
+        "memory": {
+            "footprint_bytes": footprint,
+            "footprint_total_bytes": sum(footprint.values()),
+            "tracemalloc_bytes": retained,
+            "tracemalloc_mapped_bytes": mapped_retained,
+            "list_of_dicts_bytes": dicts_retained,
+        },
+        "build_s": round(build_s, 3),
+        "write_snapshot_s": round(write_s, 3),
+        "open_snapshot_ms": round(open_ms, 3),
+        "latency_ms": latency,
+    }
+
+    print(
+        f"  store {sum(footprint.values()) / 2**20:.1f} MiB (tracemalloc {retained / 2**20:.1f} MiB opgebouwd, "
+        f"{mapped_retained / 2**20:.2f} MiB gemapt), dicts {dicts_retained / 2**20:.1f} MiB\n"
+        f"  opbouwen {build_s:.2f}s, snapshot schrijven {write_s:.2f}s, mappen {open_ms:.2f}ms",
+        file=sys.stderr,
+    )
+    for name, variants in latency.items():
+        print(
+            f"  {name:<16} database p50 {variants['database']['p50']:7.2f}ms   "
+            f"store p50 {variants['store']['p50']:7.2f}ms",
+            file=sys.stderr,
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
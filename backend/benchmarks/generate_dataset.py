@@ -0,0 +1,143 @@
+"""
+Laad een synthetische dataset (Rebrickable-vorm en -omvang + Brickset) in een aparte benchmark-database.
+
+Gebruik:
+    uv run python benchmarks/generate_dataset.py
+    uv run python benchmarks/generate_dataset.py --scale 0.1 --seed 7
+
+De database uit BENCH_DATABASE_URL wordt aangemaakt als hij nog niet bestaat; bestaande
+tabellen worden geleegd. Laden gaat via COPY, ~1,5M inventory_parts duurt zo'n minuut.
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+
+from app.core.database import Base
+from app.core.dataset import bump_version
+from app.services.value_metrics import refresh_value_metrics
+import app.models  # noqa: F401
+from benchmarks import bench_database_url
+from benchmarks.synthetic import SyntheticDataset
+
+CHUNK_SIZE = 50_000
+
+
+def ensure_database(url: str) -> None:
+    target = make_url(url)
+    admin = create_engine(target.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        exists = conn.scalar(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": target.database})
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{target.database}"'))
+            print(f"Database {target.database} aangemaakt")
+    admin.dispose()
+
+
+def _pg_value(value):
+    if value is None:
+        return None  # csv.writer schrijft een leeg veld = NULL
+    if isinstance(value, list):
+        return "{" + ",".join('"' + str(v).replace('"', '\\"') + '"' for v in value) + "}"
+    return value
+
+
+def copy_rows(conn, table: str, rows: Iterable[dict]) -> int:
+    """COPY rijen in blokken van CHUNK_SIZE naar `table`; geeft het aantal rijen terug."""
+    cursor = conn.connection.cursor()
+    columns = None
+    total = 0
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def flush():
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH CSV", buf)
+        buf.seek(0)
+        buf.truncate()
+
+    try:
+        for row in rows:
+            if columns is None:
+                columns = list(row)
+            writer.writerow([_pg_value(row[c]) for c in columns])
+            total += 1
+            if total % CHUNK_SIZE == 0:
+                flush()
+        if columns is not None and buf.tell():
+            flush()
+    finally:
+        cursor.close()
+    return total
+
+
+def _brickset_sync_rows(dataset: SyntheticDataset) -> Iterable[dict]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for row in dataset.brickset():
+        yield {"set_num": row["set_num"], "content_hash": None, "last_synced": now}
+
+
+def prepare_database(url: str) -> Engine:
+    """Maak de benchmark-database en tabellen aan en leeg alle datatabellen."""
+    ensure_database(url)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    tables = [t.name for t in Base.metadata.sorted_tables if t.name != "dataset_versions"]
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE TABLE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+    return engine
+
+
+def load(url: str, dataset: SyntheticDataset) -> dict[str, int]:
+    engine = prepare_database(url)
+
+    tables = dataset.tables()
+    tables["brickset_data"] = dataset.brickset()
+    tables["brickset_sync"] = _brickset_sync_rows(dataset)
+
+    counts: dict[str, int] = {}
+    with engine.connect() as conn:
+        for table, rows in tables.items():
+            start = time.perf_counter()
+            counts[table] = copy_rows(conn, table, rows)
+            conn.commit()
+            elapsed = time.perf_counter() - start
+            print(f"  {table:<20} {counts[table]:>10,} rijen  {elapsed:6.1f}s")
+
+        refresh_value_metrics(conn)
+        version = bump_version(conn, "benchmark")
+
+    # ANALYZE mag niet in een transactie
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+    print(f"Dataset version {version}")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetische benchmark-dataset laden")
+    parser.add_argument("--scale", type=float, default=1.0, help="Factor op de Rebrickable-omvang (default 1.0)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=bench_database_url())
+    args = parser.parse_args()
+
+    print(f"=== Synthetische dataset (scale {args.scale}, seed {args.seed}) ===")
+    print(f"Doel: {make_url(args.database_url).render_as_string(hide_password=True)}\n")
+    start = time.perf_counter()
+    load(args.database_url, SyntheticDataset(scale=args.scale, seed=args.seed))
+    print(f"\n=== Klaar in {time.perf_counter() - start:.1f}s ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Benchmark van de data-pipeline: elke import_* functie uit import_csv.py en de Brickset sync.
+
+Gebruik:
+    uv run python benchmarks/pipeline_bench.py                      # vergelijk met de baseline
+    uv run python benchmarks/pipeline_bench.py --update-baseline    # baseline (opnieuw) vastleggen
+    uv run python benchmarks/pipeline_bench.py --scale 0.1 --api-latency-ms 200
+
+Per stap worden rows/sec, piek-RSS en DB-tijd gemeten; elke stap draait in een eigen
+proces zodat de piek-RSS per tabel klopt. De sync draait twee keer tegen een lokale
+stub van de Brickset API (eerst alles nieuw, daarna alles ongewijzigd). Het script
+eindigt met exit code 1 als een stap meer dan --threshold achteruitgaat t.o.v. de baseline.
+"""
+
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import bench_database_url
+from benchmarks.synthetic import SyntheticDataset
+
+DEFAULT_BASELINE = Path(__file__).parent / "pipeline_baseline.json"
+IMPORT_ORDER = [
+    "colors", "themes", "part_categories", "parts", "part_relationships", "elements", "sets",
+    "minifigs", "inventories", "inventory_parts", "inventory_minifigs", "inventory_sets",
+]
+BRICKSET_PAGE_SIZE = 500
+# Kortere stappen zijn te ruizig om op throughput te vergelijken (piek-RSS wel)
+MIN_COMPARE_SECONDS = 0.5
+
+
+# ---------------------------------------------------------------------------
+# Invoer
+# ---------------------------------------------------------------------------
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    return str(value)
+
+
+def write_csvs(dataset: SyntheticDataset, data_dir: Path) -> dict[str, int]:
+    """Schrijf gzip CSV's in het Rebrickable-formaat; geeft het aantal rijen per tabel terug."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for table, rows in dataset.tables().items():
+        count = 0
+        with gzip.open(data_dir / f"{table}.csv.gz", "wt", encoding="utf-8", newline="") as f:
+            writer = None
+            for row in rows:
+                if writer is None:
+                    writer = csv.writer(f)
+                    writer.writerow(row)
+                writer.writerow([_csv_value(v) for v in row.values()])
+                count += 1
+        counts[table] = count
+    return counts
+
+
+class BricksetStub:
+    """Lokale getSets-stub met vaste extra latency per call."""
+
+    def __init__(self, dataset: SyntheticDataset, latency: float):
+        self.by_year: dict[int, list[dict]] = {}
+        for bs in dataset.brickset_api_sets():
+            self.by_year.setdefault(bs["year"], []).append(bs)
+        self.all_sets = [bs for sets in self.by_year.values() for bs in sets]
+        self.latency = latency
+        self.calls = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    def _respond(self, path: str) -> dict:
+        parsed = urllib.parse.urlparse(path)
+        if parsed.path.endswith("/checkKey"):
+            return {"status": "success"}
+        params = json.loads(urllib.parse.parse_qs(parsed.query).get("params", ["{}"])[0])
+        sets = self.by_year.get(params["year"], []) if "year" in params else self.all_sets
+        page = int(params.get("pageNumber", 1))
+        size = int(params.get("pageSize", BRICKSET_PAGE_SIZE))
+        return {"status": "success", "matches": len(sets), "sets": sets[(page - 1) * size : page * size]}
+
+    def start(self) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls += 1
+                time.sleep(stub.latency)
+                body = json.dumps(stub._respond(self.path)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Stappen (draaien elk in een eigen proces)
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux rapporteert KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(fn) -> dict:
+    from app.core.database import get_engine
+    from app.core.instrumentation import collect_metrics, install_sql_hooks
+
+    engine = get_engine()
+    install_sql_hooks(engine)
+    with contextlib.redirect_stdout(io.StringIO()), collect_metrics() as metrics:
+        start = time.perf_counter()
+        fn(engine)
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 3),
+        "db_seconds": round(metrics.sql_time, 3),
+        "queries": metrics.sql_count,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_import_step(table: str, data_dir: str) -> dict:
+    sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+    import import_csv
+
+    import_csv.DATA_DIR = Path(data_dir)
+    importer = getattr(import_csv, f"import_{table}")
+
+    def run(engine):
+        with engine.connect() as conn:
+            importer(conn)
+
+    return _measure(run)
+
+
+def run_sync_step(api_base: str) -> dict:
+    sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+    import sync_brickset
+
+    sync_brickset.API_BASE = api_base
+    sync_brickset.RATE_LIMIT_DELAY = 0  # de stub injecteert zelf latency
+    return _measure(lambda engine: sync_brickset.sync_all())
+
+
+def _in_subprocess(fn, *args) -> dict:
+    # Vers proces per stap: ru_maxrss is de piek van het hele proces
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Stappen die trager (rows/sec) of zwaarder (piek-RSS) zijn dan de baseline + threshold."""
+    regressions = []
+    for name, result in results["steps"].items():
+        old = baseline["steps"].get(name)
+        if not old:
+            continue
+        slow = old["rows_per_sec"] and result["rows_per_sec"] < old["rows_per_sec"] * (1 - threshold)
+        if slow and old["seconds"] >= MIN_COMPARE_SECONDS:
+            regressions.append(
+                f"{name}: {result['rows_per_sec']:,.0f} rows/s (baseline {old['rows_per_sec']:,.0f})"
+            )
+        if old["peak_rss_mb"] and result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{name}: piek-RSS {result['peak_rss_mb']} MB (baseline {old['peak_rss_mb']} MB)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import- en sync-benchmark met regressiedrempels")
+    parser.add_argument("--scale", type=float, default=0.25, help="Factor op de Rebrickable-omvang (default 0.25)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Default: BENCH_DATABASE_URL")
+    parser.add_argument("--data-dir", help="Map voor de gegenereerde CSV's (default: tijdelijke map)")
+    parser.add_argument("--api-latency-ms", type=float, default=50.0, help="Extra latency per Brickset API-call")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--threshold", type=float, default=0.2, help="Toegestane achteruitgang (default 0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Resultaten als nieuwe baseline opslaan")
+    parser.add_argument("--skip-sync", action="store_true")
+    args = parser.parse_args()
+
+    from benchmarks.api_bench import _git_revision
+    from benchmarks.generate_dataset import prepare_database
+
+    database_url = args.database_url or bench_database_url()
+    # Stap-processen importeren app.core.database en lezen DATABASE_URL uit de omgeving
+    os.environ["DATABASE_URL"] = database_url
+    prepare_database(database_url).dispose()
+
+    dataset = SyntheticDataset(scale=args.scale, seed=args.seed)
+    with contextlib.ExitStack() as stack:
+        data_dir = Path(args.data_dir or stack.enter_context(tempfile.TemporaryDirectory()))
+        print(f"CSV's genereren (scale {args.scale}) in {data_dir}...", file=sys.stderr)
+        counts = write_csvs(dataset, data_dir)
+
+        steps = {}
+        for table in IMPORT_ORDER:
+            result = _in_subprocess(run_import_step, table, str(data_dir))
+            steps[f"import_{table}"] = {"rows": counts[table], **result}
+
+    if not args.skip_sync:
+        stub = BricksetStub(dataset, args.api_latency_ms / 1000)
+        api_base = stub.start()
+        try:
+            for name in ("sync_initial", "sync_unchanged"):
+                calls_before = stub.calls
+                result = _in_subprocess(run_sync_step, api_base)
+                steps[name] = {"rows": len(stub.all_sets), "api_calls": stub.calls - calls_before, **result}
+        finally:
+            stub.stop()
+
+    for name, step in steps.items():
+        step["rows_per_sec"] = round(step["rows"] / step["seconds"], 1) if step["seconds"] else 0.0
+        print(
+            f"  {name:<26} {step['rows']:>9,} rijen  {step['seconds']:7.2f}s  "
+            f"{step['rows_per_sec']:>10,.0f} rows/s  db {step['db_seconds']:6.2f}s  rss {step['peak_rss_mb']:6.1f} MB",
+            file=sys.stderr,
+        )
+
+    results = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "seed": args.seed,
+            "api_latency_ms": args.api_latency_ms,
+        },
+        "steps": steps,
+    }
+    print(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline opgeslagen in {baseline_path}", file=sys.stderr)
+        return
+
+    baseline = json.loads(baseline_path.read_text())
+    for key in ("scale", "seed", "api_latency_ms"):
+        if baseline["meta"].get(key) != results["meta"][key]:
+            print(f"\nBaseline is gemaakt met {key}={baseline['meta'].get(key)}; draai met dezelfde "
+                  f"instellingen of gebruik --update-baseline", file=sys.stderr)
+            sys.exit(2)
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressies t.o.v. baseline {baseline['meta'].get('revision')} "
+              f"(drempel {args.threshold:.0%}):", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\nGeen regressies t.o.v. baseline {baseline['meta'].get('revision')}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
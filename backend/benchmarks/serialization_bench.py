@@ -0,0 +1,127 @@
+"""
+Serialisatie-benchmark voor de grootste set-details.
+
+Gebruik:
+    uv run python benchmarks/serialization_bench.py
+    uv run python benchmarks/serialization_bench.py --sets 50 --repeat 20 --output serialization.json
+
+Vergelijkt per set drie manieren om dezelfde payload naar JSON te brengen:
+
+- `pydantic_dump_json`: SetFullDetail valideren + model_dump_json (FastAPI met response_model)
+- `jsonable_encoder`: valideren + jsonable_encoder + json.dumps (FastAPI met een eigen response class)
+- `orjson`: de dict direct via FastJSONResponse (zoals de API nu doet)
+
+en meet daarnaast GET /api/sets/{set_num} end-to-end in-process, met de Server-Timing
+opsplitsing. Draait tegen BENCH_DATABASE_URL (zie generate_dataset.py).
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import bench_database_url
+from benchmarks.api_bench import _git_revision, percentile
+
+_TIMING_RE = re.compile(r"(\w+);dur=([\d.]+)")
+
+
+def _timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean": round(statistics.fmean(samples), 3),
+        "p50": round(percentile(samples, 50), 3),
+        "p99": round(percentile(samples, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialisatie-benchmark voor grote set-details")
+    parser.add_argument("--database-url", default=bench_database_url())
+    parser.add_argument("--sets", type=int, default=20, help="Aantal grootste sets (default 20)")
+    parser.add_argument("--repeat", type=int, default=10, help="Herhalingen per set en strategie")
+    parser.add_argument("--output", help="JSON-rapport naar dit bestand in plaats van stdout")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal
+    from app.core.responses import dumps
+    from app.main import app
+    from app.models.lego import Set
+    from app.schemas.lego import SetFullDetail
+    from app.services.set_details import set_detail_payload
+
+    db = SessionLocal()
+    set_nums = db.scalars(select(Set.set_num).order_by(Set.num_parts.desc()).limit(args.sets)).all()
+    payloads = {set_num: set_detail_payload(db, set_num) for set_num in set_nums}
+    db.close()
+
+    strategies = {
+        "pydantic_dump_json": lambda p: SetFullDetail.model_validate(p).model_dump_json(),
+        "jsonable_encoder": lambda p: json.dumps(jsonable_encoder(SetFullDetail.model_validate(p))),
+        "orjson": dumps,
+    }
+    encode: dict[str, list[float]] = {name: [] for name in strategies}
+    for payload in payloads.values():
+        for name, fn in strategies.items():
+            encode[name] += _timed(lambda: fn(payload), args.repeat)
+
+    client = TestClient(app)
+    end_to_end: list[float] = []
+    server: dict[str, list[float]] = {}
+    for set_num in set_nums:
+        client.get(f"/api/sets/{set_num}")  # opwarmen
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(f"/api/sets/{set_num}")
+            end_to_end.append((time.perf_counter() - start) * 1000)
+            for name, dur in _TIMING_RE.findall(response.headers.get("server-timing", "")):
+                server.setdefault(name, []).append(float(dur))
+
+    sizes = [len(dumps(p)) for p in payloads.values()]
+    parts = [len(p["parts"]) for p in payloads.values()]
+    report = {
+        "meta": {"revision": _git_revision(), "sets": len(set_nums), "repeat": args.repeat},
+        "payload": {
+            "parts_max": max(parts, default=0),
+            "parts_mean": round(statistics.fmean(parts), 1) if parts else 0,
+            "bytes_mean": round(statistics.fmean(sizes)) if sizes else 0,
+        },
+        "encode_ms": {name: _summary(samples) for name, samples in encode.items()},
+        "end_to_end_ms": _summary(end_to_end),
+        "server_ms": {name: round(statistics.fmean(samples), 3) for name, samples in server.items()},
+    }
+
+    for name, result in report["encode_ms"].items():
+        print(f"  {name:<20} p50 {result['p50']:8.2f}ms  mean {result['mean']:8.2f}ms", file=sys.stderr)
+    print(f"  {'end_to_end':<20} p50 {report['end_to_end_ms']['p50']:8.2f}ms", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark van de opstarttijd van de API en de scripts.
+
+Gebruik:
+    uv run python benchmarks/startup_bench.py
+    uv run python benchmarks/startup_bench.py --repeat 10 --output startup.json
+
+Meet, steeds in een nieuw proces:
+
+- de importtijd van app.main en van de scripts (`--help`, dus zonder database), naast een
+  kale interpreter als ondergrens;
+- voor één uvicorn-worker, zonder en met WARMUP: de tijd tot de worker verbindingen aanneemt
+  en tot /health 200 geeft;
+- daarna per endpoint de latency van de eerste en de tweede request (koud en warm).
+
+Draait tegen BENCH_DATABASE_URL (zie generate_dataset.py). CATALOG_STORE en andere
+instellingen komen uit de omgeving.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import bench_database_url
+from benchmarks.api_bench import _git_revision
+
+BACKEND = Path(__file__).parent.parent
+
+IMPORTS = {
+    "python": [sys.executable, "-c", "pass"],
+    "app.main": [sys.executable, "-c", "import app.main"],
+    "import_csv --help": [sys.executable, "scripts/import_csv.py", "--help"],
+    "sync_brickset --help": [sys.executable, "scripts/sync_brickset.py", "--help"],
+    "job_worker --help": [sys.executable, "scripts/job_worker.py", "--help"],
+}
+
+# Eerste request na het starten, per endpoint; {set_num} wordt de eerste set uit /api/sets
+FIRST_REQUESTS = (
+    "/api/sets",
+    "/api/sets/search?search=star",
+    "/api/sets/{set_num}",
+    "/api/sets/{set_num}/breakdown",
+    "/api/themes",
+    "/api/colors/usage",
+    "/api/stats",
+    "/openapi.json",
+)
+
+
+def _wall(command: list[str], env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=BACKEND, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str) -> tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def _worker(env: dict, timeout: float) -> dict:
+    """Eén uvicorn-worker starten en meten tot hij gezond is, plus de eerste requests."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    listening = healthy = None
+    try:
+        while healthy is None:
+            if time.perf_counter() - start > timeout or process.poll() is not None:
+                raise RuntimeError("Worker niet gezond binnen de timeout (of gestopt)")
+            try:
+                status, _ = _get(f"{base}/health")
+            except OSError:
+                time.sleep(0.01)
+                continue
+            listening = listening or time.perf_counter() - start
+            if status == 200:
+                healthy = time.perf_counter() - start
+            else:
+                time.sleep(0.01)
+
+        _, body = _get(f"{base}/api/sets?page_size=1&fields=set_num")
+        set_num = json.loads(body)["results"][0]["set_num"]
+        first: dict[str, dict] = {}
+        for template in FIRST_REQUESTS:
+            path = template.format(set_num=set_num)
+            samples = []
+            for _ in range(2):
+                # Eigen querystring: de response-cache mag de tweede request niet beantwoorden
+                separator = "&" if "?" in path else "?"
+                request_start = time.perf_counter()
+                _get(f"{base}{path}{separator}_={len(samples)}")
+                samples.append(round((time.perf_counter() - request_start) * 1000, 2))
+            first[template] = {"cold_ms": samples[0], "warm_ms": samples[1]}
+    finally:
+        process.terminate()
+        process.wait()
+    return {"listening_s": round(listening, 3), "healthy_s": round(healthy, 3), "requests": first}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark van de opstarttijd")
+    parser.add_argument("--database-url", default=bench_database_url())
+    parser.add_argument("--repeat", type=int, default=5, help="Metingen per import (mediaan)")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconden tot een worker gezond moet zijn")
+    parser.add_argument("--output", help="JSON-rapport naar dit bestand in plaats van stdout")
+    args = parser.parse_args()
+
+    env = {**os.environ, "DATABASE_URL": args.database_url}
+
+    imports = {}
+    for name, command in IMPORTS.items():
+        samples = [_wall(command, env) for _ in range(args.repeat)]
+        imports[name] = round(statistics.median(samples), 1)
+        print(f"  {name:<22} {imports[name]:7.0f} ms", file=sys.stderr)
+
+    workers = {}
+    for variant, warmup in (("cold", "false"), ("warmup", "true")):
+        workers[variant] = _worker({**env, "WARMUP": warmup}, args.timeout)
+        print(
+            f"  worker {variant:<7} luistert na {workers[variant]['listening_s']:.2f}s, "
+            f"gezond na {workers[variant]['healthy_s']:.2f}s",
+            file=sys.stderr,
+        )
+    for template in FIRST_REQUESTS:
+        cold, warm = workers["cold"]["requests"][template], workers["warmup"]["requests"][template]
+        print(
+            f"  {template:<32} eerste request {cold['cold_ms']:8.1f}ms, na warm-up {warm['cold_ms']:8.1f}ms",
+            file=sys.stderr,
+        )
+
+    report = {
+        "meta": {"revision": _git_revision(), "repeat": args.repeat},
+        "imports_ms": imports,
+        "workers": workers,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Synthetische dataset met de vorm en omvang van de Rebrickable dumps (plus Brickset data).
+
+Deterministisch per seed, zodat benchmarks tussen commits vergelijkbaar zijn. Alle
+tabellen worden als generators van dicts aangeboden met dezelfde kolomnamen als de
+Rebrickable CSV's (en de database), in FK-volgorde.
+"""
+
+import math
+import random
+from datetime import date, timedelta
+from typing import Iterator
+
+# Aantallen bij scale=1.0 (ongeveer de echte Rebrickable/Brickset omvang)
+BASE_COUNTS = {
+    "colors": 260,
+    "themes": 470,
+    "part_categories": 70,
+    "parts": 61_000,
+    "part_relationships": 30_000,
+    "elements": 100_000,
+    "sets": 25_000,
+    "minifigs": 15_000,
+    "inventory_minifigs": 20_000,
+    "inventory_sets": 3_000,
+}
+
+# Gemiddeld ~55 regels per set-inventaris (lognormaal, lange staart tot ~4000) → ~1,5M inventory_parts
+LOTS_MU = math.log(30)
+LOTS_SIGMA = 1.1
+MAX_LOTS = 4000
+SECOND_VERSION_SHARE = 0.04
+BRICKSET_SHARE = 0.8
+
+WORDS = [
+    "Castle", "Star", "Police", "Fire", "Station", "Truck", "Space", "Ship", "Dragon", "Pirate",
+    "Train", "City", "House", "Robot", "Racer", "Tower", "Temple", "Jungle", "Ocean", "Rescue",
+    "Knight", "Falcon", "Harbor", "Market", "Bridge", "Rocket", "Forest", "Island", "Garage", "Farm",
+]
+TAGS = [
+    "Starfighter", "Vehicle", "Minifig Pack", "Building", "D2C", "Microscale", "Animal", "Boat",
+    "Aircraft", "Modular", "Display", "Exclusive", "Holiday", "Promotional", "Buildable Figure",
+]
+AVAILABILITY = ["Retail", "Retail - limited", "LEGO exclusive", "Promotional", "Not sold"]
+PACKAGING = ["Box", "Polybag", "Blister pack", "Foil pack", "Tub"]
+
+
+class SyntheticDataset:
+    def __init__(self, scale: float = 1.0, seed: int = 42):
+        self.scale = scale
+        self.seed = seed
+        self.counts = {name: max(int(count * scale), 1) for name, count in BASE_COUNTS.items()}
+        self.counts["colors"] = max(self.counts["colors"], 10)
+        self.counts["themes"] = max(self.counts["themes"], 10)
+        self.counts["part_categories"] = max(self.counts["part_categories"], 5)
+
+        rng = self._rng("keys")
+        self.part_nums = [f"{n}" if i % 3 else f"{n}pr{i % 97:04d}" for i, n in enumerate(
+            rng.sample(range(1000, 1000 + self.counts["parts"] * 4), self.counts["parts"])
+        )]
+        self.set_nums = [f"{n}-{1 + (i % 7 == 0)}" for i, n in enumerate(
+            rng.sample(range(100, 100 + self.counts["sets"] * 4), self.counts["sets"])
+        )]
+        self.fig_nums = [f"fig-{i:06d}" for i in range(1, self.counts["minifigs"] + 1)]
+        # Aantal inventarisregels per set; bepaalt ook num_parts
+        self.set_lots = [
+            min(max(int(rng.lognormvariate(LOTS_MU, LOTS_SIGMA)), 1), MAX_LOTS) for _ in self.set_nums
+        ]
+
+    def _rng(self, name: str, key: int = 0) -> random.Random:
+        return random.Random(f"{self.seed}:{name}:{key}")
+
+    def _skewed(self, rng: random.Random, n: int, power: float = 3.0) -> int:
+        # Populaire onderdelen/kleuren komen veel vaker voor
+        return int(n * rng.random() ** power)
+
+    # ------------------------------------------------------------------
+    # Tabellen, in FK-volgorde
+    # ------------------------------------------------------------------
+
+    def colors(self) -> Iterator[dict]:
+        rng = self._rng("colors")
+        for i in range(self.counts["colors"]):
+            yield {
+                "id": i,
+                "name": f"{rng.choice(['Light', 'Dark', 'Bright', 'Trans', 'Pearl'])} {WORDS[i % len(WORDS)]} {i}",
+                "rgb": f"{rng.randrange(16 ** 6):06X}",
+                "is_trans": i % 9 == 0,
+            }
+
+    def themes(self) -> Iterator[dict]:
+        rng = self._rng("themes")
+        roots = max(self.counts["themes"] // 3, 1)
+        for i in range(1, self.counts["themes"] + 1):
+            parent = None if i <= roots else rng.randint(1, i - 1)
+            yield {"id": i, "name": f"{WORDS[i % len(WORDS)]} {i}", "parent_id": parent}
+
+    def part_categories(self) -> Iterator[dict]:
+        for i in range(1, self.counts["part_categories"] + 1):
+            yield {"id": i, "name": f"{WORDS[i % len(WORDS)]} Parts {i}"}
+
+    def parts(self) -> Iterator[dict]:
+        rng = self._rng("parts")
+        for part_num in self.part_nums:
+            yield {
+                "part_num": part_num,
+                "name": f"Brick {rng.randint(1, 16)} x {rng.randint(1, 16)} {rng.choice(WORDS)}",
+                "part_cat_id": rng.randint(1, self.counts["part_categories"]),
+                "part_material": "Plastic" if rng.random() < 0.97 else "Rubber",
+            }
+
+    def part_relationships(self) -> Iterator[dict]:
+        rng = self._rng("part_relationships")
+        for _ in range(self.counts["part_relationships"]):
+            yield {
+                "rel_type": rng.choice("PRBMTA"),
+                "child_part_num": rng.choice(self.part_nums),
+                "parent_part_num": rng.choice(self.part_nums),
+            }
+
+    def elements(self) -> Iterator[dict]:
+        rng = self._rng("elements")
+        for i in range(self.counts["elements"]):
+            yield {
+                "element_id": str(300000 + i * 7),
+                "part_num": self.part_nums[self._skewed(rng, len(self.part_nums))],
+                "color_id": self._skewed(rng, self.counts["colors"], 2.0),
+                "design_id": None,
+            }
+
+    def sets(self) -> Iterator[dict]:
+        rng = self._rng("sets")
+        for set_num, lots in zip(self.set_nums, self.set_lots):
+            yield {
+                "set_num": set_num,
+                "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randint(1, 999)}",
+                "year": min(1949 + int(77 * rng.random() ** 0.5), 2025),
+                "theme_id": rng.randint(1, self.counts["themes"]),
+                "num_parts": lots * 3,
+                "img_url": f"https://cdn.rebrickable.com/media/sets/{set_num}.jpg",
+            }
+
+    def minifigs(self) -> Iterator[dict]:
+        rng = self._rng("minifigs")
+        for fig_num in self.fig_nums:
+            yield {
+                "fig_num": fig_num,
+                "name": f"{rng.choice(WORDS)} {rng.choice(['Knight', 'Pilot', 'Officer', 'Diver'])}",
+                "num_parts": rng.randint(3, 8),
+                "img_url": f"https://cdn.rebrickable.com/media/sets/{fig_num}.jpg",
+            }
+
+    def _inventory_plan(self) -> Iterator[tuple[int, int, str, int]]:
+        """(inventory_id, version, set_num, lots) voor sets, tweede versies en minifigs."""
+        rng = self._rng("inventories")
+        inventory_id = 0
+        for set_num, lots in zip(self.set_nums, self.set_lots):
+            inventory_id += 1
+            yield inventory_id, 1, set_num, lots
+            if rng.random() < SECOND_VERSION_SHARE:
+                inventory_id += 1
+                yield inventory_id, 2, set_num, lots
+        for fig_num in self.fig_nums:
+            inventory_id += 1
+            yield inventory_id, 1, fig_num, 4
+
+    def inventories(self) -> Iterator[dict]:
+        for inventory_id, version, set_num, _ in self._inventory_plan():
+            yield {"id": inventory_id, "version": version, "set_num": set_num}
+
+    def inventory_parts(self) -> Iterator[dict]:
+        n_parts = len(self.part_nums)
+        n_colors = self.counts["colors"]
+        for inventory_id, _, _, lots in self._inventory_plan():
+            rng = self._rng("inventory_parts", inventory_id)
+            for _ in range(lots):
+                yield {
+                    "inventory_id": inventory_id,
+                    "part_num": self.part_nums[self._skewed(rng, n_parts)],
+                    "color_id": self._skewed(rng, n_colors, 2.0),
+                    "quantity": 1 + self._skewed(rng, 12),
+                    "is_spare": rng.random() < 0.08,
+                    "img_url": None,
+                }
+
+    def inventory_minifigs(self) -> Iterator[dict]:
+        rng = self._rng("inventory_minifigs")
+        n_set_inventories = len(self.set_nums)
+        for _ in range(self.counts["inventory_minifigs"]):
+            yield {
+                "inventory_id": rng.randint(1, n_set_inventories),
+                "fig_num": rng.choice(self.fig_nums),
+                "quantity": rng.randint(1, 3),
+            }
+
+    def inventory_sets(self) -> Iterator[dict]:
+        rng = self._rng("inventory_sets")
+        n_set_inventories = len(self.set_nums)
+        for _ in range(self.counts["inventory_sets"]):
+            yield {
+                "inventory_id": rng.randint(1, n_set_inventories),
+                "set_num": rng.choice(self.set_nums),
+                "quantity": 1,
+            }
+
+    def brickset(self) -> Iterator[dict]:
+        """Rijen voor brickset_data, voor ~80% van de sets."""
+        rng = self._rng("brickset")
+        for i, (set_num, lots) in enumerate(zip(self.set_nums, self.set_lots)):
+            if rng.random() > BRICKSET_SHARE:
+                continue
+            pieces = lots * 3
+            price = round(pieces * rng.uniform(0.06, 0.16) + 2, 2)
+            launch = date(2000, 1, 1) + timedelta(days=rng.randint(0, 9000))
+            yield {
+                "set_num": set_num,
+                "brickset_id": 10_000 + i,
+                "price_us": price,
+                "price_uk": round(price * 0.85, 2),
+                "price_ca": round(price * 1.3, 2),
+                "price_de": round(price * 1.05, 2),
+                "launch_date": launch,
+                "exit_date": launch + timedelta(days=rng.randint(180, 1500)),
+                "availability": rng.choice(AVAILABILITY),
+                "packaging_type": rng.choice(PACKAGING),
+                "age_min": rng.randint(4, 18),
+                "age_max": 99,
+                "height_mm": rng.uniform(50, 600),
+                "width_mm": rng.uniform(50, 600),
+                "depth_mm": rng.uniform(20, 150),
+                "weight_g": round(pieces * rng.uniform(0.8, 1.6) + 40, 1),
+                "barcode_ean": f"57020{i:08d}",
+                "barcode_upc": f"6734{i:08d}",
+                "item_number": set_num.split("-")[0],
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "review_count": rng.randint(0, 40),
+                "owned_by": rng.randint(0, 20_000),
+                "wanted_by": rng.randint(0, 5_000),
+                "description": f"<p>{' '.join(rng.choices(WORDS, k=40))}</p>",
+                "tags": rng.sample(TAGS, rng.randint(1, 5)),
+            }
+
+    def brickset_api_sets(self) -> Iterator[dict]:
+        """Dezelfde Brickset data in het formaat van de getSets API (voor een stub-server)."""
+        sets = {row["set_num"]: row for row in self.sets()}
+        for row in self.brickset():
+            number, variant = row["set_num"].rsplit("-", 1)
+
+            def region(price):
+                return {
+                    "retailPrice": price,
+                    "dateFirstAvailable": f"{row['launch_date']}T00:00:00Z",
+                    "dateLastAvailable": f"{row['exit_date']}T00:00:00Z",
+                }
+
+            yield {
+                "setID": row["brickset_id"],
+                "number": number,
+                "numberVariant": int(variant),
+                "name": sets[row["set_num"]]["name"],
+                "year": sets[row["set_num"]]["year"],
+                "launchDate": f"{row['launch_date']}T00:00:00Z",
+                "LEGOCom": {
+                    "US": region(row["price_us"]),
+                    "UK": region(row["price_uk"]),
+                    "CA": region(row["price_ca"]),
+                    "DE": region(row["price_de"]),
+                },
+                "availability": row["availability"],
+                "packagingType": row["packaging_type"],
+                "ageRange": {"min": row["age_min"], "max": row["age_max"]},
+                "dimensions": {
+                    "height": row["height_mm"],
+                    "width": row["width_mm"],
+                    "depth": row["depth_mm"],
+                    "weight": row["weight_g"],
+                },
+                "barcode": {"EAN": row["barcode_ean"], "UPC": row["barcode_upc"]},
+                "itemNumbers": row["item_number"],
+                "rating": row["rating"],
+                "reviewCount": row["review_count"],
+                "collections": {"ownedBy": row["owned_by"], "wantedBy": row["wanted_by"]},
+                "extendedData": {"description": row["description"], "tags": row["tags"]},
+            }
+
+    def tables(self) -> dict[str, Iterator[dict]]:
+        """Alle Rebrickable tabellen in FK-volgorde."""
+        return {
+            "colors": self.colors(),
+            "themes": self.themes(),
+            "part_categories": self.part_categories(),
+            "parts": self.parts(),
+            "part_relationships": self.part_relationships(),
+            "elements": self.elements(),
+            "sets": self.sets(),
+            "minifigs": self.minifigs(),
+            "inventories": self.inventories(),
+            "inventory_parts": self.inventory_parts(),
+            "inventory_minifigs": self.inventory_minifigs(),
+            "inventory_sets": self.inventory_sets(),
+        }
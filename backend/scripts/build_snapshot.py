@@ -0,0 +1,260 @@
+"""
+Statische snapshot van de catalogus: voorgerenderde, voorgecomprimeerde JSON-bestanden.
+
+Gebruik:
+    # Na import_csv.py / sync_brickset.py
+    uv run python scripts/build_snapshot.py
+
+    # Andere map, meer processen, alles opnieuw
+    uv run python scripts/build_snapshot.py --output /srv/brickviewer/snapshot --workers 8 --full
+
+Schrijft per set `sets/{set_num}.{hash}.json` (de response van GET /api/sets/{set_num}),
+de lijstpagina's van GET /api/sets, thema's en statistieken, elk met een `.gz` en `.br`
+variant ernaast. De hash in de bestandsnaam is die van de inhoud, dus de bestanden zijn
+onbeperkt cachebaar; `manifest.json` koppelt API-paden aan bestandsnamen.
+
+Incrementeel: per set wordt in SQL een fingerprint berekend over alle rijen die in de
+detail-response terechtkomen. Alleen sets waarvan die fingerprint afwijkt van het vorige
+manifest worden opnieuw gerenderd.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import brotli
+from sqlalchemy import select, text
+
+from app.api.routes.stats import get_stats
+from app.api.routes.themes import list_themes
+from app.core.database import SessionLocal, get_engine
+from app.core.dataset import current_version
+from app.core.responses import dumps
+from app.models.lego import Set
+from app.services.jobs import report_progress
+from app.services.set_details import SUMMARY_COLUMNS, set_detail_payloads
+import app.models  # noqa: F401
+
+# Ophogen als het formaat van de bestanden wijzigt: dan wordt alles opnieuw gerenderd
+SNAPSHOT_FORMAT = 1
+PAGE_SIZE = 24
+CHUNK_SIZE = 250
+
+# Alles wat in set_detail_payloads terechtkomt, per set samengevat in één md5
+FINGERPRINT_SQL = text("""
+WITH latest AS (
+    SELECT DISTINCT ON (set_num) set_num, id
+    FROM inventories
+    ORDER BY set_num, version DESC
+),
+part_rows AS (
+    SELECT l.set_num,
+           md5(string_agg(
+               concat_ws(',', ip.part_num, p.name, ip.color_id, c.name, c.rgb, ip.quantity, ip.is_spare, ip.img_url),
+               ';' ORDER BY ip.part_num, ip.color_id, ip.is_spare, ip.id
+           )) AS digest
+    FROM latest l
+    JOIN inventory_parts ip ON ip.inventory_id = l.id
+    JOIN parts p ON p.part_num = ip.part_num
+    JOIN colors c ON c.id = ip.color_id
+    GROUP BY l.set_num
+),
+minifig_rows AS (
+    SELECT l.set_num,
+           md5(string_agg(concat_ws(',', m.fig_num, m.name, m.num_parts, m.img_url), ';' ORDER BY m.fig_num))
+               AS digest
+    FROM latest l
+    JOIN inventory_minifigs im ON im.inventory_id = l.id
+    JOIN minifigs m ON m.fig_num = im.fig_num
+    GROUP BY l.set_num
+)
+SELECT s.set_num,
+       md5(concat_ws('|', s.name, s.year, s.theme_id, s.num_parts, s.img_url, t.name, t.parent_id,
+                     bd::text, bs.last_synced, pr.digest, mr.digest)) AS fingerprint
+FROM sets s
+JOIN themes t ON t.id = s.theme_id
+LEFT JOIN brickset_data bd ON bd.set_num = s.set_num
+LEFT JOIN brickset_sync bs ON bs.set_num = s.set_num
+LEFT JOIN part_rows pr ON pr.set_num = s.set_num
+LEFT JOIN minifig_rows mr ON mr.set_num = s.set_num
+""")
+
+
+# ---------------------------------------------------------------------------
+# Bestanden
+# ---------------------------------------------------------------------------
+
+def content_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=6).hexdigest()
+
+
+def write_variants(output: Path, stem: str, body: bytes) -> str:
+    """Schrijf `{stem}.{hash}.json` plus .gz en .br; bestaat het bestand al, dan niets."""
+    name = f"{stem}.{content_hash(body)}.json"
+    path = output / name
+    if path.exists():
+        return name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix, data in (
+        (".gz", gzip.compress(body, compresslevel=9, mtime=0)),
+        (".br", brotli.compress(body, quality=11)),
+        ("", body),  # als laatste: een onvolledige run laat geen .json zonder varianten achter
+    ):
+        tmp = path.with_name(path.name + suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path.with_name(path.name + suffix))
+    return name
+
+
+def _set_stem(set_num: str) -> str:
+    return f"sets/{set_num.replace('/', '_')}"
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+def _init_worker() -> None:
+    # Verbindingen van het ouderproces niet delen met de geforkte worker
+    get_engine().dispose(close=False)
+
+
+def render_sets(output: Path, set_nums: list[str]) -> dict[str, str]:
+    """Render een blok sets (één query per entiteit); geeft set_num -> bestandsnaam."""
+    db = SessionLocal()
+    try:
+        payloads = set_detail_payloads(db, set_nums)
+    finally:
+        db.close()
+    return {
+        set_num: write_variants(output, _set_stem(set_num), dumps(payload)) for set_num, payload in payloads.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+def render_pages(db, output: Path) -> dict[str, str]:
+    """Alle pagina's van GET /api/sets zonder filters, uit één query."""
+    query = select(*SUMMARY_COLUMNS).order_by(Set.year.desc(), Set.name, Set.set_num)
+    rows = [row._asdict() for row in db.execute(query)]
+    files = {}
+    for page, offset in enumerate(range(0, max(len(rows), 1), PAGE_SIZE), start=1):
+        body = dumps({
+            "total": len(rows),
+            "page": page,
+            "page_size": PAGE_SIZE,
+            "results": rows[offset:offset + PAGE_SIZE],
+        })
+        files[f"/api/sets?page={page}&page_size={PAGE_SIZE}"] = write_variants(output, f"sets/page-{page}", body)
+    return files
+
+
+def load_manifest(output: Path) -> dict:
+    path = output / "manifest.json"
+    if not path.exists():
+        return {}
+    manifest = json.loads(path.read_text())
+    return manifest if manifest.get("format") == SNAPSHOT_FORMAT else {}
+
+
+def prune(output: Path, keep: set[str]) -> int:
+    """Verwijder bestanden die in geen van de bewaarde manifesten meer voorkomen."""
+    removed = 0
+    for path in output.rglob("*.json*"):
+        name = path.relative_to(output).as_posix()
+        base = name.removesuffix(".gz").removesuffix(".br")
+        if name == "manifest.json" or name.startswith("manifest.") or base in keep:
+            continue
+        path.unlink()
+        removed += 1
+    return removed
+
+
+def build(output: Path, workers: int, full: bool) -> dict:
+    output.mkdir(parents=True, exist_ok=True)
+    previous = {} if full else load_manifest(output)
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        version = current_version(db)
+        fingerprints = {row.set_num: row.fingerprint for row in db.execute(FINGERPRINT_SQL)}
+        print(f"Fingerprints: {len(fingerprints)} sets ({time.perf_counter() - started:.1f}s)")
+
+        files: dict[str, str] = {}
+        files["/api/stats"] = write_variants(output, "stats", get_stats(db).body)
+        files["/api/themes"] = write_variants(output, "themes", list_themes(db).body)
+        files.update(render_pages(db, output))
+    finally:
+        db.close()
+
+    old_fingerprints = previous.get("fingerprints", {})
+    old_files = previous.get("files", {})
+    changed = []
+    for set_num, fingerprint in fingerprints.items():
+        key = f"/api/sets/{set_num}"
+        if old_fingerprints.get(set_num) == fingerprint and (output / old_files.get(key, "-")).exists():
+            files[key] = old_files[key]
+        else:
+            changed.append(set_num)
+    print(f"Sets: {len(changed)} gewijzigd, {len(fingerprints) - len(changed)} ongewijzigd")
+
+    if changed:
+        chunks = [changed[i:i + CHUNK_SIZE] for i in range(0, len(changed), CHUNK_SIZE)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for rendered in pool.map(render_sets, [output] * len(chunks), chunks):
+                files.update({f"/api/sets/{set_num}": name for set_num, name in rendered.items()})
+                done += len(rendered)
+                print(f"  {done}/{len(changed)} sets", end="\r", flush=True)
+                report_progress("sets", done, len(changed), "sets")
+        print()
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "page_size": PAGE_SIZE,
+        "files": files,
+        "fingerprints": fingerprints,
+    }
+    # Vorige manifest bewaren: clients en CDN's die dat nog hebben, vinden hun bestanden nog
+    manifest_path = output / "manifest.json"
+    if manifest_path.exists():
+        os.replace(manifest_path, output / "manifest.previous.json")
+    tmp = output / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")))
+    os.replace(tmp, manifest_path)
+
+    removed = prune(output, set(files.values()) | set(old_files.values()))
+    print(f"Klaar in {time.perf_counter() - started:.1f}s: {len(files)} bestanden in manifest, {removed} opgeruimd")
+    return manifest
+
+
+def run_build(output: str = "snapshot", workers: int = os.cpu_count() or 4, full: bool = False) -> None:
+    """Ingang van de job `build_snapshot`."""
+    build(Path(output), workers, full)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Statische snapshot van de catalogus")
+    parser.add_argument("--output", default="snapshot", help="Doelmap (default: snapshot)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Aantal renderprocessen")
+    parser.add_argument("--full", action="store_true", help="Vorige manifest negeren en alles renderen")
+    args = parser.parse_args()
+    build(Path(args.output), args.workers, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,21 +7,35 @@ Gebruik:
 De CSV bestanden worden automatisch gedownload als ze nog niet aanwezig zijn.
 """
 
-import csv
+import argparse
 import gzip
+import hashlib
 import io
+import json
 import os
 import sys
+import threading
+import urllib.error
 import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Iterable, Iterator
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import pandas as pd
 from sqlalchemy import text
-from sqlalchemy.dialects.postgresql import insert
-
-from app.core.database import SessionLocal, engine
-from app.core.database import Base
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, get_engine
+from app.core.dataset import bump_version, dataset_write_lock
+from app.services.catalog import write_snapshot
+from app.services.jobs import job_lock, report_progress
+from app.services.offline import publish
+from app.services.value_metrics import refresh_value_metrics
 import app.models  # noqa: F401
 
 DATA_DIR = Path(__file__).parent / "data"
@@ -42,295 +56,756 @@ CSV_FILES = {
     "inventory_sets": f"{REBRICKABLE_BASE}/inventory_sets.csv.gz",
 }
 
-BATCH_SIZE = 5000
+# Rijen per blok: begrenst het geheugen, ook voor inventory_parts
+CHUNK_ROWS = 100_000
+# NULL-marker in de COPY-buffers, zodat een leeg veld een lege string kan blijven
+COPY_NULL = r"\N"
+TRUE_VALUES = ("t", "true", "1", "yes")
+
+MANIFEST_NAME = "downloads.json"
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_TIMEOUT = 60
+READ_BLOCK = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Downloads
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DownloadState:
+    """Wat er van één dump bekend is; staat per bestand in `downloads.json` naast de CSV's."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+    size: int | None = None
+    sha256: str | None = None
+    # Hash van het bestand bij de laatste geslaagde import van deze tabel
+    imported_sha256: str | None = None
+    # Validator (ETag of Last-Modified) van een onderbroken download in `{name}.csv.gz.part`
+    partial: str | None = None
+
+    @property
+    def changed(self) -> bool:
+        return self.sha256 is None or self.sha256 != self.imported_sha256
+
+
+class DownloadManifest:
+    """`downloads.json`: DownloadState per dump, thread-safe en atomair weggeschreven."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        data = json.loads(path.read_text()) if path.exists() else {}
+        self.states = {name: DownloadState(**state) for name, state in data.items()}
+
+    def get(self, name: str) -> DownloadState:
+        with self._lock:
+            return self.states.setdefault(name, DownloadState())
+
+    def save(self) -> None:
+        with self._lock:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps({name: asdict(s) for name, s in self.states.items()}, indent=2))
+            os.replace(tmp, self.path)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(READ_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_gzip(path: Path) -> None:
+    """Lees het hele bestand uit: gzip controleert CRC en lengte aan het eind."""
+    with gzip.open(path, "rb") as f:
+        while f.read(READ_BLOCK):
+            pass
+
+
+def _expected_size(response, offset: int) -> int | None:
+    if response.status == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) + offset if length and length.isdigit() else None
+
+
+def fetch_csv(name: str, url: str, manifest: DownloadManifest) -> str:
+    """Haal één dump op met een conditionele GET; hervat een onderbroken download met Range.
+
+    Geeft de uitkomst terug ('unchanged', 'downloaded' of 'resumed'). Een bestand wordt pas
+    vervangen als de lengte klopt en de gzip-CRC geldig is.
+    """
+    state = manifest.get(name)
+    dest = DATA_DIR / f"{name}.csv.gz"
+    part = dest.with_name(dest.name + ".part")
+
+    headers = {}
+    if dest.exists() and state.sha256:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+    offset = part.stat().st_size if part.exists() and state.partial else 0
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = state.partial
+
+    try:
+        response = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=DOWNLOAD_TIMEOUT)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return "unchanged"
+        if exc.code == 416 and offset:
+            # Deel-bestand past niet meer bij de server: opnieuw beginnen
+            part.unlink()
+            state.partial = None
+            return fetch_csv(name, url, manifest)
+        raise
+
+    with response:
+        resumed = response.status == 206
+        expected = _expected_size(response, offset if resumed else 0)
+        state.partial = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        manifest.save()
+        with open(part, "ab" if resumed else "wb") as f:
+            while block := response.read(READ_BLOCK):
+                f.write(block)
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    size = part.stat().st_size
+    if expected is not None and size != expected:
+        raise RuntimeError(f"{name}: {size} bytes ontvangen, {expected} verwacht")
+    try:
+        verify_gzip(part)
+    except (OSError, EOFError) as exc:
+        part.unlink()
+        state.partial = None
+        manifest.save()
+        raise RuntimeError(f"{name}: ongeldig gzip-bestand ({exc})") from exc
+
+    os.replace(part, dest)
+    state.etag, state.last_modified, state.size = etag, last_modified, size
+    state.sha256 = file_sha256(dest)
+    state.partial = None
+    manifest.save()
+    return "resumed" if resumed else "downloaded"
+
+
+def download_all(workers: int = DOWNLOAD_WORKERS) -> DownloadManifest:
+    """Alle dumps gelijktijdig ophalen; ongewijzigde bestanden kosten alleen een 304."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = DownloadManifest(DATA_DIR / MANIFEST_NAME)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(fetch_csv, name, url, manifest) for name, url in CSV_FILES.items()}
+        for name, future in futures.items():
+            state = manifest.get(name)
+            print(f"  [{future.result()}] {name}.csv.gz ({(state.size or 0) / 1e6:.1f} MB)")
+    return manifest
 
 
 def download_csv(name: str, url: str) -> Path:
+    """Pad van de lokale dump; alleen downloaden als het bestand nog ontbreekt."""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     dest = DATA_DIR / f"{name}.csv.gz"
-    if dest.exists():
-        print(f"  [skip] {name}.csv.gz already downloaded")
-        return dest
-    print(f"  [download] {name}.csv.gz ...")
-    urllib.request.urlretrieve(url, dest)
+    if not dest.exists():
+        print(f"  [download] {name}.csv.gz ...")
+        fetch_csv(name, url, DownloadManifest(DATA_DIR / MANIFEST_NAME))
     return dest
 
 
-def read_csv(path: Path) -> list[dict]:
-    with gzip.open(path, "rt", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+def read_csv_chunks(path: Path, ints: tuple[str, ...] = ()) -> Iterator[pd.DataFrame]:
+    """Gzip CSV in blokken van CHUNK_ROWS rijen, geparst door de C-parser van pandas.
 
+    Kolommen in `ints` worden direct als int64 ingelezen; een leeg of ongeldig veld is
+    dan een fout, zoals int() dat was. Alle andere kolommen blijven strings, zonder
+    NA-herkenning: een leeg veld is een lege string.
+    """
+    dtype = defaultdict(lambda: object, {column: "int64" for column in ints})
+    size = path.stat().st_size
+    rows = 0
+    with open(path, "rb") as raw:
+        for chunk in pd.read_csv(raw, compression="gzip", dtype=dtype, na_filter=False, chunksize=CHUNK_ROWS):
+            rows += len(chunk)
+            # Totaal geschat uit het deel van het gecomprimeerde bestand dat al gelezen is
+            fraction = raw.tell() / size if size else 1.0
+            report_progress(path.name.removesuffix(".csv.gz"), rows, round(rows / fraction) if fraction else None)
+            yield chunk
 
-def parse_bool(value: str) -> bool:
-    return value.strip().lower() in ("t", "true", "1", "yes")
 
+def column(chunk: pd.DataFrame, name: str) -> pd.Series:
+    """Kolom uit een blok; een kolom die in oudere dumps ontbreekt wordt lege strings."""
+    if name in chunk:
+        return chunk[name]
+    return pd.Series("", index=chunk.index, dtype=object)
 
-def parse_int_or_none(value: str) -> int | None:
-    value = value.strip()
-    if value == "" or value.lower() == "none":
-        return None
+
+def parse_bool(values: pd.Series) -> pd.Series:
+    return values.str.strip().str.lower().isin(TRUE_VALUES)
+
+
+def parse_str_or_none(values: pd.Series) -> pd.Series:
+    values = values.str.strip()
+    return values.mask(values == "")
+
+
+def copy_frame(conn, table: str, frame: pd.DataFrame) -> None:
+    """COPY een blok als CSV-buffer naar `table`; NaN/NA wordt NULL."""
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False, na_rep=COPY_NULL)
+    buf.seek(0)
+    cursor = conn.connection.cursor()
     try:
-        return int(value)
-    except ValueError:
-        return None
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buf
+        )
+    finally:
+        cursor.close()
+
+
+def copy_frames(conn, table: str, frames: Iterable[pd.DataFrame]) -> int:
+    """COPY alle blokken naar `table` in de lopende transactie; geeft het aantal rijen terug."""
+    total = 0
+    for frame in frames:
+        copy_frame(conn, table, frame)
+        total += len(frame)
+    return total
+
+
+def batch_upsert(conn, table_name: str, frames: Iterable[pd.DataFrame], conflict_cols: list[str]) -> int:
+    """Nieuwe rijen toevoegen, bestaande ongemoeid laten: COPY naar een staging-tabel,
+    daarna één INSERT ... SELECT ... ON CONFLICT DO NOTHING. De sleutels van de nieuwe
+    rijen gaan in dezelfde statement naar het wijzigingslog."""
+    staging = f"staging_{table_name}"
+    conn.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    columns = None
+    total = 0
+    for frame in frames:
+        copy_frame(conn, staging, frame)
+        columns = ", ".join(frame.columns)
+        total += len(frame)
+    if columns is not None:
+        key = " || '/' || ".join(f"{col}::text" for col in conflict_cols)
+        conn.execute(text(f"""
+            WITH inserted AS (
+                INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging}
+                ON CONFLICT ({', '.join(conflict_cols)}) DO NOTHING
+                RETURNING {key} AS key
+            )
+            INSERT INTO catalog_changes (table_name, key, op) SELECT :table, key, 'I' FROM inserted
+        """), {"table": table_name})
+    conn.commit()
+    return total
 
 
-def parse_str_or_none(value: str) -> str | None:
-    value = value.strip()
-    return value if value else None
+# Tabellen zonder natuurlijke sleutel: het wijzigingslog vergelijkt ze per groep
+CHANGE_GROUPS = {
+    "part_relationships": "child_part_num",
+    "inventory_parts": "inventory_id",
+    "inventory_minifigs": "inventory_id",
+    "inventory_sets": "inventory_id",
+}
 
 
-def batch_upsert(conn, table_name: str, rows: list[dict], conflict_cols: list[str]) -> None:
-    if not rows:
-        return
-    for i in range(0, len(rows), BATCH_SIZE):
-        batch = rows[i : i + BATCH_SIZE]
-        stmt = insert(Base.metadata.tables[table_name]).values(batch)
-        stmt = stmt.on_conflict_do_nothing(index_elements=conflict_cols)
-        conn.execute(stmt)
+def _group_hashes_sql(table_name: str) -> str:
+    """Per groep een volgorde-onafhankelijke hash over de rijen (zonder het serial id)."""
+    table = Base.metadata.tables[table_name]
+    row = ", ".join(column.name for column in table.columns if column is not table.autoincrement_column)
+    return (
+        f"SELECT {CHANGE_GROUPS[table_name]}::text AS key, "
+        f"sum(hashtextextended(row({row})::text, 0)::numeric) AS hash "
+        f"FROM {table_name} GROUP BY 1"
+    )
+
+
+def replace_table(conn, table_name: str, frames: Iterable[pd.DataFrame]) -> int:
+    """TRUNCATE + COPY in één transactie, voor tabellen zonder natuurlijke sleutel in de CSV.
+
+    Groepen (bijv. een inventaris) die erbij kwamen, verdwenen of veranderden gaan naar het wijzigingslog.
+    """
+    conn.execute(text(f"CREATE TEMP TABLE old_groups ON COMMIT DROP AS {_group_hashes_sql(table_name)}"))
+    conn.execute(text(f"TRUNCATE TABLE {table_name} RESTART IDENTITY"))
+    total = copy_frames(conn, table_name, frames)
+    changes = conn.execute(text(f"""
+        INSERT INTO catalog_changes (table_name, key, op)
+        SELECT :table, coalesce(cur.key, prev.key),
+               CASE WHEN prev.key IS NULL THEN 'I' WHEN cur.key IS NULL THEN 'D' ELSE 'U' END
+        FROM ({_group_hashes_sql(table_name)}) cur
+        FULL JOIN old_groups prev ON prev.key = cur.key
+        WHERE cur.hash IS DISTINCT FROM prev.hash
+    """), {"table": table_name}).rowcount
     conn.commit()
+    print(f"  {changes} gewijzigde groepen ({CHANGE_GROUPS[table_name]})")
+    return total
 
 
 def import_colors(conn) -> None:
     print("Importing colors...")
     path = download_csv("colors", CSV_FILES["colors"])
-    rows = read_csv(path)
-    data = [
-        {
-            "id": int(r["id"]),
-            "name": r["name"],
-            "rgb": r["rgb"],
-            "is_trans": parse_bool(r["is_trans"]),
-        }
-        for r in rows
-    ]
-    batch_upsert(conn, "colors", data, ["id"])
-    print(f"  {len(data)} colors imported")
+    frames = (
+        pd.DataFrame({
+            "id": chunk["id"],
+            "name": chunk["name"],
+            "rgb": chunk["rgb"],
+            "is_trans": parse_bool(chunk["is_trans"]),
+        })
+        for chunk in read_csv_chunks(path, ints=("id",))
+    )
+    count = batch_upsert(conn, "colors", frames, ["id"])
+    print(f"  {count} colors imported")
 
 
 def import_themes(conn) -> None:
     print("Importing themes...")
     path = download_csv("themes", CSV_FILES["themes"])
-    rows = read_csv(path)
-    # First pass: themes without parent (to satisfy FK constraint)
-    no_parent = [r for r in rows if not r["parent_id"].strip()]
-    with_parent = [r for r in rows if r["parent_id"].strip()]
-
-    data_no_parent = [{"id": int(r["id"]), "name": r["name"], "parent_id": None} for r in no_parent]
-    data_with_parent = [
-        {"id": int(r["id"]), "name": r["name"], "parent_id": int(r["parent_id"])} for r in with_parent
-    ]
-    batch_upsert(conn, "themes", data_no_parent, ["id"])
-    batch_upsert(conn, "themes", data_with_parent, ["id"])
-    print(f"  {len(rows)} themes imported")
+    # Eén INSERT ... SELECT: de self-FK op parent_id wordt pas aan het eind van het statement gecontroleerd
+    frames = (
+        pd.DataFrame({
+            "id": chunk["id"],
+            "name": chunk["name"],
+            "parent_id": pd.to_numeric(parse_str_or_none(chunk["parent_id"])).astype("Int64"),
+        })
+        for chunk in read_csv_chunks(path, ints=("id",))
+    )
+    count = batch_upsert(conn, "themes", frames, ["id"])
+    print(f"  {count} themes imported")
 
 
 def import_part_categories(conn) -> None:
     print("Importing part categories...")
     path = download_csv("part_categories", CSV_FILES["part_categories"])
-    rows = read_csv(path)
-    data = [{"id": int(r["id"]), "name": r["name"]} for r in rows]
-    batch_upsert(conn, "part_categories", data, ["id"])
-    print(f"  {len(data)} part categories imported")
+    frames = (chunk[["id", "name"]] for chunk in read_csv_chunks(path, ints=("id",)))
+    count = batch_upsert(conn, "part_categories", frames, ["id"])
+    print(f"  {count} part categories imported")
 
 
 def import_parts(conn) -> None:
     print("Importing parts...")
     path = download_csv("parts", CSV_FILES["parts"])
-    rows = read_csv(path)
-    data = [
-        {
-            "part_num": r["part_num"],
-            "name": r["name"],
-            "part_cat_id": int(r["part_cat_id"]),
-            "part_material": parse_str_or_none(r.get("part_material", "")),
-        }
-        for r in rows
-    ]
-    batch_upsert(conn, "parts", data, ["part_num"])
-    print(f"  {len(data)} parts imported")
+    frames = (
+        pd.DataFrame({
+            "part_num": chunk["part_num"],
+            "name": chunk["name"],
+            "part_cat_id": chunk["part_cat_id"],
+            "part_material": parse_str_or_none(column(chunk, "part_material")),
+        })
+        for chunk in read_csv_chunks(path, ints=("part_cat_id",))
+    )
+    count = batch_upsert(conn, "parts", frames, ["part_num"])
+    print(f"  {count} parts imported")
 
 
 def import_part_relationships(conn) -> None:
     print("Importing part relationships...")
     path = download_csv("part_relationships", CSV_FILES["part_relationships"])
-    rows = read_csv(path)
-    data = [
-        {
-            "rel_type": r["rel_type"],
-            "child_part_num": r["child_part_num"],
-            "parent_part_num": r["parent_part_num"],
-        }
-        for r in rows
-    ]
     # Part relationships have no unique key from CSV, skip duplicates via truncate+insert
-    conn.execute(text("TRUNCATE TABLE part_relationships RESTART IDENTITY"))
-    conn.commit()
-    for i in range(0, len(data), BATCH_SIZE):
-        batch = data[i : i + BATCH_SIZE]
-        conn.execute(Base.metadata.tables["part_relationships"].insert(), batch)
-    conn.commit()
-    print(f"  {len(data)} part relationships imported")
+    frames = (chunk[["rel_type", "child_part_num", "parent_part_num"]] for chunk in read_csv_chunks(path))
+    count = replace_table(conn, "part_relationships", frames)
+    print(f"  {count} part relationships imported")
 
 
 def import_elements(conn) -> None:
     print("Importing elements...")
     path = download_csv("elements", CSV_FILES["elements"])
-    rows = read_csv(path)
-    data = [
-        {
-            "element_id": r["element_id"],
-            "part_num": r["part_num"],
-            "color_id": int(r["color_id"]),
-            "design_id": parse_str_or_none(r.get("design_id", "")),
-        }
-        for r in rows
-        if r["part_num"] and r["color_id"]
-    ]
-    batch_upsert(conn, "elements", data, ["element_id"])
-    print(f"  {len(data)} elements imported")
+    frames = (
+        pd.DataFrame({
+            "element_id": chunk["element_id"],
+            "part_num": chunk["part_num"],
+            "color_id": chunk["color_id"].astype("int64"),
+            "design_id": parse_str_or_none(column(chunk, "design_id")),
+        })
+        # Elementen zonder onderdeel of kleur overslaan
+        for chunk in (c[(c["part_num"] != "") & (c["color_id"] != "")] for c in read_csv_chunks(path))
+    )
+    count = batch_upsert(conn, "elements", frames, ["element_id"])
+    print(f"  {count} elements imported")
 
 
 def import_sets(conn) -> None:
     print("Importing sets...")
     path = download_csv("sets", CSV_FILES["sets"])
-    rows = read_csv(path)
-    data = [
-        {
-            "set_num": r["set_num"],
-            "name": r["name"],
-            "year": int(r["year"]),
-            "theme_id": int(r["theme_id"]),
-            "num_parts": int(r["num_parts"]),
-            "img_url": parse_str_or_none(r.get("img_url", "")),
-        }
-        for r in rows
-    ]
-    batch_upsert(conn, "sets", data, ["set_num"])
-    print(f"  {len(data)} sets imported")
+    frames = (
+        pd.DataFrame({
+            "set_num": chunk["set_num"],
+            "name": chunk["name"],
+            "year": chunk["year"],
+            "theme_id": chunk["theme_id"],
+            "num_parts": chunk["num_parts"],
+            "img_url": parse_str_or_none(column(chunk, "img_url")),
+        })
+        for chunk in read_csv_chunks(path, ints=("year", "theme_id", "num_parts"))
+    )
+    count = batch_upsert(conn, "sets", frames, ["set_num"])
+    print(f"  {count} sets imported")
 
 
 def import_minifigs(conn) -> None:
     print("Importing minifigs...")
     path = download_csv("minifigs", CSV_FILES["minifigs"])
-    rows = read_csv(path)
-    data = [
-        {
-            "fig_num": r["fig_num"],
-            "name": r["name"],
-            "num_parts": int(r["num_parts"]),
-            "img_url": parse_str_or_none(r.get("img_url", "")),
-        }
-        for r in rows
-    ]
-    batch_upsert(conn, "minifigs", data, ["fig_num"])
-    print(f"  {len(data)} minifigs imported")
+    frames = (
+        pd.DataFrame({
+            "fig_num": chunk["fig_num"],
+            "name": chunk["name"],
+            "num_parts": chunk["num_parts"],
+            "img_url": parse_str_or_none(column(chunk, "img_url")),
+        })
+        for chunk in read_csv_chunks(path, ints=("num_parts",))
+    )
+    count = batch_upsert(conn, "minifigs", frames, ["fig_num"])
+    print(f"  {count} minifigs imported")
 
 
 def import_inventories(conn) -> None:
     print("Importing inventories...")
     path = download_csv("inventories", CSV_FILES["inventories"])
-    rows = read_csv(path)
-    data = [
-        {
-            "id": int(r["id"]),
-            "version": int(r["version"]),
-            "set_num": r["set_num"],
-        }
-        for r in rows
-    ]
-    batch_upsert(conn, "inventories", data, ["id"])
-    print(f"  {len(data)} inventories imported")
+    frames = (chunk[["id", "version", "set_num"]] for chunk in read_csv_chunks(path, ints=("id", "version")))
+    count = batch_upsert(conn, "inventories", frames, ["id"])
+    print(f"  {count} inventories imported")
 
 
 def import_inventory_parts(conn) -> None:
     print("Importing inventory parts (this may take a while)...")
     path = download_csv("inventory_parts", CSV_FILES["inventory_parts"])
-    rows = read_csv(path)
-    conn.execute(text("TRUNCATE TABLE inventory_parts RESTART IDENTITY"))
-    conn.commit()
-    data = [
-        {
-            "inventory_id": int(r["inventory_id"]),
-            "part_num": r["part_num"],
-            "color_id": int(r["color_id"]),
-            "quantity": int(r["quantity"]),
-            "is_spare": parse_bool(r["is_spare"]),
-            "img_url": parse_str_or_none(r.get("img_url", "")),
-        }
-        for r in rows
-    ]
-    for i in range(0, len(data), BATCH_SIZE):
-        batch = data[i : i + BATCH_SIZE]
-        conn.execute(Base.metadata.tables["inventory_parts"].insert(), batch)
-        if i % 50000 == 0 and i > 0:
-            print(f"  ... {i}/{len(data)}")
-    conn.commit()
-    print(f"  {len(data)} inventory parts imported")
+    frames = (
+        pd.DataFrame({
+            "inventory_id": chunk["inventory_id"],
+            "part_num": chunk["part_num"],
+            "color_id": chunk["color_id"],
+            "quantity": chunk["quantity"],
+            "is_spare": parse_bool(chunk["is_spare"]),
+            "img_url": parse_str_or_none(column(chunk, "img_url")),
+        })
+        for chunk in read_csv_chunks(path, ints=("inventory_id", "color_id", "quantity"))
+    )
+    count = replace_table(conn, "inventory_parts", frames)
+    print(f"  {count} inventory parts imported")
 
 
 def import_inventory_minifigs(conn) -> None:
     print("Importing inventory minifigs...")
     path = download_csv("inventory_minifigs", CSV_FILES["inventory_minifigs"])
-    rows = read_csv(path)
-    conn.execute(text("TRUNCATE TABLE inventory_minifigs RESTART IDENTITY"))
-    conn.commit()
-    data = [
-        {
-            "inventory_id": int(r["inventory_id"]),
-            "fig_num": r["fig_num"],
-            "quantity": int(r["quantity"]),
-        }
-        for r in rows
-    ]
-    for i in range(0, len(data), BATCH_SIZE):
-        conn.execute(Base.metadata.tables["inventory_minifigs"].insert(), data[i : i + BATCH_SIZE])
-    conn.commit()
-    print(f"  {len(data)} inventory minifigs imported")
+    frames = (
+        chunk[["inventory_id", "fig_num", "quantity"]]
+        for chunk in read_csv_chunks(path, ints=("inventory_id", "quantity"))
+    )
+    count = replace_table(conn, "inventory_minifigs", frames)
+    print(f"  {count} inventory minifigs imported")
 
 
 def import_inventory_sets(conn) -> None:
     print("Importing inventory sets...")
     path = download_csv("inventory_sets", CSV_FILES["inventory_sets"])
-    rows = read_csv(path)
-    conn.execute(text("TRUNCATE TABLE inventory_sets RESTART IDENTITY"))
+    frames = (
+        chunk[["inventory_id", "set_num", "quantity"]]
+        for chunk in read_csv_chunks(path, ints=("inventory_id", "quantity"))
+    )
+    count = replace_table(conn, "inventory_sets", frames)
+    print(f"  {count} inventory sets imported")
+
+
+# Order matters — respect FK dependencies
+IMPORTERS = {
+    "colors": import_colors,
+    "themes": import_themes,
+    "part_categories": import_part_categories,
+    "parts": import_parts,
+    "part_relationships": import_part_relationships,
+    "elements": import_elements,
+    "sets": import_sets,
+    "minifigs": import_minifigs,
+    "inventories": import_inventories,
+    "inventory_parts": import_inventory_parts,
+    "inventory_minifigs": import_inventory_minifigs,
+    "inventory_sets": import_inventory_sets,
+}
+
+
+def import_in_place(tables: list[str], manifest: DownloadManifest) -> int:
+    print("\nCreating tables if not exists...")
+    Base.metadata.create_all(get_engine())
+
+    with get_engine().connect() as conn:
+        for name in tables:
+            IMPORTERS[name](conn)
+            # Pas na een geslaagde import: een afgebroken run importeert de tabel de volgende keer opnieuw
+            state = manifest.get(name)
+            state.imported_sha256 = state.sha256
+            manifest.save()
+
+        # num_parts kan gewijzigd zijn: prijs per onderdeel en percentielen opnieuw berekenen
+        print(f"Value metrics: {refresh_value_metrics(conn)} rijen")
+
+        # Nieuwe datasetversie: de API herlaadt daarna zijn in-memory rollups
+        return bump_version(conn, "rebrickable")
+
+
+# ---------------------------------------------------------------------------
+# Blue/green
+# ---------------------------------------------------------------------------
+
+# De import loopt in een schaduwschema; pas na validatie wisselt het met public van naam.
+# De API leest intussen ongestoord uit public en ziet daarna in één keer de nieuwe dataset.
+LIVE_SCHEMA = "public"
+SHADOW_SCHEMA = "import_shadow"
+PREVIOUS_SCHEMA = "brickviewer_previous"
+
+# Geen onderdeel van de dataset: blijven live en verhuizen bij de wissel mee naar het nieuwe public
+LIVE_ONLY_TABLES = {"job_runs"}
+
+# Een nieuwe dump met minder dan 90% van de live rijen is verdacht (afgebroken download, lege export)
+MIN_ROW_RATIO = 0.9
+
+# De wissel wacht hooguit zo lang op lopende queries, en probeert het daarna opnieuw
+SWAP_LOCK_TIMEOUT = "5s"
+SWAP_ATTEMPTS = 10
+
+
+def _schema_exists(conn, schema: str) -> bool:
+    return conn.scalar(text("SELECT 1 FROM pg_namespace WHERE nspname = :s"), {"s": schema}) is not None
+
+
+def _tables_in(conn, schema: str) -> list[str]:
+    return list(conn.scalars(text("SELECT tablename FROM pg_tables WHERE schemaname = :s"), {"s": schema}))
+
+
+def _count(conn, schema: str, table: str) -> int:
+    return conn.scalar(text(f"SELECT count(*) FROM {schema}.{table}"))
+
+
+def create_shadow(conn) -> None:
+    """Leeg schaduwschema met alle tabellen, gevuld met een kopie van de live data (ook van
+    de tabellen die de import vervangt: het wijzigingslog vergelijkt met de oude inhoud).
+
+    Daarna staat de search_path van `conn` op het schaduwschema, zodat de importers,
+    refresh_value_metrics en bump_version ongewijzigd daarin schrijven.
+    """
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SHADOW_SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SHADOW_SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SHADOW_SCHEMA}"))
+    Base.metadata.create_all(conn, tables=[t for t in Base.metadata.sorted_tables if t.name not in LIVE_ONLY_TABLES])
+
+    live = set(_tables_in(conn, LIVE_SCHEMA))
+    # Maandpartities van brickset_history; de default-partitie maakt create_all zelf
+    partitions = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.brickset_history'::regclass AND c.relname <> 'brickset_history_default'
+    """)).all() if "brickset_history" in live else []
+    for name, bound in partitions:
+        conn.execute(text(f"CREATE TABLE {SHADOW_SCHEMA}.{name} PARTITION OF {SHADOW_SCHEMA}.brickset_history {bound}"))
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in live or table.name in LIVE_ONLY_TABLES:
+            continue
+        columns = ", ".join(table.columns.keys())
+        conn.execute(text(
+            f"INSERT INTO {SHADOW_SCHEMA}.{table.name} ({columns}) SELECT {columns} FROM {LIVE_SCHEMA}.{table.name}"
+        ))
+        if table.autoincrement_column is not None:
+            # Gekopieerde ids: de sequence verder laten tellen vanaf het hoogste id
+            column = table.autoincrement_column.name
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{SHADOW_SCHEMA}.{table.name}', '{column}'), "
+                f"coalesce(max({column}), 0) + 1, false) FROM {SHADOW_SCHEMA}.{table.name}"
+            ))
+    if "alembic_version" in live:
+        conn.execute(text(
+            f"CREATE TABLE {SHADOW_SCHEMA}.alembic_version (LIKE {LIVE_SCHEMA}.alembic_version INCLUDING ALL)"
+        ))
+        conn.execute(text(f"INSERT INTO {SHADOW_SCHEMA}.alembic_version SELECT * FROM {LIVE_SCHEMA}.alembic_version"))
     conn.commit()
-    data = [
-        {
-            "inventory_id": int(r["inventory_id"]),
-            "set_num": r["set_num"],
-            "quantity": int(r["quantity"]),
-        }
-        for r in rows
-    ]
-    for i in range(0, len(data), BATCH_SIZE):
-        conn.execute(Base.metadata.tables["inventory_sets"].insert(), data[i : i + BATCH_SIZE])
+
+
+def validate_shadow(conn) -> list[str]:
+    """Problemen met de nieuwe dataset; leeg als de wissel door kan gaan."""
+    live = set(_tables_in(conn, LIVE_SCHEMA))
+    problems = []
+    for name in IMPORTERS:
+        count = _count(conn, SHADOW_SCHEMA, name)
+        previous = _count(conn, LIVE_SCHEMA, name) if name in live else 0
+        if count == 0:
+            problems.append(f"{name}: geen rijen")
+        elif count < previous * MIN_ROW_RATIO:
+            problems.append(f"{name}: {count} rijen, live {previous}")
+    return problems
+
+
+def swap_schemas(conn, incoming: str, outgoing: str) -> None:
+    """`incoming` wordt public, het huidige public heet daarna `outgoing`. Eén transactie:
+    lezers zien het oude of het nieuwe schema, nooit een mengsel."""
+    moving = _tables_in(conn, LIVE_SCHEMA)
+    tables = ", ".join(f"{LIVE_SCHEMA}.{table}" for table in moving)
     conn.commit()
-    print(f"  {len(data)} inventory sets imported")
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            if tables:
+                # Wacht tot lopende queries op de live tabellen klaar zijn
+                conn.execute(text(f"LOCK TABLE {tables} IN ACCESS EXCLUSIVE MODE"))
+            conn.execute(text(f"ALTER SCHEMA {LIVE_SCHEMA} RENAME TO {outgoing}"))
+            conn.execute(text(f"ALTER SCHEMA {incoming} RENAME TO {LIVE_SCHEMA}"))
+            for table in LIVE_ONLY_TABLES & set(moving):
+                conn.execute(text(f"DROP TABLE IF EXISTS {LIVE_SCHEMA}.{table}"))
+                conn.execute(text(f"ALTER TABLE {outgoing}.{table} SET SCHEMA {LIVE_SCHEMA}"))
+            conn.commit()
+            return
+        except OperationalError:
+            conn.rollback()
+            print(f"  Live tabellen bezet, nieuwe poging ({attempt}/{SWAP_ATTEMPTS})...")
+    raise RuntimeError("Schemawissel mislukt: live tabellen bleven bezet")
+
+
+def import_blue_green(tables: list[str], manifest: DownloadManifest, force: bool) -> int:
+    with get_engine().connect() as conn:
+        try:
+            print(f"\nSchaduwschema {SHADOW_SCHEMA} opbouwen uit de live data...")
+            create_shadow(conn)
+            for name in tables:
+                IMPORTERS[name](conn)
+            print(f"Value metrics: {refresh_value_metrics(conn)} rijen")
+
+            problems = validate_shadow(conn)
+            if problems:
+                print("\nValidatie:")
+                for problem in problems:
+                    print(f"  - {problem}")
+                if not force:
+                    raise SystemExit(
+                        f"Nieuwe dataset afgekeurd; live ongewijzigd. {SHADOW_SCHEMA} blijft staan voor onderzoek, "
+                        "--force wisselt toch."
+                    )
+
+            for table in _tables_in(conn, SHADOW_SCHEMA):
+                conn.execute(text(f"ANALYZE {SHADOW_SCHEMA}.{table}"))
+            # Versie al in het schaduwschema: na de wissel herladen de API-caches precies één keer
+            version = bump_version(conn, "rebrickable")
+        finally:
+            conn.rollback()
+            conn.execute(text("RESET search_path"))
+            conn.commit()
+
+        print("Schema's wisselen...")
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {PREVIOUS_SCHEMA} CASCADE"))
+        swap_schemas(conn, SHADOW_SCHEMA, PREVIOUS_SCHEMA)
+        print(f"  Vorige dataset bewaard als {PREVIOUS_SCHEMA} (terugzetten met --rollback)")
+
+    for name in tables:
+        state = manifest.get(name)
+        state.imported_sha256 = state.sha256
+    manifest.save()
+    return version
+
+
+def rollback() -> int:
+    """Zet de vorige dataset terug; de huidige wordt op zijn beurt de vorige."""
+    with get_engine().connect() as conn:
+        if not _schema_exists(conn, PREVIOUS_SCHEMA):
+            raise SystemExit(f"Geen vorige dataset ({PREVIOUS_SCHEMA}) om terug te zetten")
+        # Versienummers niet hergebruiken: een oude ETag mag niet matchen met de teruggezette data
+        latest = conn.scalar(text("SELECT coalesce(max(id), 0) FROM dataset_versions"))
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SHADOW_SCHEMA} CASCADE"))
+        swap_schemas(conn, PREVIOUS_SCHEMA, SHADOW_SCHEMA)
+        conn.execute(text(f"ALTER SCHEMA {SHADOW_SCHEMA} RENAME TO {PREVIOUS_SCHEMA}"))
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('dataset_versions', 'id'), "
+            "greatest(:latest, (SELECT coalesce(max(id), 0) FROM dataset_versions)))"
+        ), {"latest": latest})
+        conn.commit()
+        return bump_version(conn, "rollback")
+
+
+def publish_offline() -> None:
+    """Offline-catalogus (basis + delta) voor de frontend bijwerken; zie docs/data-updates.md."""
+    db = SessionLocal()
+    try:
+        manifest = publish(db, Path(settings.offline_dir))
+    finally:
+        db.close()
+    if manifest is None:
+        print("Offline-catalogus: ongewijzigd")
+        return
+    delta = manifest["deltas"][-1]["bytes"] if manifest["deltas"] else None
+    print(
+        f"Offline-catalogus: versie {manifest['version']}, basis {manifest['base']['bytes'] / 1024:.0f} KB"
+        + (f", delta {delta / 1024:.1f} KB" if delta is not None else "")
+    )
+
+
+def publish_catalog() -> None:
+    """Catalogus-snapshot die de API-workers mappen (CATALOG_STORE) opnieuw schrijven."""
+    db = SessionLocal()
+    try:
+        store = write_snapshot(db, Path(settings.catalog_snapshot))
+    finally:
+        db.close()
+    print(f"Catalogus-snapshot: versie {store.version}, {store.size / 2**20:.1f} MiB")
+
+
+def run_import(all_tables: bool = False, blue_green: bool = False, force: bool = False,
+               workers: int = DOWNLOAD_WORKERS) -> int | None:
+    """Download en importeer de gewijzigde dumps; geeft de nieuwe datasetversie terug (None: niets gewijzigd).
+
+    Ook de ingang van de job `import_rebrickable`.
+    """
+    print("Downloading CSV dumps...")
+    manifest = download_all(workers)
+
+    tables = [name for name in IMPORTERS if all_tables or manifest.get(name).changed]
+    if not tables:
+        print("\nAlle dumps ongewijzigd sinds de vorige import; niets te doen.")
+        return None
+    skipped = len(IMPORTERS) - len(tables)
+    if skipped:
+        print(f"  {skipped} tabellen ongewijzigd, overgeslagen")
+
+    # Geen gelijktijdige sync of tweede import: die zouden elkaars wijzigingen overschrijven
+    with dataset_write_lock(get_engine()):
+        if blue_green:
+            version = import_blue_green(tables, manifest, force)
+        else:
+            version = import_in_place(tables, manifest)
+        publish_offline()
+        publish_catalog()
+    return version
 
 
 def main() -> None:
-    print("=== BrickViewer CSV Import ===\n")
-    print("Creating tables if not exists...")
-    Base.metadata.create_all(engine)
-
-    with engine.begin() as conn:
-        # Order matters — respect FK dependencies
-        import_colors(conn)
-        import_themes(conn)
-        import_part_categories(conn)
-        import_parts(conn)
-        import_part_relationships(conn)
-        import_elements(conn)
-        import_sets(conn)
-        import_minifigs(conn)
-        import_inventories(conn)
-        import_inventory_parts(conn)
-        import_inventory_minifigs(conn)
-        import_inventory_sets(conn)
-
-    print("\n=== Import complete! ===")
+    parser = argparse.ArgumentParser(description="Rebrickable CSV import")
+    parser.add_argument("--all", action="store_true", help="Ook tabellen importeren waarvan de dump niet gewijzigd is")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS, help="Gelijktijdige downloads")
+    parser.add_argument("--blue-green", action="store_true", help="Importeren in een schaduwschema en daarna wisselen")
+    parser.add_argument("--force", action="store_true", help="Blue/green: ook wisselen als de validatie faalt")
+    parser.add_argument("--rollback", action="store_true", help="Vorige blue/green dataset terugzetten")
+    parser.add_argument("--publish-offline", action="store_true", help="Alleen de offline-catalogus bijwerken")
+    parser.add_argument("--publish-catalog", action="store_true", help="Alleen de catalogus-snapshot bijwerken")
+    args = parser.parse_args()
 
+    print("=== BrickViewer CSV Import ===\n")
+    with job_lock("rebrickable") as acquired:
+        if not acquired:
+            sys.exit("Er draait al een Rebrickable import (job of script)")
+        if args.rollback:
+            with dataset_write_lock(get_engine()):
+                version = rollback()
+                publish_offline()
+                publish_catalog()
+            print(f"\n=== Vorige dataset teruggezet (dataset version {version}) ===")
+            return
+        if args.publish_offline or args.publish_catalog:
+            with dataset_write_lock(get_engine()):
+                if args.publish_offline:
+                    publish_offline()
+                if args.publish_catalog:
+                    publish_catalog()
+            return
+
+        version = run_import(args.all, args.blue_green, args.force, args.workers)
+    if version is not None:
+        print(f"\n=== Import complete! (dataset version {version}) ===")
 
 if __name__ == "__main__":
     main()
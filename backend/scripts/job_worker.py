@@ -0,0 +1,104 @@
+"""
+Worker voor achtergrondjobs: imports, Brickset syncs en afgeleide data (zie app/services/jobs.py).
+
+Gebruik:
+    uv run python scripts/job_worker.py
+
+    # Meer jobs tegelijk, zonder scheduler (alleen runs uit /api/admin/jobs)
+    uv run python scripts/job_worker.py --workers 4 --no-schedule
+
+Runs komen uit de tabel job_runs. Elke run draait in een eigen proces uit een pool
+(een vers proces per run, zodat het geheugen van een import daarna vrijkomt). Meerdere
+workers, ook op verschillende machines, kunnen naast elkaar draaien: een run wordt met
+FOR UPDATE SKIP LOCKED door precies één worker geclaimd, en jobs met dezelfde lock-groep
+(bijv. de twee Brickset syncs) sluiten elkaar uit via een advisory lock.
+
+Eén worker tegelijk is scheduler (ook via een advisory lock): die zet jobs met een
+interval in de wachtrij als ze in die periode niet gestart zijn, en markeert runs van
+verdwenen workers als mislukt.
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal, get_engine
+from app.services.jobs import (
+    JOB_LOCK_CLASS,
+    SCHEDULER_LOCK_KEY,
+    claim_next,
+    execute_run,
+    fail_orphaned,
+    schedule_due,
+    worker_name,
+)
+import app.models  # noqa: F401
+
+POLL_INTERVAL = 2.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BrickViewer job worker")
+    parser.add_argument("--workers", type=int, default=2, help="Aantal jobs tegelijk")
+    parser.add_argument("--no-schedule", action="store_true", help="Geen jobs volgens interval starten")
+    args = parser.parse_args()
+
+    worker = worker_name()
+    print(f"Worker {worker}: {args.workers} processen")
+    # spawn: geen geërfde databaseverbindingen; max_tasks_per_child=1: een vers proces per run
+    pool = ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1)
+    running: dict[Future, int] = {}
+    scheduler = False
+
+    with get_engine().connect() as lock_conn:
+        try:
+            while True:
+                if not args.no_schedule and not scheduler:
+                    scheduler = lock_conn.scalar(
+                        text("SELECT pg_try_advisory_lock(:cls, :key)"),
+                        {"cls": JOB_LOCK_CLASS, "key": SCHEDULER_LOCK_KEY},
+                    )
+                    lock_conn.commit()
+                    if scheduler:
+                        print("  Scheduler actief")
+                if scheduler:
+                    db = SessionLocal()
+                    try:
+                        for run_id in schedule_due(db):
+                            print(f"  Run {run_id} ingepland")
+                        for run_id in fail_orphaned(db):
+                            print(f"  Run {run_id} mislukt: worker verdwenen")
+                    finally:
+                        db.close()
+
+                while len(running) < args.workers and (run_id := claim_next(worker)) is not None:
+                    print(f"  Run {run_id} gestart")
+                    running[pool.submit(execute_run, run_id)] = run_id
+
+                if running:
+                    done, _ = wait(running, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+                    time.sleep(POLL_INTERVAL)
+                for future in done:
+                    run_id = running.pop(future)
+                    try:
+                        print(f"  Run {run_id}: {future.result()}")
+                    except Exception as exc:  # proces gecrasht; de run blijft 'running' tot fail_orphaned
+                        print(f"  Run {run_id}: proces gestopt ({exc!r})")
+        except KeyboardInterrupt:
+            # Ctrl+C bereikt ook de jobprocessen: hun runs eindigen als 'failed'
+            print("\nStoppen...")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
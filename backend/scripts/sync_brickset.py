@@ -16,22 +16,28 @@ nodig voor de volledige dataset (~26.000 sets) — past ruim in één dag.
 """
 
 import argparse
+import hashlib
 import json
 import sys
 import time
 import urllib.parse
 import urllib.request
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import select
+from sqlalchemy import func, select, text
 from sqlalchemy.dialects.postgresql import insert
 
 from app.core.config import settings
-from app.core.database import SessionLocal
-from app.models.lego import BricksetData, Set
+from app.core.database import SessionLocal, get_engine
+from app.core.dataset import bump_version, dataset_write_lock
+from app.models.lego import BricksetData, BricksetHistory, BricksetMonthlyRollup, BricksetSync, Set
+from app.models.meta import CatalogChange
+from app.services.jobs import job_lock, report_progress
+from app.services.value_metrics import refresh_value_metrics
 import app.models  # noqa: F401
 
 API_BASE = "https://brickset.com/api/v3.asmx"
@@ -164,7 +170,6 @@ def map_set(bs: dict, set_num: str) -> dict:
         "wanted_by": _parse_int((bs.get("collections") or {}).get("wantedBy")),
         "description": ext.get("description") or None,
         "tags": tags,
-        "last_synced": datetime.now(timezone.utc).replace(tzinfo=None),
     }
 
 
@@ -184,27 +189,226 @@ def upsert_rows(session, rows: list[dict]) -> None:
     session.commit()
 
 
+def content_hash(row: dict) -> str:
+    """md5 van de gemapte payload: gelijke hash betekent dat er bij Brickset niets veranderd is."""
+    payload = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def touch_sync_state(session, hashes: dict[str, str]) -> None:
+    """Hash en last_synced bijwerken in de smalle synctabel, ook voor ongewijzigde sets."""
+    now = _utc_now()
+    stmt = insert(BricksetSync).values(
+        [{"set_num": set_num, "content_hash": h, "last_synced": now} for set_num, h in hashes.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["set_num"],
+        set_={"content_hash": stmt.excluded.content_hash, "last_synced": stmt.excluded.last_synced},
+    )
+    session.execute(stmt)
+    session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Historie
+# ---------------------------------------------------------------------------
+
+HISTORY_FIELDS = ("price_us", "price_uk", "price_ca", "price_de", "rating", "owned_by", "wanted_by")
+
+# Stand van elke set+metric aan het eind van de maand, geaggregeerd per thema
+ROLLUP_SQL = """
+    INSERT INTO brickset_monthly_rollups (month, theme_id, metric, set_count, sum_value, min_value, max_value)
+    SELECT :month, s.theme_id, h.metric, count(*), sum(h.value), min(h.value), max(h.value)
+    FROM (
+        SELECT DISTINCT ON (set_num, metric) set_num, metric, value
+        FROM brickset_history
+        WHERE observed_at < :month_end
+        ORDER BY set_num, metric, observed_at DESC
+    ) h
+    JOIN sets s ON s.set_num = h.set_num
+    WHERE h.value IS NOT NULL
+    GROUP BY s.theme_id, h.metric
+"""
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def ensure_history_partition(session, month: date) -> None:
+    """Maak de maandpartitie van brickset_history aan als die nog niet bestaat (in de lopende transactie).
+
+    Staan er al rijen van die maand in de default-partitie (een sync die over de maandgrens
+    liep), dan weigert Postgres de nieuwe partitie. De default wordt dan losgekoppeld, de rijen
+    verhuizen naar de maandpartitie en de default wordt weer aangekoppeld.
+    """
+    name = f"brickset_history_{month:%Y_%m}"
+    if session.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+        return
+    bounds = {"start": month, "end": _next_month(month)}
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF brickset_history "
+        f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+    )
+    in_default = session.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM brickset_history_default "
+        "WHERE observed_at >= :start AND observed_at < :end)"
+    ), bounds)
+    if in_default:
+        session.execute(text("ALTER TABLE brickset_history DETACH PARTITION brickset_history_default"))
+        session.execute(create)
+        session.execute(text(
+            "INSERT INTO brickset_history SELECT * FROM brickset_history_default "
+            "WHERE observed_at >= :start AND observed_at < :end"
+        ), bounds)
+        session.execute(text(
+            "DELETE FROM brickset_history_default WHERE observed_at >= :start AND observed_at < :end"
+        ), bounds)
+        session.execute(text("ALTER TABLE brickset_history ATTACH PARTITION brickset_history_default DEFAULT"))
+    else:
+        session.execute(create)
+
+
+def _changed(old, new) -> bool:
+    if old is None or new is None:
+        return old is not new
+    return round(float(old), 2) != round(float(new), 2)
+
+
+def record_history(session, rows: list[dict]) -> int:
+    """Leg gewijzigde waarden vast t.o.v. de huidige brickset_data rijen (één query per pagina)."""
+    observed_at = _utc_now()
+    # Per insert: een sync kan over de maandgrens heen lopen
+    ensure_history_partition(session, observed_at.date().replace(day=1))
+    current = {
+        row.set_num: row
+        for row in session.execute(
+            select(BricksetData.set_num, *(getattr(BricksetData, f) for f in HISTORY_FIELDS))
+            .where(BricksetData.set_num.in_([r["set_num"] for r in rows]))
+        )
+    }
+    changes = []
+    for row in rows:
+        cur = current.get(row["set_num"])
+        for field in HISTORY_FIELDS:
+            old = getattr(cur, field) if cur else None
+            if _changed(old, row[field]):
+                changes.append({
+                    "set_num": row["set_num"],
+                    "metric": field,
+                    "observed_at": observed_at,
+                    "value": row[field],
+                })
+    if changes:
+        session.execute(insert(BricksetHistory).values(changes))
+    return len(changes)
+
+
+def refresh_monthly_rollups(session) -> None:
+    """Herbereken de maand-rollups vanaf de laatst berekende maand t/m de huidige maand.
+
+    Eerdere maanden veranderen niet meer: de historie is append-only.
+    """
+    month = session.scalar(select(func.max(BricksetMonthlyRollup.month)))
+    if month is None:
+        first = session.scalar(select(func.min(BricksetHistory.observed_at)))
+        if first is None:
+            return
+        month = first.date().replace(day=1)
+
+    this_month = _utc_now().date().replace(day=1)
+    while month <= this_month:
+        session.execute(
+            BricksetMonthlyRollup.__table__.delete().where(BricksetMonthlyRollup.month == month)
+        )
+        session.execute(text(ROLLUP_SQL), {"month": month, "month_end": _next_month(month)})
+        month = _next_month(month)
+    session.commit()
+
+
+def _finish_sync(session) -> None:
+    refresh_monthly_rollups(session)
+    refresh_value_metrics(session)
+    bump_version(session, "brickset")
+
+
 # ---------------------------------------------------------------------------
 # Sync logic
 # ---------------------------------------------------------------------------
 
+@dataclass
+class SyncStats:
+    new: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+    @property
+    def changed(self) -> int:
+        return self.new + self.updated
+
+    def add(self, other: "SyncStats") -> None:
+        self.new += other.new
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.skipped += other.skipped
+
+    def summary(self) -> str:
+        return f"{self.new} nieuw, {self.updated} gewijzigd, {self.unchanged} ongewijzigd"
+
+
 def load_known_set_nums(session) -> set[str]:
     return {row[0] for row in session.execute(select(Set.set_num))}
 
 
-def _process_page(session, sets: list[dict], known: set[str]) -> tuple[int, int]:
-    """Verwerk een pagina sets en sla op in DB. Geeft (synced, skipped) terug."""
-    rows = []
+def _sync_rows(session, rows: list[dict]) -> SyncStats:
+    """Schrijf alleen rijen waarvan de content-hash afwijkt; de rest krijgt enkel een nieuwe last_synced."""
+    hashes = {row["set_num"]: content_hash(row) for row in rows}
+    known_hashes = dict(session.execute(
+        select(BricksetSync.set_num, BricksetSync.content_hash).where(BricksetSync.set_num.in_(hashes))
+    ).all())
+
+    stats = SyncStats()
+    changed = []
+    for row in rows:
+        set_num = row["set_num"]
+        if set_num not in known_hashes:
+            stats.new += 1
+            changed.append(row)
+        elif known_hashes[set_num] != hashes[set_num]:
+            stats.updated += 1
+            changed.append(row)
+        else:
+            stats.unchanged += 1
+
+    if changed:
+        record_history(session, changed)
+        upsert_rows(session, changed)
+        session.execute(insert(CatalogChange), [
+            {"table_name": "brickset_data", "key": row["set_num"], "op": "U" if row["set_num"] in known_hashes else "I"}
+            for row in changed
+        ])
+    touch_sync_state(session, hashes)
+    return stats
+
+
+def _process_page(session, sets: list[dict], known: set[str]) -> SyncStats:
+    """Verwerk een pagina sets en sla wijzigingen op in de DB."""
+    rows = {}
     skipped = 0
     for bs in sets:
         set_num = f"{bs.get('number', '')}-{bs.get('numberVariant', 1)}"
         if set_num not in known:
             skipped += 1
             continue
-        rows.append(map_set(bs, set_num))
-    if rows:
-        upsert_rows(session, rows)
-    return len(rows), skipped
+        rows[set_num] = map_set(bs, set_num)
+    stats = _sync_rows(session, list(rows.values())) if rows else SyncStats()
+    stats.skipped = skipped
+    return stats
 
 
 def sync_all() -> None:
@@ -217,13 +421,12 @@ def sync_all() -> None:
     current_year = datetime.now().year
     years = range(1949, current_year + 1)
 
-    total_synced = 0
-    total_skipped = 0
+    total = SyncStats()
     api_calls = 0
 
-    for year in years:
+    for index, year in enumerate(years):
+        report_progress("jaren", index, len(years), "jaren")
         page = 1
-        year_synced = 0
         while True:
             print(f"  {year} pagina {page}...", end=" ", flush=True)
             try:
@@ -240,23 +443,20 @@ def sync_all() -> None:
                 print("leeg")
                 break
 
-            synced, skipped = _process_page(session, sets, known)
-            year_synced += synced
-            total_skipped += skipped
-            print(f"{synced} gesynchroniseerd ({total_matches} totaal in {year})")
+            stats = _process_page(session, sets, known)
+            total.add(stats)
+            print(f"{stats.summary()} ({total_matches} totaal in {year})")
 
             if page * PAGE_SIZE >= total_matches:
                 break
             page += 1
             time.sleep(RATE_LIMIT_DELAY)
 
-        total_synced += year_synced
-
+    if total.changed:
+        _finish_sync(session)
     session.close()
     print(f"\n=== Sync voltooid ===")
-    print(f"  API calls: {api_calls}")
-    print(f"  Gesynchroniseerd: {total_synced}")
-    print(f"  Niet in Rebrickable: {total_skipped}")
+    _print_report(api_calls, total)
 
 
 def sync_delta(updated_since: str) -> None:
@@ -267,8 +467,7 @@ def sync_delta(updated_since: str) -> None:
     print(f"\nDelta sync (gewijzigd sinds {updated_since})...\n")
 
     page = 1
-    total_synced = 0
-    total_skipped = 0
+    total = SyncStats()
     api_calls = 0
 
     while True:
@@ -287,21 +486,29 @@ def sync_delta(updated_since: str) -> None:
             print("geen gewijzigde sets.")
             break
 
-        synced, skipped = _process_page(session, sets, known)
-        total_skipped += skipped
-        total_synced += synced
-        print(f"{synced} gesynchroniseerd (totaal gewijzigd: {total_matches})")
+        stats = _process_page(session, sets, known)
+        total.add(stats)
+        print(f"{stats.summary()} (totaal gewijzigd: {total_matches})")
+        report_progress("delta", min(page * PAGE_SIZE, total_matches), total_matches, "sets")
 
         if page * PAGE_SIZE >= total_matches:
             break
         page += 1
         time.sleep(RATE_LIMIT_DELAY)
 
+    if total.changed:
+        _finish_sync(session)
     session.close()
     print(f"\n=== Delta sync voltooid ===")
+    _print_report(api_calls, total)
+
+
+def _print_report(api_calls: int, total: SyncStats) -> None:
     print(f"  API calls: {api_calls}")
-    print(f"  Gesynchroniseerd: {total_synced}")
-    print(f"  Niet in Rebrickable: {total_skipped}")
+    print(f"  Nieuw: {total.new}")
+    print(f"  Gewijzigd: {total.updated}")
+    print(f"  Ongewijzigd: {total.unchanged}")
+    print(f"  Niet in Rebrickable: {total.skipped}")
 
 
 def sync_single(set_num: str) -> None:
@@ -323,9 +530,12 @@ def sync_single(set_num: str) -> None:
         return
 
     row = map_set(sets[0], set_num)
-    upsert_rows(session, [row])
+    stats = _sync_rows(session, [row])
+    if stats.changed:
+        _finish_sync(session)
     session.close()
 
+    print(f"  Status:        {stats.summary()}")
     print(f"  Naam:          {sets[0].get('name')}")
     print(f"  Prijs US:      ${row.get('price_us')}")
     print(f"  Prijs UK:      £{row.get('price_uk')}")
@@ -341,31 +551,69 @@ def sync_single(set_num: str) -> None:
 # CLI
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Synchroniseer Brickset data")
-    parser.add_argument("--days", type=int, help="Delta sync: alleen sets gewijzigd in laatste N dagen")
-    parser.add_argument("--set-num", type=str, help="Sync één set (bijv. 75192-1)")
-    args = parser.parse_args()
-
+def check_api_key() -> None:
     if not settings.brickset_api_key:
-        print("Fout: BRICKSET_API_KEY niet ingesteld in .env")
-        sys.exit(1)
+        sys.exit("Fout: BRICKSET_API_KEY niet ingesteld in .env")
 
     print("API key valideren...")
     result = _api_call("checkKey", {})
     if result.get("status") != "success":
-        print(f"Ongeldige API key: {result}")
-        sys.exit(1)
+        sys.exit(f"Ongeldige API key: {result}")
     print("  API key geldig ✓\n")
 
-    if args.set_num:
-        sync_single(args.set_num)
-    elif args.days:
-        since = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# Ingangen voor de jobs uit app/services/jobs.py; main() gebruikt ze ook
+
+def run_delta(days: int = 7) -> None:
+    check_api_key()
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    with dataset_write_lock(get_engine()):
         sync_delta(updated_since=since)
-    else:
+
+
+def run_all() -> None:
+    check_api_key()
+    with dataset_write_lock(get_engine()):
         sync_all()
 
 
+def refresh_derived() -> None:
+    """Afgeleide data opnieuw opbouwen zonder sync: rollups, waarde-metrics, planner-statistieken.
+
+    De nieuwe datasetversie laat de API zijn in-memory caches herladen.
+    """
+    with dataset_write_lock(get_engine()):
+        session = SessionLocal()
+        try:
+            print("Maand-rollups...")
+            refresh_monthly_rollups(session)
+            print(f"Value metrics: {refresh_value_metrics(session)} rijen")
+            print("ANALYZE...")
+            session.execute(text("ANALYZE"))
+            session.commit()
+            print(f"Dataset version {bump_version(session, 'derived')}")
+        finally:
+            session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synchroniseer Brickset data")
+    parser.add_argument("--days", type=int, help="Delta sync: alleen sets gewijzigd in laatste N dagen")
+    parser.add_argument("--set-num", type=str, help="Sync één set (bijv. 75192-1)")
+    args = parser.parse_args()
+
+    # Twee syncs tegelijk (script of job) verbruiken dubbel API-quotum
+    with job_lock("brickset") as acquired:
+        if not acquired:
+            sys.exit("Er draait al een Brickset sync (job of script)")
+        if args.set_num:
+            check_api_key()
+            with dataset_write_lock(get_engine()):
+                sync_single(args.set_num)
+        elif args.days:
+            run_delta(args.days)
+        else:
+            run_all()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,235 @@
+"""Downloads van de Rebrickable-dumps (scripts/import_csv.py) tegen een lokale HTTP-server."""
+
+import gzip
+import threading
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import import_csv
+from import_csv import DownloadManifest, fetch_csv
+
+
+class DumpServer:
+    """Serveert .csv.gz-fixtures met ETag, If-None-Match en Range/If-Range, zoals de CDN."""
+
+    def __init__(self):
+        self.files: dict[str, tuple[bytes, str]] = {}  # pad -> (inhoud, etag)
+        self.truncate: dict[str, int] = {}  # pad -> bytes waarna de verbinding (één keer) wegvalt
+        self.requests: list[tuple[str, dict]] = []  # (pad, request-headers)
+        self._versions = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def put(self, name: str, body: bytes) -> str:
+        self._versions += 1
+        self.files[f"/{name}.csv.gz"] = (body, f'"{name}-{self._versions}"')
+        return self.url(name)
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/{name}.csv.gz"
+
+    def last_headers(self, name: str) -> dict:
+        return [headers for path, headers in self.requests if path == f"/{name}.csv.gz"][-1]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                body, etag = server.files[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                status, start = 200, 0
+                if "Range" in self.headers and self.headers.get("If-Range", etag) == etag:
+                    start = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+                    if start >= len(body):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(body)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+                chunk = body[start:]
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(chunk)))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                self.end_headers()
+                cut = server.truncate.pop(self.path, None)
+                self.wfile.write(chunk[:cut] if cut is not None else chunk)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def dump(rows: int, seed: int = 0) -> bytes:
+    """Kleine CSV-dump als gzip, groot genoeg om halverwege af te breken."""
+    lines = ["set_num,name,year"] + [f"{i}-{seed},Set {i * 7919 % 10007} {seed},{1950 + i % 75}" for i in range(rows)]
+    return gzip.compress("\n".join(lines).encode(), mtime=0)
+
+
+@pytest.fixture
+def server():
+    with DumpServer() as server:
+        yield server
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_csv, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+def manifest(data_dir) -> DownloadManifest:
+    return DownloadManifest(data_dir / import_csv.MANIFEST_NAME)
+
+
+def test_first_download(server, data_dir):
+    body = dump(500)
+    url = server.put("sets", body)
+
+    assert fetch_csv("sets", url, manifest(data_dir)) == "downloaded"
+
+    assert (data_dir / "sets.csv.gz").read_bytes() == body
+    assert not (data_dir / "sets.csv.gz.part").exists()
+    state = manifest(data_dir).get("sets")
+    assert state.etag == server.files["/sets.csv.gz"][1]
+    assert state.size == len(body)
+    assert state.sha256 == import_csv.file_sha256(data_dir / "sets.csv.gz")
+    assert state.changed
+
+
+def test_unchanged_rerun_gets_304(server, data_dir):
+    url = server.put("sets", dump(500))
+    fetch_csv("sets", url, manifest(data_dir))
+    # Zoals import_in_place na een geslaagde import
+    first = manifest(data_dir)
+    state = first.get("sets")
+    state.imported_sha256 = state.sha256
+    first.save()
+
+    assert fetch_csv("sets", url, manifest(data_dir)) == "unchanged"
+
+    assert server.last_headers("sets")["If-None-Match"] == server.files["/sets.csv.gz"][1]
+    assert not manifest(data_dir).get("sets").changed
+
+
+def test_interrupted_download_resumes_with_if_range(server, data_dir):
+    body = dump(5000)
+    url = server.put("sets", body)
+    server.truncate["/sets.csv.gz"] = len(body) // 2
+
+    with pytest.raises(RuntimeError):
+        fetch_csv("sets", url, manifest(data_dir))
+    part = data_dir / "sets.csv.gz.part"
+    assert part.stat().st_size == len(body) // 2
+    assert not (data_dir / "sets.csv.gz").exists()
+
+    assert fetch_csv("sets", url, manifest(data_dir)) == "resumed"
+
+    headers = server.last_headers("sets")
+    assert headers["Range"] == f"bytes={len(body) // 2}-"
+    assert headers["If-Range"] == server.files["/sets.csv.gz"][1]
+    assert (data_dir / "sets.csv.gz").read_bytes() == body
+    assert not part.exists()
+    assert manifest(data_dir).get("sets").partial is None
+
+
+def test_if_range_mismatch_restarts_download(server, data_dir):
+    old = dump(5000)
+    url = server.put("sets", old)
+    server.truncate["/sets.csv.gz"] = len(old) // 2
+    with pytest.raises(RuntimeError):
+        fetch_csv("sets", url, manifest(data_dir))
+
+    # Intussen een nieuwe dump: de server negeert de Range en stuurt alles (200)
+    new = dump(5000, seed=1)
+    server.put("sets", new)
+
+    assert fetch_csv("sets", url, manifest(data_dir)) == "downloaded"
+
+    assert "Range" in server.last_headers("sets")
+    assert (data_dir / "sets.csv.gz").read_bytes() == new
+
+
+def test_range_not_satisfiable_restarts_download(server, data_dir):
+    body = dump(500)
+    url = server.put("sets", body)
+    # Deel-bestand dat langer is dan de dump zelf
+    (data_dir / "sets.csv.gz.part").write_bytes(b"\0" * (len(body) + 10))
+    state_manifest = manifest(data_dir)
+    state_manifest.get("sets").partial = server.files["/sets.csv.gz"][1]
+    state_manifest.save()
+
+    assert fetch_csv("sets", url, manifest(data_dir)) == "downloaded"
+
+    assert "Range" not in server.last_headers("sets")
+    assert (data_dir / "sets.csv.gz").read_bytes() == body
+
+
+def test_corrupt_gzip_is_rejected(server, data_dir):
+    good = dump(500)
+    url = server.put("sets", good)
+    fetch_csv("sets", url, manifest(data_dir))
+    sha256 = manifest(data_dir).get("sets").sha256
+
+    # Volledig ontvangen (lengte klopt), maar de CRC aan het eind niet
+    corrupt = bytearray(dump(500, seed=1))
+    corrupt[-8] ^= 0xFF
+    server.put("sets", bytes(corrupt))
+
+    with pytest.raises(RuntimeError, match="ongeldig gzip"):
+        fetch_csv("sets", url, manifest(data_dir))
+
+    assert (data_dir / "sets.csv.gz").read_bytes() == good
+    assert not (data_dir / "sets.csv.gz.part").exists()
+    state = manifest(data_dir).get("sets")
+    assert state.sha256 == sha256
+    assert state.partial is None
+
+
+def test_run_import_selects_changed_dumps(server, data_dir, monkeypatch):
+    urls = {name: server.put(name, dump(50, seed=i)) for i, name in enumerate(import_csv.IMPORTERS)}
+    monkeypatch.setattr(import_csv, "CSV_FILES", urls)
+    imported: list[list[str]] = []
+
+    def import_in_place(tables, manifest):
+        imported.append(tables)
+        for name in tables:
+            state = manifest.get(name)
+            state.imported_sha256 = state.sha256
+        manifest.save()
+        return len(imported)
+
+    monkeypatch.setattr(import_csv, "import_in_place", import_in_place)
+    monkeypatch.setattr(import_csv, "dataset_write_lock", lambda engine: nullcontext())
+    monkeypatch.setattr(import_csv, "publish_offline", lambda: None)
+    monkeypatch.setattr(import_csv, "publish_catalog", lambda: None)
+
+    assert import_csv.run_import() == 1
+    assert imported[-1] == list(import_csv.IMPORTERS)
+
+    server.put("sets", dump(60, seed=99))
+    assert import_csv.run_import() == 2
+    assert imported[-1] == ["sets"]
+
+    assert import_csv.run_import() is None
+    assert len(imported) == 2
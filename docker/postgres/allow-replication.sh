@@ -0,0 +1,4 @@
+#!/bin/sh
+# Draait eenmalig bij het aanmaken van het primary-volume: replicatieverbindingen toestaan
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
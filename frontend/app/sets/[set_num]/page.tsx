@@ -1,7 +1,7 @@
-import { getSet } from "@/lib/api"
+import { getSet, getSetParts } from "@/lib/api"
 import { Badge } from "@/components/ui/badge"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
-import type { BricksetInfo } from "@/types/api"
+import type { BricksetInfo, InventoryPartDetail, SetDetail } from "@/types/api"
 import Image from "next/image"
 import Link from "next/link"
 import { notFound } from "next/navigation"
@@ -59,16 +59,17 @@ export default async function SetDetailPage({
 }) {
   const { set_num } = await params
 
-  let set
+  let set: SetDetail
+  let parts: InventoryPartDetail[]
   try {
-    set = await getSet(set_num)
+    ;[set, parts] = await Promise.all([getSet(set_num, { parts: false }), getSetParts(set_num)])
   } catch {
     notFound()
   }
 
   const bs = set.brickset
-  const regularParts = set.parts.filter((p) => !p.is_spare)
-  const spareParts = set.parts.filter((p) => p.is_spare)
+  const regularParts = parts.filter((p) => !p.is_spare)
+  const spareParts = parts.filter((p) => p.is_spare)
 
   return (
     <div className="space-y-8">
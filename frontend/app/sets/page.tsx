@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from "react"
 import { getSets, getThemes } from "@/lib/api"
-import { SetCard } from "@/components/set-card"
+import { SET_CARD_FIELDS, SetCard } from "@/components/set-card"
 import { Input } from "@/components/ui/input"
 import { Button } from "@/components/ui/button"
 import { Skeleton } from "@/components/ui/skeleton"
@@ -42,7 +42,7 @@ export default function SetsPage() {
 
   useEffect(() => {
     setLoading(true)
-    getSets({ page, page_size: 24, search: search || undefined, theme_id: themeId })
+    getSets({ page, page_size: 24, search: search || undefined, theme_id: themeId, fields: SET_CARD_FIELDS })
       .then(setData)
       .catch(console.error)
       .finally(() => setLoading(false))
@@ -4,6 +4,9 @@ import { Card, CardContent } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import type { SetSummary } from "@/types/api"
 
+/** Velden die de kaart toont; lijstpagina's halen alleen deze op */
+export const SET_CARD_FIELDS: (keyof SetSummary)[] = ["set_num", "name", "year", "num_parts", "img_url"]
+
 export function SetCard({ set }: { set: SetSummary }) {
   return (
     <Link href={`/sets/${set.set_num}`}>
@@ -1,28 +1,93 @@
-import type { PaginatedMinifigs, PaginatedSets, SetDetail, Stats, Theme } from "@/types/api"
+import type {
+  ColumnarParts,
+  InventoryPartDetail,
+  PaginatedMinifigs,
+  PaginatedSets,
+  SetBatchResponse,
+  SetDetail,
+  PriceRegion,
+  SetSearchResults,
+  SetSection,
+  SetSort,
+  SetSummary,
+  Stats,
+  Theme,
+} from "@/types/api"
+import { offlineEnabled, offlineMinifigs, offlineSets, offlineThemes } from "@/lib/offline"
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000/api"
+const COLUMNAR_JSON = "application/vnd.brickviewer.columnar+json"
+// Optioneel: statische snapshot (scripts/build_snapshot.py) op disk of CDN
+const SNAPSHOT_BASE = process.env.NEXT_PUBLIC_SNAPSHOT_URL
+const SNAPSHOT_PAGE_SIZE = 24
 
-async function fetcher<T>(path: string): Promise<T> {
-  const res = await fetch(`${API_BASE}${path}`, { next: { revalidate: 300 } })
+interface SnapshotManifest {
+  version: number
+  files: Record<string, string>
+}
+
+async function fetcher<T>(path: string, accept?: string): Promise<T> {
+  const res = await fetch(`${API_BASE}${path}`, {
+    headers: accept ? { Accept: accept } : undefined,
+    next: { revalidate: 300 },
+  })
   if (!res.ok) throw new Error(`API error ${res.status}: ${path}`)
   return res.json() as Promise<T>
 }
 
+/** Bestand uit de snapshot voor dit API-pad, of null als er geen snapshot is of het pad ontbreekt */
+async function fromSnapshot<T>(path: string): Promise<T | null> {
+  if (!SNAPSHOT_BASE) return null
+  try {
+    const manifest = await fetch(`${SNAPSHOT_BASE}/manifest.json`, { next: { revalidate: 300 } })
+    if (!manifest.ok) return null
+    const name = ((await manifest.json()) as SnapshotManifest).files[`/api${path}`]
+    if (!name) return null
+    // Bestandsnamen bevatten een content-hash: de inhoud verandert nooit
+    const res = await fetch(`${SNAPSHOT_BASE}/${name}`, { cache: "force-cache" })
+    return res.ok ? ((await res.json()) as T) : null
+  } catch {
+    return null
+  }
+}
+
+function paginate<T>(rows: T[], page = 1, pageSize = 24) {
+  const offset = (page - 1) * pageSize
+  return { total: rows.length, page, page_size: pageSize, results: rows.slice(offset, offset + pageSize) }
+}
+
+function byName(a: { name: string }, b: { name: string }): number {
+  return a.name.localeCompare(b.name)
+}
+
+async function snapshotOrFetch<T>(path: string): Promise<T> {
+  return (await fromSnapshot<T>(path)) ?? fetcher<T>(path)
+}
+
 export function getStats(): Promise<Stats> {
-  return fetcher<Stats>("/stats")
+  return snapshotOrFetch<Stats>("/stats")
 }
 
-export function getThemes(): Promise<Theme[]> {
-  return fetcher<Theme[]>("/themes")
+export async function getThemes(): Promise<Theme[]> {
+  const local = offlineEnabled ? await offlineThemes() : null
+  if (local) return [...local].sort(byName)
+  return snapshotOrFetch<Theme[]>("/themes")
 }
 
-export function getSets(params: {
+export async function getSets(params: {
   page?: number
   page_size?: number
   theme_id?: number | null
   year_min?: number | null
   year_max?: number | null
   search?: string
+  /** Alleen deze velden ophalen (set_num komt altijd mee) */
+  fields?: (keyof SetSummary)[]
+  sort?: SetSort
+  region?: PriceRegion
+  price_per_piece_max?: number | null
+  price_per_gram_max?: number | null
+  theme_percentile_max?: number | null
 }): Promise<PaginatedSets> {
   const query = new URLSearchParams()
   if (params.page) query.set("page", String(params.page))
@@ -31,18 +96,127 @@ export function getSets(params: {
   if (params.year_min) query.set("year_min", String(params.year_min))
   if (params.year_max) query.set("year_max", String(params.year_max))
   if (params.search) query.set("search", params.search)
+  if (params.fields) query.set("fields", params.fields.join(","))
+  if (params.sort) query.set("sort", params.sort)
+  if (params.region) query.set("region", params.region)
+  if (params.price_per_piece_max != null) query.set("price_per_piece_max", String(params.price_per_piece_max))
+  if (params.price_per_gram_max != null) query.set("price_per_gram_max", String(params.price_per_gram_max))
+  if (params.theme_percentile_max != null) query.set("theme_percentile_max", String(params.theme_percentile_max))
+  const valued =
+    !!params.sort ||
+    params.price_per_piece_max != null ||
+    params.price_per_gram_max != null ||
+    params.theme_percentile_max != null
+  // Offline-catalogus: zelfde filters en volgorde als de API, zonder request
+  const local = offlineEnabled && !valued ? await offlineSets() : null
+  if (local) {
+    const search = params.search?.toLowerCase()
+    const rows = local
+      .filter((set) =>
+        (!params.theme_id || set.theme_id === params.theme_id) &&
+        (!params.year_min || set.year >= params.year_min) &&
+        (!params.year_max || set.year <= params.year_max) &&
+        (!search || set.name.toLowerCase().includes(search))
+      )
+      .sort((a, b) => b.year - a.year || byName(a, b))
+    return paginate(rows, params.page, params.page_size)
+  }
+  // De snapshot bevat alleen de ongefilterde lijst met standaard paginagrootte
+  const unfiltered = !params.theme_id && !params.year_min && !params.year_max && !params.search && !valued
+  if (unfiltered && (params.page_size ?? SNAPSHOT_PAGE_SIZE) === SNAPSHOT_PAGE_SIZE) {
+    return snapshotOrFetch<PaginatedSets>(`/sets?page=${params.page ?? 1}&page_size=${SNAPSHOT_PAGE_SIZE}`)
+  }
   return fetcher<PaginatedSets>(`/sets?${query.toString()}`)
 }
 
-export function getSet(setNum: string): Promise<SetDetail> {
-  return fetcher<SetDetail>(`/sets/${setNum}`)
+export async function getSet(setNum: string, options: { parts?: boolean } = {}): Promise<SetDetail> {
+  // Een snapshot-detail bevat altijd de onderdelen; dat is een superset van ?parts=false
+  const snapshot = await fromSnapshot<SetDetail>(`/sets/${setNum}`)
+  if (snapshot) return snapshot
+  const query = options.parts === false ? "?parts=false" : ""
+  return fetcher<SetDetail>(`/sets/${setNum}${query}`)
+}
+
+/** Gefacetteerd zoeken: resultaten plus aantallen per facetwaarde; lijsten zijn multi-select */
+export function searchSets(params: {
+  page?: number
+  page_size?: number
+  theme_id?: number[]
+  decade?: number[]
+  availability?: string[]
+  price_band?: string[]
+  tag?: string[]
+  packaging_type?: string[]
+  region?: PriceRegion
+  year_min?: number | null
+  year_max?: number | null
+  price_min?: number | null
+  price_max?: number | null
+  age?: number | null
+  rating_min?: number | null
+  search?: string
+  facet_limit?: number
+}): Promise<SetSearchResults> {
+  const query = new URLSearchParams()
+  for (const [key, value] of Object.entries(params)) {
+    if (value === undefined || value === null || value === "") continue
+    for (const item of Array.isArray(value) ? value : [value]) query.append(key, String(item))
+  }
+  return fetcher<SetSearchResults>(`/sets/search?${query.toString()}`)
+}
+
+/** Meerdere sets in één request (vergelijken, verlanglijst); `fields` beperkt de secties */
+export async function getSetsBatch(setNums: string[], fields?: SetSection[]): Promise<SetBatchResponse> {
+  const query = fields ? `?fields=${fields.join(",")}` : ""
+  const res = await fetch(`${API_BASE}/sets/batch${query}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ set_nums: setNums }),
+  })
+  if (!res.ok) throw new Error(`API error ${res.status}: /sets/batch`)
+  return res.json() as Promise<SetBatchResponse>
+}
+
+/** Kolomformaat terug naar één object per regel */
+export function decodeColumnarParts(data: ColumnarParts): InventoryPartDetail[] {
+  const { parts, colors, columns, img_prefix } = data
+  const rows: InventoryPartDetail[] = new Array(data.count)
+  for (let i = 0; i < data.count; i++) {
+    const p = columns.part[i]
+    const c = columns.color[i]
+    const img = columns.img_url?.[i]
+    rows[i] = {
+      part_num: parts.part_num[p],
+      part_name: parts.name[p],
+      color_id: colors.id[c],
+      color_name: colors.name[c],
+      color_rgb: colors.rgb[c],
+      quantity: columns.quantity[i],
+      is_spare: columns.is_spare[i] === 1,
+      img_url: img == null ? null : img_prefix + img,
+    }
+  }
+  return rows
+}
+
+/** Onderdelen van een set; compact kolomformaat over de lijn (~4x kleiner dan de JSON-regels) */
+export async function getSetParts(setNum: string): Promise<InventoryPartDetail[]> {
+  const snapshot = await fromSnapshot<SetDetail>(`/sets/${setNum}`)
+  if (snapshot) return snapshot.parts
+  return decodeColumnarParts(await fetcher<ColumnarParts>(`/sets/${setNum}/parts`, COLUMNAR_JSON))
 }
 
-export function getMinifigs(params: {
+export async function getMinifigs(params: {
   page?: number
   page_size?: number
   search?: string
 }): Promise<PaginatedMinifigs> {
+  const local = offlineEnabled ? await offlineMinifigs() : null
+  if (local) {
+    const search = params.search?.toLowerCase()
+    const rows = search ? local.filter((fig) => fig.name.toLowerCase().includes(search)) : [...local]
+    return paginate(rows.sort(byName), params.page, params.page_size)
+  }
   const query = new URLSearchParams()
   if (params.page) query.set("page", String(params.page))
   if (params.page_size) query.set("page_size", String(params.page_size))
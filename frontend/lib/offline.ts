@@ -0,0 +1,177 @@
+import type { MinifigSummary, SetSummary, Theme } from "@/types/api"
+
+// Offline-catalogus (kiosk): samenvattingen van sets, thema's en minifigs in IndexedDB,
+// bijgewerkt met de deltas die de import publiceert (backend/app/services/offline.py).
+// Bijv. NEXT_PUBLIC_OFFLINE_URL=http://localhost:8000/api/offline
+const OFFLINE_BASE = process.env.NEXT_PUBLIC_OFFLINE_URL
+const OFFLINE_FORMAT = 1
+const DB_NAME = "brickviewer-offline"
+// Manifest hooguit zo vaak opnieuw bekijken binnen één pagina-sessie
+const SYNC_INTERVAL_MS = 15 * 60 * 1000
+
+const STORES = { sets: "set_num", themes: "id", minifigs: "fig_num" } as const
+type StoreName = keyof typeof STORES
+
+interface BundleFile {
+  file: string
+  bytes: number
+}
+
+interface OfflineManifest {
+  format: number
+  version: number
+  base: BundleFile & { version: number }
+  deltas: (BundleFile & { from: number; to: number })[]
+}
+
+interface BundleTable {
+  columns: string[]
+  rows?: unknown[][]
+  upsert?: unknown[][]
+  delete?: IDBValidKey[]
+}
+
+interface Bundle {
+  tables: Partial<Record<StoreName, BundleTable>>
+}
+
+export const offlineEnabled = typeof window !== "undefined" && !!OFFLINE_BASE && "indexedDB" in window
+
+function request<T>(req: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result)
+    req.onerror = () => reject(req.error)
+  })
+}
+
+function completed(tx: IDBTransaction): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve()
+    tx.onerror = () => reject(tx.error)
+    tx.onabort = () => reject(tx.error)
+  })
+}
+
+let database: Promise<IDBDatabase> | null = null
+
+function openDatabase(): Promise<IDBDatabase> {
+  database ??= new Promise((resolve, reject) => {
+    // Het formaat is de schemaversie: een nieuw formaat begint met een lege database
+    const req = indexedDB.open(DB_NAME, OFFLINE_FORMAT)
+    req.onupgradeneeded = () => {
+      const db = req.result
+      for (const name of Array.from(db.objectStoreNames)) db.deleteObjectStore(name)
+      for (const [name, keyPath] of Object.entries(STORES)) db.createObjectStore(name, { keyPath })
+      db.createObjectStore("meta")
+    }
+    req.onsuccess = () => resolve(req.result)
+    req.onerror = () => reject(req.error)
+  })
+  return database
+}
+
+async function localVersion(db: IDBDatabase): Promise<number | null> {
+  const version = await request(db.transaction("meta").objectStore("meta").get("version"))
+  return typeof version === "number" ? version : null
+}
+
+async function fetchBundle(file: string): Promise<Bundle> {
+  // Bestandsnamen bevatten een content-hash: de inhoud verandert nooit
+  const res = await fetch(`${OFFLINE_BASE}/${file}`, { cache: "force-cache" })
+  if (!res.ok || !res.body) throw new Error(`Offline bundle ${res.status}: ${file}`)
+  const text = await new Response(res.body.pipeThrough(new DecompressionStream("gzip"))).text()
+  return JSON.parse(text) as Bundle
+}
+
+/** Basis (replace) of delta in één transactie, samen met het nieuwe versienummer */
+async function applyBundle(db: IDBDatabase, bundle: Bundle, version: number, replace: boolean): Promise<void> {
+  const names = Object.keys(STORES) as StoreName[]
+  const tx = db.transaction([...names, "meta"], "readwrite")
+  for (const name of names) {
+    const store = tx.objectStore(name)
+    if (replace) store.clear()
+    const table = bundle.tables[name]
+    if (!table) continue
+    for (const row of table.rows ?? table.upsert ?? []) {
+      store.put(Object.fromEntries(table.columns.map((column, i) => [column, row[i]])))
+    }
+    for (const key of table.delete ?? []) store.delete(key)
+  }
+  tx.objectStore("meta").put(version, "version")
+  await completed(tx)
+}
+
+/** Lokale catalogus bijwerken; geeft de lokale versie terug (null: geen offline-data) */
+export async function syncOffline(): Promise<number | null> {
+  const db = await openDatabase()
+  const local = await localVersion(db)
+  let manifest: OfflineManifest
+  try {
+    const res = await fetch(`${OFFLINE_BASE}/manifest.json`, { cache: "no-cache" })
+    if (!res.ok) return local
+    manifest = (await res.json()) as OfflineManifest
+  } catch {
+    // Geen verbinding: verder met wat er lokaal is
+    return local
+  }
+  if (manifest.format !== OFFLINE_FORMAT || manifest.version === local) return local
+
+  // Keten van deltas vanaf de lokale versie; de basis als die er niet is of kleiner is
+  const chain: OfflineManifest["deltas"] = []
+  let at = local
+  while (at !== null && at !== manifest.version) {
+    const next = manifest.deltas.find((delta) => delta.from === at)
+    if (!next) break
+    chain.push(next)
+    at = next.to
+  }
+  const chainBytes = chain.reduce((sum, delta) => sum + delta.bytes, 0)
+  try {
+    if (at === manifest.version && chainBytes < manifest.base.bytes) {
+      for (const delta of chain) await applyBundle(db, await fetchBundle(delta.file), delta.to, false)
+    } else {
+      await applyBundle(db, await fetchBundle(manifest.base.file), manifest.base.version, true)
+    }
+  } catch {
+    // Elke delta is een eigen transactie: wat al binnen is, blijft staan
+    return localVersion(db)
+  }
+  return manifest.version
+}
+
+let syncing: Promise<number | null> | null = null
+let syncedAt = 0
+
+function ensureSynced(): Promise<number | null> {
+  if (!syncing || Date.now() - syncedAt > SYNC_INTERVAL_MS) {
+    syncedAt = Date.now()
+    syncing = syncOffline().catch(() => null)
+  }
+  return syncing
+}
+
+const loaded = new Map<StoreName, { version: number; rows: unknown[] }>()
+
+async function readAll<T>(name: StoreName): Promise<T[] | null> {
+  if (!offlineEnabled) return null
+  const version = await ensureSynced()
+  if (version === null) return null
+  const cached = loaded.get(name)
+  if (cached?.version === version) return cached.rows as T[]
+  const db = await openDatabase()
+  const rows = await request(db.transaction(name).objectStore(name).getAll())
+  loaded.set(name, { version, rows })
+  return rows as T[]
+}
+
+export function offlineSets(): Promise<SetSummary[] | null> {
+  return readAll<SetSummary>("sets")
+}
+
+export function offlineThemes(): Promise<Theme[] | null> {
+  return readAll<Theme>("themes")
+}
+
+export function offlineMinifigs(): Promise<MinifigSummary[] | null> {
+  return readAll<MinifigSummary>("minifigs")
+}
@@ -45,6 +45,14 @@ export interface SetDetail extends SetSummary {
   brickset: BricksetInfo | null
 }
 
+export type SetSection = "theme" | "minifigs" | "parts" | "brickset"
+
+/** Set-details uit POST /sets/batch; alleen de gevraagde secties zijn aanwezig */
+export interface SetBatchResponse {
+  sets: (SetSummary & Partial<Pick<SetDetail, SetSection>>)[]
+  missing: string[]
+}
+
 export interface MinifigSummary {
   fig_num: string
   name: string
@@ -63,11 +71,56 @@ export interface InventoryPartDetail {
   img_url: string | null
 }
 
+/** Onderdelenlijst in kolomformaat (Accept: application/vnd.brickviewer.columnar+json) */
+export interface ColumnarParts {
+  set_num: string
+  count: number
+  img_prefix: string
+  parts: { part_num: string[]; name: string[] }
+  colors: { id: number[]; name: string[]; rgb: string[] }
+  columns: {
+    part: number[] // index in parts
+    color: number[] // index in colors
+    quantity: number[]
+    is_spare: number[] // 0/1
+    img_url: (string | null)[] | null // na img_prefix; null als geen enkele regel een afbeelding heeft
+  }
+}
+
+/** Waarde-metrics in de gekozen regio; alleen aanwezig bij sort= of een waardefilter */
+export interface SetValueSummary extends SetSummary {
+  price?: number
+  price_per_piece?: number | null
+  price_per_gram?: number | null
+  theme_percentile?: number
+}
+
+export type SetSort =
+  | "price_per_piece"
+  | "-price_per_piece"
+  | "price_per_gram"
+  | "-price_per_gram"
+  | "theme_percentile"
+  | "-theme_percentile"
+
 export interface PaginatedSets {
   total: number
   page: number
   page_size: number
-  results: SetSummary[]
+  results: SetValueSummary[]
+}
+
+export type PriceRegion = "us" | "uk" | "ca" | "de"
+
+export interface FacetValue {
+  value: number | string
+  label: string
+  count: number
+}
+
+export interface SetSearchResults extends PaginatedSets {
+  /** Per facet de waarden met aantallen; een facet telt zonder zijn eigen selectie */
+  facets: Record<"theme" | "decade" | "availability" | "price_band" | "tag", FacetValue[]>
 }
 
 export interface PaginatedMinifigs {